@@ -0,0 +1,153 @@
+"""
+Índices en memoria para autocompletar productos y clientes por prefijo
+
+Cada índice guarda listas ordenadas de (clave normalizada, id): una búsqueda
+es un bisect al prefijo y un recorrido de las claves que lo comparten, sin
+consultar la base de datos. Los servicios actualizan el índice al crear,
+modificar o desactivar registros; el vencimiento (AUTOCOMPLETADO_TTL_SEGUNDOS)
+cubre los cambios hechos por otros procesos y la recarga se hace en segundo
+plano sin dejar de responder (app.recarga).
+"""
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.busqueda import terminos
+from app.config import settings
+from app.models.cliente import Cliente
+from app.models.producto import Producto
+from app.recarga import EstadoRecargable
+
+# (claves principales, claves secundarias, datos devueltos)
+Entrada = Tuple[List[str], List[str], dict]
+
+
+def _clave(texto: Optional[str]) -> str:
+    """Misma normalización que la búsqueda: minúsculas, sin tildes ni signos"""
+    return " ".join(terminos(texto)) if texto else ""
+
+
+def _claves_nombre(texto: Optional[str]) -> Tuple[str, List[str]]:
+    """
+    Clave del nombre completo y claves desde cada palabra interior
+    ("crema colgate" -> "crema colgate", ["colgate"])
+    """
+    palabras = terminos(texto) if texto else []
+    return " ".join(palabras), [" ".join(palabras[i:]) for i in range(1, len(palabras))]
+
+
+class IndicePrefijos:
+    """
+    Las claves principales (nombre completo, códigos) se recorren antes que
+    las secundarias (nombre desde una palabra interior), así "colg" sugiere
+    primero los productos cuyo nombre empieza con "Colgate".
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        cargar: Callable[[Session], Iterable],
+        entrada: Callable[[object], Entrada],
+        ttl_segundos: float
+    ):
+        self._cargar = cargar
+        self._entrada = entrada
+        # Estado: (claves por prioridad, id -> entrada)
+        self._estado: EstadoRecargable[Tuple[Tuple[list, list], Dict[int, Entrada]]] = EstadoRecargable(
+            nombre, self._construir, ttl_segundos
+        )
+
+    def _construir(self, db: Session) -> Tuple[Tuple[list, list], Dict[int, Entrada]]:
+        claves: Tuple[list, list] = ([], [])
+        registros = {}
+        for fila in self._cargar(db):
+            registros[fila.id] = entrada = self._entrada(fila)
+            for prioridad in (0, 1):
+                claves[prioridad].extend((c, fila.id) for c in entrada[prioridad] if c)
+        claves[0].sort()
+        claves[1].sort()
+        return claves, registros
+
+    def buscar(self, db: Session, texto: str, limite: int) -> List[dict]:
+        """Hasta `limite` registros con alguna clave que empiece con el texto"""
+        self._estado.asegurar(db)
+        prefijo = _clave(texto)
+        resultados, vistos = [], set()
+        with self._estado.lock:
+            claves, registros = self._estado.estado
+            for lista in claves:
+                i = bisect_left(lista, (prefijo,))
+                while i < len(lista) and len(resultados) < limite:
+                    clave, id = lista[i]
+                    if not clave.startswith(prefijo):
+                        break
+                    if id not in vistos:
+                        vistos.add(id)
+                        resultados.append(registros[id][2])
+                    i += 1
+        return resultados
+
+    def actualizar(self, registro):
+        """Reemplaza las claves del registro (o lo quita si está inactivo)"""
+        id = registro.id
+        nueva = self._entrada(registro) if registro.activo else None
+
+        def reemplazar(estado):
+            claves, registros = estado
+            anterior = registros.pop(id, None)
+            if anterior:
+                for prioridad in (0, 1):
+                    lista = claves[prioridad]
+                    for c in anterior[prioridad]:
+                        i = bisect_left(lista, (c, id))
+                        if i < len(lista) and lista[i] == (c, id):
+                            del lista[i]
+            if nueva:
+                registros[id] = nueva
+                for prioridad in (0, 1):
+                    for c in nueva[prioridad]:
+                        if c:
+                            insort(claves[prioridad], (c, id))
+
+        self._estado.aplicar(reemplazar)
+
+
+def _entrada_producto(p) -> Entrada:
+    nombre, sufijos = _claves_nombre(p.nombre)
+    return (
+        [nombre, _clave(p.codigo), _clave(p.codigo_barras)],
+        sufijos,
+        {"id": p.id, "codigo": p.codigo, "nombre": p.nombre, "precio_venta": p.precio_venta}
+    )
+
+
+def _entrada_cliente(c) -> Entrada:
+    razon_social, sufijos = _claves_nombre(c.razon_social)
+    return (
+        [razon_social, _clave(c.nombre_comercial), _clave(c.codigo), _clave(c.ruc)],
+        sufijos,
+        {
+            "id": c.id, "codigo": c.codigo, "razon_social": c.razon_social,
+            "nombre_comercial": c.nombre_comercial, "ruc": c.ruc
+        }
+    )
+
+
+indice_productos = IndicePrefijos(
+    "autocompletado de productos",
+    lambda db: db.query(
+        Producto.id, Producto.codigo, Producto.codigo_barras, Producto.nombre, Producto.precio_venta
+    ).filter(Producto.activo == True),
+    _entrada_producto,
+    settings.AUTOCOMPLETADO_TTL_SEGUNDOS
+)
+
+indice_clientes = IndicePrefijos(
+    "autocompletado de clientes",
+    lambda db: db.query(
+        Cliente.id, Cliente.codigo, Cliente.razon_social, Cliente.nombre_comercial, Cliente.ruc
+    ).filter(Cliente.activo == True),
+    _entrada_cliente,
+    settings.AUTOCOMPLETADO_TTL_SEGUNDOS
+)
@@ -0,0 +1,203 @@
+"""
+Búsqueda de texto en productos y clientes con índice de texto completo
+
+- SQLite: tablas virtuales FTS5 (productos_fts, clientes_fts) con contenido
+  externo, sincronizadas por triggers en cada INSERT/UPDATE/DELETE.
+- PostgreSQL: índice GIN sobre un tsvector de las mismas columnas, sin
+  tildes (extensión unaccent) y en minúsculas.
+
+Las búsquedas ignoran mayúsculas y tildes, cada palabra se busca como
+prefijo ("colg tri" encuentra "Colgate Triple Acción") y los resultados se
+ordenan por relevancia.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+import re
+import unicodedata
+
+from sqlalchemy import and_, or_, func, literal_column, select, table, column, text
+from sqlalchemy.orm import Query
+
+
+class IndiceTexto(NamedTuple):
+    tabla: str
+    fts: str
+    columnas: Tuple[str, ...]
+    pesos: Tuple[float, ...]  # Relevancia relativa de cada columna
+
+
+INDICES: Dict[str, IndiceTexto] = {
+    "productos": IndiceTexto(
+        "productos", "productos_fts",
+        ("nombre", "codigo", "codigo_barras"),
+        (10.0, 5.0, 5.0)
+    ),
+    "clientes": IndiceTexto(
+        "clientes", "clientes_fts",
+        ("razon_social", "nombre_comercial", "codigo", "ruc"),
+        (10.0, 8.0, 5.0, 5.0)
+    ),
+}
+
+_PALABRA = re.compile(r"\w+")
+_DIACRITICOS = re.compile("[\u0300-\u036f]")
+
+# Tablas con índice de texto verificadas en este proceso (por motor)
+_disponibles: Dict[Tuple[str, str], bool] = {}
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes ("Acción" -> "accion"), igual que el índice"""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    return _DIACRITICOS.sub("", unicodedata.normalize("NFKD", texto))
+
+
+def terminos(texto: str) -> List[str]:
+    """Palabras normalizadas del texto de búsqueda"""
+    return _PALABRA.findall(normalizar(texto))
+
+
+def es_tabla_de_indice(nombre: str) -> bool:
+    """Tablas internas del índice (FTS5 crea varias con el mismo prefijo)"""
+    return any(nombre.startswith(indice.fts) for indice in INDICES.values())
+
+
+# ============ CREACIÓN DE ÍNDICES ============
+def crear_indices(conexion):
+    """
+    Crea los índices de texto que falten. Idempotente: se llama desde init_db
+    y desde la migración correspondiente.
+    """
+    if conexion.dialect.name == "sqlite":
+        for indice in INDICES.values():
+            _crear_fts5(conexion, indice)
+    elif conexion.dialect.name == "postgresql":
+        _crear_postgresql(conexion)
+    _disponibles.clear()
+
+
+def eliminar_indices(conexion):
+    if conexion.dialect.name == "sqlite":
+        for indice in INDICES.values():
+            for evento in ("ai", "ad", "au"):
+                conexion.execute(text(f"DROP TRIGGER IF EXISTS {indice.fts}_{evento}"))
+            conexion.execute(text(f"DROP TABLE IF EXISTS {indice.fts}"))
+    elif conexion.dialect.name == "postgresql":
+        for indice in INDICES.values():
+            conexion.execute(text(f"DROP INDEX IF EXISTS ix_{indice.tabla}_busqueda"))
+        conexion.execute(text("DROP FUNCTION IF EXISTS busqueda_normalizar(text)"))
+    _disponibles.clear()
+
+
+def _crear_fts5(conexion, indice: IndiceTexto):
+    existe = conexion.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nombre"),
+        {"nombre": indice.fts}
+    ).first()
+    if existe:
+        return
+
+    columnas = ", ".join(indice.columnas)
+    nuevos = ", ".join(f"new.{c}" for c in indice.columnas)
+    viejos = ", ".join(f"old.{c}" for c in indice.columnas)
+    # remove_diacritics 2: "acción" y "accion" generan el mismo término;
+    # prefix: índices extra para búsquedas de 2 y 3 caracteres
+    conexion.execute(text(
+        f"CREATE VIRTUAL TABLE {indice.fts} USING fts5({columnas}, "
+        f"content='{indice.tabla}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    conexion.execute(text(
+        f"CREATE TRIGGER {indice.fts}_ai AFTER INSERT ON {indice.tabla} BEGIN "
+        f"INSERT INTO {indice.fts}(rowid, {columnas}) VALUES (new.id, {nuevos}); END"
+    ))
+    conexion.execute(text(
+        f"CREATE TRIGGER {indice.fts}_ad AFTER DELETE ON {indice.tabla} BEGIN "
+        f"INSERT INTO {indice.fts}({indice.fts}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); END"
+    ))
+    conexion.execute(text(
+        f"CREATE TRIGGER {indice.fts}_au AFTER UPDATE OF {columnas} ON {indice.tabla} BEGIN "
+        f"INSERT INTO {indice.fts}({indice.fts}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); "
+        f"INSERT INTO {indice.fts}(rowid, {columnas}) VALUES (new.id, {nuevos}); END"
+    ))
+    # Indexa las filas que ya existían
+    conexion.execute(text(f"INSERT INTO {indice.fts}({indice.fts}) VALUES ('rebuild')"))
+
+
+def _documento_postgresql(indice: IndiceTexto) -> str:
+    """Expresión del tsvector; debe coincidir exactamente con la del índice"""
+    partes = " || ' ' || ".join(f"coalesce({c}, '')" for c in indice.columnas)
+    return f"to_tsvector('simple', busqueda_normalizar({partes}))"
+
+
+def _crear_postgresql(conexion):
+    conexion.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+    # unaccent() no es IMMUTABLE y no puede usarse directamente en un índice
+    conexion.execute(text(
+        "CREATE OR REPLACE FUNCTION busqueda_normalizar(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$"
+    ))
+    for indice in INDICES.values():
+        conexion.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{indice.tabla}_busqueda "
+            f"ON {indice.tabla} USING gin ({_documento_postgresql(indice)})"
+        ))
+
+
+# ============ CONSULTAS ============
+def _disponible(query: Query, indice: IndiceTexto) -> bool:
+    """Indica si el índice existe (se verifica una vez por proceso)"""
+    dialecto = query.session.get_bind().dialect.name
+    clave = (dialecto, indice.tabla)
+    if clave not in _disponibles:
+        if dialecto == "sqlite":
+            sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nombre"
+            nombre = indice.fts
+        elif dialecto == "postgresql":
+            sql = "SELECT 1 FROM pg_indexes WHERE indexname = :nombre"
+            nombre = f"ix_{indice.tabla}_busqueda"
+        else:
+            _disponibles[clave] = False
+            return False
+        _disponibles[clave] = query.session.execute(text(sql), {"nombre": nombre}).first() is not None
+    return _disponibles[clave]
+
+
+def filtrar(query: Query, modelo, texto: str) -> Query:
+    """
+    Restringe la consulta a las filas de `modelo` que coinciden con todas las
+    palabras del texto (como prefijos) y la ordena por relevancia. Si el
+    índice no existe se usa ILIKE sobre las mismas columnas.
+    """
+    indice = INDICES[modelo.__tablename__]
+    palabras = terminos(texto)
+    if not palabras:
+        return query
+
+    if not _disponible(query, indice):
+        return query.filter(and_(*(
+            or_(*(getattr(modelo, c).ilike(f"%{p}%") for c in indice.columnas))
+            for p in _PALABRA.findall(texto)
+        )))
+
+    if query.session.get_bind().dialect.name == "postgresql":
+        documento = literal_column(_documento_postgresql(indice))
+        consulta = func.to_tsquery("simple", " & ".join(f"{p}:*" for p in palabras))
+        return query.filter(documento.op("@@")(consulta)).order_by(
+            func.ts_rank(documento, consulta).desc(), modelo.id
+        )
+
+    fts = table(indice.fts, column("rowid"))
+    pesos = ", ".join(str(p) for p in indice.pesos)
+    coincidencias = select(
+        fts.c.rowid.label("id"),
+        literal_column(f"bm25({indice.fts}, {pesos})").label("puntaje")
+    ).where(
+        literal_column(indice.fts).op("MATCH")(" ".join(f'"{p}"*' for p in palabras))
+    ).subquery()
+    # bm25 es más negativo cuanto más relevante
+    return query.join(coincidencias, modelo.id == coincidencias.c.id).order_by(
+        coincidencias.c.puntaje, modelo.id
+    )
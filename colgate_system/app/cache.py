@@ -0,0 +1,126 @@
+"""
+Cache en memoria de respuestas de reportes (LRU con TTL e invalidación por etiquetas)
+"""
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+import hashlib
+import threading
+import time
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+
+class CacheRespuestas:
+    """
+    Cache LRU acotado de respuestas JSON. Cada entrada guarda el cuerpo ya
+    serializado, su ETag y las etiquetas de datos de las que depende
+    (ventas, inventario, logistica...) para poder invalidarla desde los
+    servicios cuando esos datos cambian.
+    """
+
+    def __init__(self, max_entradas: int, ttl_segundos: float):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._entradas: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.no_modificados = 0
+        self.invalidaciones = 0
+
+    def _obtener(self, clave: tuple) -> Optional[tuple]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            if entrada[0] < time.monotonic():
+                del self._entradas[clave]
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def _guardar(self, clave: tuple, entrada: tuple, version: int):
+        with self._lock:
+            # Si hubo una invalidación mientras se calculaba, no se guarda
+            if version != self._version:
+                return
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, *etiquetas: str):
+        """Elimina las entradas que dependen de alguna de las etiquetas (o todas si no se indican)"""
+        with self._lock:
+            self._version += 1
+            self.invalidaciones += 1
+            if not etiquetas:
+                self._entradas.clear()
+                return
+            for clave in [c for c, e in self._entradas.items() if e[3] & set(etiquetas)]:
+                del self._entradas[clave]
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl_segundos,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "no_modificados": self.no_modificados,
+                "invalidaciones": self.invalidaciones,
+                "tasa_aciertos": round(self.aciertos / consultas * 100, 1) if consultas else 0
+            }
+
+    def responder(
+        self,
+        request: Request,
+        rol: str,
+        etiquetas: Iterable[str],
+        calcular: Callable[[], dict]
+    ) -> Response:
+        """
+        Devuelve la respuesta cacheada para endpoint + parámetros + rol, o la
+        calcula y la guarda. Responde 304 si el cliente ya tiene el mismo ETag.
+        """
+        clave = (request.url.path, tuple(sorted(request.query_params.multi_items())), rol)
+
+        entrada = self._obtener(clave)
+        if entrada is None:
+            with self._lock:
+                version = self._version
+            cuerpo = JSONResponse(content=calcular()).body
+            etag = '"' + hashlib.sha1(cuerpo).hexdigest() + '"'
+            entrada = (time.monotonic() + self.ttl_segundos, cuerpo, etag, frozenset(etiquetas))
+            self._guardar(clave, entrada, version)
+
+        _, cuerpo, etag, _ = entrada
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if _coincide_etag(request.headers.get("if-none-match"), etag):
+            with self._lock:
+                self.no_modificados += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=cuerpo, media_type="application/json", headers=headers)
+
+
+def _coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [e.strip() for e in if_none_match.split(",")]
+    return "*" in candidatos or any(e.removeprefix("W/") == etag for e in candidatos)
+
+
+cache_respuestas = CacheRespuestas(
+    max_entradas=settings.CACHE_MAX_ENTRADAS,
+    ttl_segundos=settings.CACHE_TTL_SEGUNDOS
+)
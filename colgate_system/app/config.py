@@ -14,10 +14,80 @@ class Settings(BaseSettings):
     # Base de datos
     DATABASE_URL: str = "sqlite:///./colgate_system.db"
     
+    # Pool de conexiones (PostgreSQL/MySQL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # segundos
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: int = 30  # segundos esperando una conexión libre
+    
+    # SQLite (PRAGMAs aplicados a cada conexión)
+    SQLITE_WAL: bool = True  # Lectores no se bloquean mientras hay un escritor
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # bytes
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    
+    # Zona horaria del negocio (días y meses de reportes y envíos)
+    ZONA_HORARIA: str = "America/Lima"
+    
+    # Reintentos de transacciones de reserva de stock ante bloqueos/deadlocks
+    RESERVA_REINTENTOS: int = 3
+    
+    # Numeración de documentos: números reservados por proceso en cada acceso al contador
+    NUMERACION_BLOQUE: int = 10
+    
+    # Catálogo de productos en memoria (se invalida al modificar productos)
+    CATALOGO_TTL_SEGUNDOS: int = 300
+    
+    # Autocompletado de productos y clientes (índice de prefijos en memoria)
+    AUTOCOMPLETADO_LIMITE: int = 10
+    AUTOCOMPLETADO_TTL_SEGUNDOS: int = 600
+    
+    # Alertas de stock (recálculo completo y cambios guardados para el feed)
+    ALERTAS_TTL_SEGUNDOS: int = 60
+    ALERTAS_CAMBIOS_MAX: int = 1000
+    
+    # Mapa distrito -> zona de reparto en memoria (se invalida al modificar zonas)
+    ZONAS_TTL_SEGUNDOS: int = 300
+    
+    # Depósito por defecto para rutas si el almacén no tiene coordenadas
+    DEPOSITO_LATITUD: float = -12.0464
+    DEPOSITO_LONGITUD: float = -77.0428
+    
+    # Matrices de distancias (float32 mapeadas en memoria, una por conjunto de ubicaciones)
+    DISTANCIAS_DIRECTORIO: str = "./cache_distancias"
+    DISTANCIAS_MAX_ARCHIVOS: int = 8
+    # Optimización de rutas con la matriz de distancias hasta esta cantidad de paradas (más: plano aproximado)
+    DISTANCIAS_MAX_PARADAS: int = 500
+    
+    # Índice espacial de clientes (grilla en memoria para búsquedas por cercanía)
+    GEO_CELDA_GRADOS: float = 0.01  # ~1.1 km
+    GEO_TTL_SEGUNDOS: int = 600
+    GEO_LIMITE: int = 100
+    
+    # Importación de ventas en lote
+    VENTAS_LOTE_MAX: int = 5000
+    
+    # Paginación
+    CONTEO_APROXIMADO_LIMITE: int = 10000  # Máximo de filas contadas con conteo=aproximado
+    
+    # Hilos para ejecutar endpoints síncronos (acceso a base de datos) fuera del event loop
+    THREADPOOL_WORKERS: int = 40
+    
     # Seguridad
     SECRET_KEY: str = "tu_clave_secreta_super_segura_cambiar_en_produccion_2024"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 horas
+    AUTH_CACHE_TTL_SEGUNDOS: int = 60  # Vigencia del usuario autenticado en cache
+    BCRYPT_ROUNDS: int = 12  # Costo objetivo; los hashes con otro costo se actualizan al iniciar sesión
+    HASH_WORKERS: int = 4  # Hilos dedicados a hashear/verificar passwords
+    
+    # Cache de respuestas de reportes
+    CACHE_TTL_SEGUNDOS: int = 30
+    CACHE_MAX_ENTRADAS: int = 256
+    # Meses cerrados de las ventas mensuales (cubre ventas modificadas por otros procesos)
+    REPORTE_MENSUAL_TTL_SEGUNDOS: int = 300
     
     # Configuración de empresa
     COMPANY_NAME: str = "Colgate-Palmolive"
@@ -1,16 +1,58 @@
 """
 Configuración de la base de datos
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+es_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
+
+def _crear_engine():
+    """Crea el motor con la configuración de pool/PRAGMAs según el tipo de base de datos"""
+    if es_sqlite:
+        connect_args = {
+            "check_same_thread": False,  # Solo para SQLite
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        }
+        if ":memory:" in settings.DATABASE_URL or settings.DATABASE_URL == "sqlite://":
+            # Base en memoria: SQLAlchemy usa su propio pool de una conexión
+            return create_engine(settings.DATABASE_URL, connect_args=connect_args)
+        return create_engine(
+            settings.DATABASE_URL,
+            connect_args=connect_args,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT
+        )
+    return create_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_timeout=settings.DB_POOL_TIMEOUT
+    )
+
+
 # Crear motor de base de datos
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Solo para SQLite
-)
+engine = _crear_engine()
+
+
+if es_sqlite:
+    @event.listens_for(engine, "connect")
+    def _configurar_sqlite(dbapi_connection, connection_record):
+        """Aplica los PRAGMAs de rendimiento a cada nueva conexión SQLite"""
+        cursor = dbapi_connection.cursor()
+        if settings.SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")  # negativo = KiB
+        cursor.close()
 
 # Crear sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -37,6 +79,39 @@ def init_db():
     """
     from app.models import (
         usuario, producto, cliente, proveedor,
-        inventario, venta, logistica, categoria
+        inventario, venta, logistica, categoria, contador
     )
     Base.metadata.create_all(bind=engine)
+
+    # create_all tampoco agrega columnas: las nuevas columnas opcionales se
+    # agregan aquí (los cambios mayores van en las migraciones de Alembic)
+    from sqlalchemy import inspect
+    from sqlalchemy.schema import CreateColumn, CreateIndex
+    inspector = inspect(engine)
+    with engine.begin() as conexion:
+        for tabla in Base.metadata.sorted_tables:
+            existentes = {c["name"] for c in inspector.get_columns(tabla.name)}
+            for columna in tabla.columns:
+                if columna.name not in existentes and columna.nullable and columna.server_default is None:
+                    definicion = CreateColumn(columna).compile(dialect=engine.dialect)
+                    conexion.exec_driver_sql(f"ALTER TABLE {tabla.name} ADD COLUMN {definicion}")
+
+    # create_all no agrega índices nuevos a tablas que ya existían
+    # (IF NOT EXISTS en lugar de checkfirst: la reflexión omite los índices sobre expresiones)
+    for tabla in Base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            try:
+                with engine.begin() as conexion:
+                    conexion.execute(CreateIndex(indice, if_not_exists=True))
+            except SQLAlchemyError as e:
+                # Ej. un índice único sobre datos duplicados: se resuelve con la migración
+                print(f"⚠️  No se pudo crear el índice {indice.name}: {e.__class__.__name__}")
+
+    # Índices de texto completo para búsquedas de productos y clientes
+    from app import busqueda
+    try:
+        with engine.begin() as conexion:
+            busqueda.crear_indices(conexion)
+    except SQLAlchemyError as e:
+        # Ej. PostgreSQL sin permiso para CREATE EXTENSION: las búsquedas usan ILIKE
+        print(f"⚠️  No se pudieron crear los índices de búsqueda: {e.__class__.__name__}")
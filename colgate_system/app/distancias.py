@@ -0,0 +1,232 @@
+"""
+Matrices de distancias (haversine, en km) entre clientes y almacenes
+
+Las matrices se calculan con NumPy por bloques de filas (memoria acotada
+aunque la matriz no entre en RAM) y se guardan como float32 en archivos
+mapeados en memoria dentro de DISTANCIAS_DIRECTORIO. Cada archivo se nombra
+con un hash del conjunto de ubicaciones (claves y coordenadas, en orden):
+pedir otra vez las mismas ubicaciones reutiliza el archivo sin recalcular.
+La optimización de rutas (`logistica_service.optimizar_rutas`) toma de aquí
+las distancias entre el almacén y los clientes de las paradas, así simular y
+luego guardar las rutas del día calcula la matriz una sola vez.
+
+Cuando un cliente cambia de coordenadas (`cliente_service.actualizar_cliente`)
+solo se recalculan su fila y su columna en las matrices que lo contienen y el
+archivo se renombra con el hash nuevo.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.cliente import Cliente
+from app.models.inventario import Almacen
+
+RADIO_TIERRA_KM = 6371.0088
+# Elementos float64 calculados por bloque (~32 MB)
+BLOQUE_ELEMENTOS = 4 * 1024 * 1024
+
+
+class Ubicacion(NamedTuple):
+    clave: str  # "cliente:12", "almacen:1"
+    latitud: float
+    longitud: float
+
+
+class MatrizDistancias(NamedTuple):
+    claves: List[str]
+    distancias: np.ndarray  # memmap de solo lectura (n x n, float32)
+
+    def indice(self, clave: str) -> int:
+        return self.claves.index(clave)
+
+    def distancia(self, origen: str, destino: str) -> float:
+        return float(self.distancias[self.indice(origen), self.indice(destino)])
+
+
+def clave_cliente(cliente_id: int) -> str:
+    return f"cliente:{cliente_id}"
+
+
+def clave_almacen(almacen_id: int) -> str:
+    return f"almacen:{almacen_id}"
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distancia de círculo máximo; acepta escalares o arreglos (con broadcasting)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _hash(claves: Sequence[str], coordenadas: np.ndarray) -> str:
+    h = hashlib.sha1()
+    h.update("\n".join(claves).encode())
+    h.update(np.ascontiguousarray(coordenadas, dtype=np.float64).tobytes())
+    return h.hexdigest()[:20]
+
+
+def _calcular(destino: np.ndarray, coordenadas: np.ndarray):
+    """Llena la matriz destino (n x n) por bloques de filas"""
+    n = len(coordenadas)
+    lat, lon = coordenadas[:, 0], coordenadas[:, 1]
+    filas = max(1, BLOQUE_ELEMENTOS // max(n, 1))
+    for i in range(0, n, filas):
+        j = min(i + filas, n)
+        destino[i:j] = haversine_km(lat[i:j, None], lon[i:j, None], lat[None, :], lon[None, :])
+
+
+class CacheDistancias:
+    """
+    Registro de las matrices guardadas en el directorio: hash -> (claves,
+    coordenadas). Los índices se leen del disco la primera vez, así las
+    actualizaciones incrementales alcanzan también a matrices de antes de
+    reiniciar el proceso.
+    """
+
+    def __init__(self, directorio: str, max_archivos: int):
+        self.directorio = directorio
+        self.max_archivos = max_archivos
+        self._lock = threading.RLock()
+        self._registro: Optional[Dict[str, Tuple[List[str], np.ndarray]]] = None
+
+    def _ruta(self, clave: str, extension: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.{extension}")
+
+    def _cargar_registro(self) -> Dict[str, Tuple[List[str], np.ndarray]]:
+        if self._registro is None:
+            self._registro = {}
+            if os.path.isdir(self.directorio):
+                for nombre in os.listdir(self.directorio):
+                    clave, extension = os.path.splitext(nombre)
+                    if extension != ".json" or not os.path.exists(self._ruta(clave, "f32")):
+                        continue
+                    with open(self._ruta(clave, "json")) as f:
+                        datos = json.load(f)
+                    self._registro[clave] = (datos["claves"], np.array(datos["coordenadas"], dtype=np.float64))
+        return self._registro
+
+    def _guardar_indice(self, clave: str, claves: List[str], coordenadas: np.ndarray):
+        temporal = self._ruta(clave, "json.tmp")
+        with open(temporal, "w") as f:
+            json.dump({"claves": claves, "coordenadas": coordenadas.tolist()}, f)
+        os.replace(temporal, self._ruta(clave, "json"))
+
+    def _eliminar(self, clave: str):
+        self._registro.pop(clave, None)
+        for extension in ("json", "f32"):
+            try:
+                os.remove(self._ruta(clave, extension))
+            except FileNotFoundError:
+                pass
+
+    def _depurar(self):
+        """Borra las matrices menos usadas por encima de max_archivos"""
+        if len(self._registro) <= self.max_archivos:
+            return
+        por_uso = sorted(self._registro, key=lambda c: os.path.getmtime(self._ruta(c, "f32")))
+        for clave in por_uso[:len(self._registro) - self.max_archivos]:
+            self._eliminar(clave)
+
+    def matriz(self, ubicaciones: Sequence[Ubicacion]) -> MatrizDistancias:
+        claves = [u.clave for u in ubicaciones]
+        coordenadas = np.array([(u.latitud, u.longitud) for u in ubicaciones], dtype=np.float64).reshape(-1, 2)
+        n = len(claves)
+        if n == 0:
+            return MatrizDistancias([], np.zeros((0, 0), dtype=np.float32))
+        clave = _hash(claves, coordenadas)
+
+        with self._lock:
+            registro = self._cargar_registro()
+            archivo = self._ruta(clave, "f32")
+            if clave in registro:
+                os.utime(archivo)
+            else:
+                os.makedirs(self.directorio, exist_ok=True)
+                temporal = self._ruta(clave, "f32.tmp")
+                destino = np.memmap(temporal, dtype=np.float32, mode="w+", shape=(n, n))
+                _calcular(destino, coordenadas)
+                destino.flush()
+                del destino
+                os.replace(temporal, archivo)
+                self._guardar_indice(clave, claves, coordenadas)
+                registro[clave] = (claves, coordenadas)
+                self._depurar()
+            return MatrizDistancias(claves, np.memmap(archivo, dtype=np.float32, mode="r", shape=(n, n)))
+
+    def actualizar_ubicacion(self, clave: str, latitud: Optional[float], longitud: Optional[float]):
+        """
+        Recalcula la fila y la columna de la ubicación en cada matriz que la
+        contiene. Sin coordenadas la ubicación ya no pertenece al conjunto y
+        esas matrices se descartan.
+        """
+        with self._lock:
+            registro = self._cargar_registro()
+            for anterior, (claves, coordenadas) in list(registro.items()):
+                if clave not in claves:
+                    continue
+                if latitud is None or longitud is None:
+                    self._eliminar(anterior)
+                    continue
+                i = claves.index(clave)
+                if coordenadas[i, 0] == latitud and coordenadas[i, 1] == longitud:
+                    continue
+                coordenadas = coordenadas.copy()
+                coordenadas[i] = (latitud, longitud)
+                n = len(claves)
+                matriz = np.memmap(self._ruta(anterior, "f32"), dtype=np.float32, mode="r+", shape=(n, n))
+                fila = haversine_km(latitud, longitud, coordenadas[:, 0], coordenadas[:, 1])
+                matriz[i, :] = fila
+                matriz[:, i] = fila
+                matriz.flush()
+                del matriz
+
+                nueva = _hash(claves, coordenadas)
+                del registro[anterior]
+                if nueva in registro:
+                    self._eliminar(anterior)
+                    continue
+                os.replace(self._ruta(anterior, "f32"), self._ruta(nueva, "f32"))
+                self._guardar_indice(nueva, claves, coordenadas)
+                os.remove(self._ruta(anterior, "json"))
+                registro[nueva] = (claves, coordenadas)
+
+
+cache_distancias = CacheDistancias(settings.DISTANCIAS_DIRECTORIO, settings.DISTANCIAS_MAX_ARCHIVOS)
+
+
+def ubicaciones(db: Session, cliente_ids: Optional[Sequence[int]] = None) -> List[Ubicacion]:
+    """
+    Almacenes activos y clientes activos (todos o los indicados) con
+    coordenadas, ordenados por clave para que el mismo conjunto dé el mismo hash
+    """
+    almacenes = db.query(Almacen.id, Almacen.latitud, Almacen.longitud).filter(
+        Almacen.activo == True, Almacen.latitud.isnot(None), Almacen.longitud.isnot(None)
+    ).order_by(Almacen.id)
+    clientes = db.query(Cliente.id, Cliente.latitud, Cliente.longitud).filter(
+        Cliente.activo == True, Cliente.latitud.isnot(None), Cliente.longitud.isnot(None)
+    )
+    if cliente_ids is not None:
+        clientes = clientes.filter(Cliente.id.in_(set(cliente_ids)))
+    return (
+        [Ubicacion(clave_almacen(id), lat, lon) for id, lat, lon in almacenes]
+        + [Ubicacion(clave_cliente(id), lat, lon) for id, lat, lon in clientes.order_by(Cliente.id)]
+    )
+
+
+def matriz_distancias(db: Session, cliente_ids: Optional[Sequence[int]] = None) -> MatrizDistancias:
+    """Matriz entre los almacenes y los clientes indicados (o todos)"""
+    return cache_distancias.matriz(ubicaciones(db, cliente_ids))
+
+
+def actualizar_cliente(cliente: Cliente):
+    cache_distancias.actualizar_ubicacion(clave_cliente(cliente.id), cliente.latitud, cliente.longitud)
+
+
+def actualizar_almacen(almacen: Almacen):
+    cache_distancias.actualizar_ubicacion(clave_almacen(almacen.id), almacen.latitud, almacen.longitud)
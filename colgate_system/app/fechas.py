@@ -0,0 +1,76 @@
+"""
+Fechas del negocio: días, meses y años como rangos semiabiertos [inicio, fin)
+
+Hay dos clases de columnas DateTime (ambas sin zona):
+- Instantes registrados por el sistema con datetime.utcnow (fecha_creacion,
+  fecha_pedido, MovimientoInventario.fecha): guardan UTC, así que el día del
+  negocio empieza a la medianoche local expresada en UTC (rango_dia y afines).
+- Fechas que ingresa el usuario para programar (Envio.fecha_programada,
+  Venta.fecha_entrega_solicitada, RutaReparto.fecha): guardan la fecha/hora
+  local tal como se escribió, y el día va de 00:00 a 00:00 sin convertir
+  (rango_dia_local).
+
+En ambos casos los filtros son comparaciones directas sobre la columna y
+pueden usar sus índices (a diferencia de func.date(columna) == dia).
+"""
+from typing import Tuple
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_
+
+from app.config import settings
+
+ZONA_NEGOCIO = ZoneInfo(settings.ZONA_HORARIA)
+
+Rango = Tuple[datetime, datetime]
+
+
+def hoy() -> date:
+    """Fecha actual en la zona horaria del negocio"""
+    return datetime.now(ZONA_NEGOCIO).date()
+
+
+def dia_negocio(momento: datetime) -> date:
+    """Día del negocio al que pertenece un instante guardado en UTC"""
+    return momento.replace(tzinfo=timezone.utc).astimezone(ZONA_NEGOCIO).date()
+
+
+def inicio_dia(dia: date) -> datetime:
+    """Medianoche local del día, expresada en UTC sin zona (como en la base de datos)"""
+    local = datetime.combine(dia, datetime.min.time(), tzinfo=ZONA_NEGOCIO)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def rango_dias(desde: date, hasta: date) -> Rango:
+    """Desde el inicio de `desde` hasta el inicio de `hasta` (excluido)"""
+    return inicio_dia(desde), inicio_dia(hasta)
+
+
+def rango_dia(dia: date) -> Rango:
+    return rango_dias(dia, dia + timedelta(days=1))
+
+
+def inicio_dia_local(dia: date) -> datetime:
+    """Medianoche del día sin convertir, para columnas con fechas ingresadas por el usuario"""
+    return datetime.combine(dia, time.min)
+
+
+def rango_dia_local(dia: date) -> Rango:
+    """Día completo en columnas con fechas locales (fecha programada, entrega solicitada)"""
+    return inicio_dia_local(dia), inicio_dia_local(dia + timedelta(days=1))
+
+
+def rango_mes(year: int, mes: int) -> Rango:
+    siguiente = date(year + 1, 1, 1) if mes == 12 else date(year, mes + 1, 1)
+    return rango_dias(date(year, mes, 1), siguiente)
+
+
+def rango_anio(year: int) -> Rango:
+    return rango_dias(date(year, 1, 1), date(year + 1, 1, 1))
+
+
+def en_rango(columna, rango: Rango):
+    """Condición columna >= inicio AND columna < fin"""
+    inicio, fin = rango
+    return and_(columna >= inicio, columna < fin)
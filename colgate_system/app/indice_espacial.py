@@ -0,0 +1,213 @@
+"""
+Índice espacial en memoria de las ubicaciones de los clientes
+
+Las coordenadas se agrupan en una grilla de celdas de GEO_CELDA_GRADOS
+(~1 km con 0.01°). Una búsqueda recorre anillos de celdas alrededor del punto
+consultado, del más cercano al más lejano, y se detiene en cuanto ya tiene
+`limite` resultados a menos distancia que cualquier celda sin recorrer; así
+solo se miden las distancias de los clientes de la vecindad, sin consultar la
+base de datos. Los servicios actualizan el índice al crear, modificar o
+desactivar clientes y el vencimiento (GEO_TTL_SEGUNDOS) cubre los cambios de
+otros procesos, con la recarga en segundo plano de app.recarga.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import heapq
+import math
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.distancias import haversine_km
+from app.models.cliente import Cliente
+from app.recarga import EstadoRecargable
+from app.ruteo import KM_POR_GRADO_LATITUD, KM_POR_GRADO_LONGITUD
+
+Celda = Tuple[int, int]
+# Límites de celdas (fila mínima, fila máxima, columna mínima, columna máxima)
+Limites = Tuple[int, int, int, int]
+
+
+class _Grilla:
+    """Clientes por celda, datos de cada cliente y límites de las celdas ocupadas"""
+
+    def __init__(self):
+        self.celdas: Dict[Celda, List[int]] = {}
+        self.puntos: Dict[int, Tuple[float, float, dict]] = {}
+        self.limites: Optional[Limites] = None
+
+    def ampliar_limites(self, celda: Celda):
+        i, j = celda
+        if self.limites is None:
+            self.limites = (i, i, j, j)
+        else:
+            imin, imax, jmin, jmax = self.limites
+            self.limites = (min(imin, i), max(imax, i), min(jmin, j), max(jmax, j))
+
+
+class IndiceEspacial:
+
+    def __init__(self, ttl_segundos: float, celda_grados: float):
+        self.celda_grados = celda_grados
+        self._estado: EstadoRecargable[_Grilla] = EstadoRecargable(
+            "índice espacial de clientes", self._construir, ttl_segundos
+        )
+
+    def _celda(self, latitud: float, longitud: float) -> Celda:
+        return math.floor(latitud / self.celda_grados), math.floor(longitud / self.celda_grados)
+
+    def _construir(self, db: Session) -> _Grilla:
+        grilla = _Grilla()
+        filas = db.query(
+            Cliente.id, Cliente.codigo, Cliente.razon_social, Cliente.distrito,
+            Cliente.latitud, Cliente.longitud
+        ).filter(
+            Cliente.activo == True, Cliente.latitud.isnot(None), Cliente.longitud.isnot(None)
+        )
+        for fila in filas:
+            grilla.puntos[fila.id] = (fila.latitud, fila.longitud, _datos(fila))
+            grilla.celdas.setdefault(self._celda(fila.latitud, fila.longitud), []).append(fila.id)
+        for celda in grilla.celdas:
+            grilla.ampliar_limites(celda)
+        return grilla
+
+    def _anillo(self, grilla: _Grilla, centro: Celda, k: int, limites: Limites) -> List[int]:
+        """Clientes de las celdas a distancia k (en celdas) del centro, dentro de los límites"""
+        ci, cj = centro
+        imin, imax, jmin, jmax = limites
+        ids = []
+        for i in range(max(ci - k, imin), min(ci + k, imax) + 1):
+            if abs(i - ci) == k:
+                columnas = range(max(cj - k, jmin), min(cj + k, jmax) + 1)
+            else:
+                columnas = [j for j in (cj - k, cj + k) if jmin <= j <= jmax]
+            for j in columnas:
+                ids.extend(grilla.celdas.get((i, j), ()))
+        return ids
+
+    def _buscar(
+        self,
+        grilla: _Grilla,
+        latitud: float,
+        longitud: float,
+        radio_km: float,
+        limite: int,
+        limites: Optional[Limites] = None,
+        filtro: Optional[Callable[[float, float], bool]] = None
+    ) -> List[dict]:
+        if grilla.limites is None:
+            return []
+        ocupadas = grilla.limites
+        if limites:
+            ocupadas = (
+                max(ocupadas[0], limites[0]), min(ocupadas[1], limites[1]),
+                max(ocupadas[2], limites[2]), min(ocupadas[3], limites[3])
+            )
+            if ocupadas[0] > ocupadas[1] or ocupadas[2] > ocupadas[3]:
+                return []
+        centro = self._celda(latitud, longitud)
+        # Distancia mínima garantizada por cada anillo recorrido
+        lado_km = self.celda_grados * min(
+            KM_POR_GRADO_LATITUD, KM_POR_GRADO_LONGITUD * math.cos(math.radians(latitud))
+        )
+        # Anillos necesarios para cubrir todas las celdas ocupadas
+        ultimo = max(
+            abs(centro[0] - ocupadas[0]), abs(centro[0] - ocupadas[1]),
+            abs(centro[1] - ocupadas[2]), abs(centro[1] - ocupadas[3])
+        )
+
+        encontrados: List[Tuple[float, int]] = []  # heap de (-distancia, id) con los `limite` más cercanos
+        k = 0
+        while k <= ultimo:
+            ids = self._anillo(grilla, centro, k, ocupadas)
+            if filtro:
+                ids = [id for id in ids if filtro(grilla.puntos[id][0], grilla.puntos[id][1])]
+            if ids:
+                distancias = haversine_km(
+                    latitud, longitud,
+                    [grilla.puntos[id][0] for id in ids], [grilla.puntos[id][1] for id in ids]
+                )
+                for id, distancia in zip(ids, distancias.tolist()):
+                    if distancia > radio_km:
+                        continue
+                    if len(encontrados) < limite:
+                        heapq.heappush(encontrados, (-distancia, id))
+                    elif distancia < -encontrados[0][0]:
+                        heapq.heapreplace(encontrados, (-distancia, id))
+            garantizado = k * lado_km
+            if garantizado >= radio_km:
+                break
+            if len(encontrados) == limite and -encontrados[0][0] <= garantizado:
+                break
+            k += 1
+
+        return [
+            {**grilla.puntos[id][2], "distancia_km": round(-distancia, 3)}
+            for distancia, id in sorted(encontrados, reverse=True)
+        ]
+
+    def cerca(self, db: Session, latitud: float, longitud: float, radio_km: float, limite: int) -> List[dict]:
+        """Hasta `limite` clientes a no más de radio_km, del más cercano al más lejano"""
+        self._estado.asegurar(db)
+        with self._estado.lock:
+            return self._buscar(self._estado.estado, latitud, longitud, radio_km, limite)
+
+    def rectangulo(
+        self,
+        db: Session,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        limite: int,
+        latitud: Optional[float] = None,
+        longitud: Optional[float] = None
+    ) -> List[dict]:
+        """
+        Hasta `limite` clientes dentro del rectángulo, ordenados por distancia
+        al punto indicado (por defecto el centro del rectángulo)
+        """
+        if latitud is None or longitud is None:
+            latitud, longitud = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+        esquinas = [(a, b) for a in (min_lat, max_lat) for b in (min_lon, max_lon)]
+        radio_km = max(haversine_km(latitud, longitud, a, b).item() for a, b in esquinas)
+        (imin, jmin), (imax, jmax) = self._celda(min_lat, min_lon), self._celda(max_lat, max_lon)
+
+        def dentro(lat: float, lon: float) -> bool:
+            return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+        self._estado.asegurar(db)
+        with self._estado.lock:
+            return self._buscar(
+                self._estado.estado, latitud, longitud, radio_km, limite, (imin, imax, jmin, jmax), dentro
+            )
+
+    def actualizar(self, cliente: Cliente):
+        """Reubica al cliente (o lo quita si está inactivo o sin coordenadas)"""
+        id = cliente.id
+        punto = None
+        if cliente.activo and cliente.latitud is not None and cliente.longitud is not None:
+            punto = (cliente.latitud, cliente.longitud, _datos(cliente))
+
+        def reubicar(grilla: _Grilla):
+            anterior = grilla.puntos.pop(id, None)
+            if anterior:
+                ids = grilla.celdas.get(self._celda(anterior[0], anterior[1]))
+                if ids and id in ids:
+                    ids.remove(id)
+            if punto:
+                celda = self._celda(punto[0], punto[1])
+                grilla.puntos[id] = punto
+                grilla.celdas.setdefault(celda, []).append(id)
+                grilla.ampliar_limites(celda)
+
+        self._estado.aplicar(reubicar)
+
+
+def _datos(c) -> dict:
+    return {
+        "id": c.id, "codigo": c.codigo, "razon_social": c.razon_social,
+        "distrito": c.distrito, "latitud": c.latitud, "longitud": c.longitud
+    }
+
+
+indice_clientes_geo = IndiceEspacial(settings.GEO_TTL_SEGUNDOS, settings.GEO_CELDA_GRADOS)
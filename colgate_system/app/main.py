@@ -7,21 +7,33 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import anyio.to_thread
 import time
 import os
 
 from app.config import settings
-from app.database import init_db, engine, Base
+from app.database import init_db, engine, Base, SessionLocal
 from app.routers import auth, productos, clientes, inventario, ventas, logistica, reportes
+from app.services import reporte_service
+from app.cache import cache_respuestas
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Ciclo de vida de la aplicación"""
+    # Los endpoints son síncronos (Session de SQLAlchemy) y FastAPI los ejecuta en este pool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_WORKERS
+    
     # Startup: Inicializar base de datos
     print("🚀 Iniciando Sistema de Gestión Colgate...")
     init_db()
     print("✅ Base de datos inicializada")
+    db = SessionLocal()
+    try:
+        if reporte_service.verificar_resumen_diario(db):
+            print("✅ Resumen diario de ventas reconstruido")
+    finally:
+        db.close()
     yield
     # Shutdown
     print("👋 Cerrando aplicación...")
@@ -123,6 +135,12 @@ async def health_check():
     }
 
 
+# Estadísticas del cache de respuestas (monitoreo)
+@app.get("/cache/stats")
+async def cache_stats():
+    return cache_respuestas.estadisticas()
+
+
 # Endpoint de información
 @app.get("/info")
 async def system_info():
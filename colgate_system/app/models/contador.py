@@ -0,0 +1,20 @@
+"""
+Modelo de Contadores - Numeración de documentos (ventas, envíos, rutas)
+"""
+from sqlalchemy import Column, Integer, String, PrimaryKeyConstraint
+from app.database import Base
+
+
+class ContadorDocumento(Base):
+    """Último número asignado por tipo de documento y prefijo de periodo"""
+    __tablename__ = "contadores_documento"
+    __table_args__ = (
+        PrimaryKeyConstraint("tipo", "prefijo"),
+    )
+
+    tipo = Column(String(50), nullable=False)  # Tabla del documento: ventas, envios, rutas_reparto
+    prefijo = Column(String(20), nullable=False)  # Ej: V202601, ENV20260115
+    ultimo = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ContadorDocumento {self.tipo} {self.prefijo}: {self.ultimo}>"
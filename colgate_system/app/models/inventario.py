@@ -1,7 +1,7 @@
 """
 Modelo de Inventario - Control de stock por almacén
 """
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -39,6 +39,8 @@ class Almacen(Base):
     direccion = Column(String(300))
     distrito = Column(String(100))
     ciudad = Column(String(100))
+    latitud = Column(Float)
+    longitud = Column(Float)
     
     # Contacto
     responsable = Column(String(100))
@@ -61,10 +63,14 @@ class Almacen(Base):
 
 class Inventario(Base):
     __tablename__ = "inventarios"
+    __table_args__ = (
+        # Un registro por producto, almacén y lote; también sirve a get_o_crear_inventario
+        Index("uq_inventario_producto_almacen_lote", "producto_id", "almacen_id", "lote", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
-    almacen_id = Column(Integer, ForeignKey("almacenes.id"), nullable=False)
+    almacen_id = Column(Integer, ForeignKey("almacenes.id"), nullable=False, index=True)
     
     # Stock
     stock_actual = Column(Integer, default=0)
@@ -94,6 +100,12 @@ class Inventario(Base):
 
 class MovimientoInventario(Base):
     __tablename__ = "movimientos_inventario"
+    __table_args__ = (
+        # Paginación por (fecha, id), global y por producto/almacén
+        Index("ix_movimientos_fecha_id", "fecha", "id"),
+        Index("ix_movimientos_producto_fecha", "producto_id", "fecha", "id"),
+        Index("ix_movimientos_almacen_fecha", "almacen_id", "fecha", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     almacen_id = Column(Integer, ForeignKey("almacenes.id"), nullable=False)
@@ -1,7 +1,7 @@
 """
 Modelo de Logística - Gestión de envíos, rutas y distribución
 """
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Time
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Index, Enum as SQLEnum, Time
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -167,15 +167,23 @@ class RutaReparto(Base):
 
 class Envio(Base):
     __tablename__ = "envios"
+    __table_args__ = (
+        Index("ix_envios_fecha_programada_id", "fecha_programada", "id"),
+        Index("ix_envios_estado_fecha_programada", "estado", "fecha_programada"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     codigo = Column(String(20), unique=True, index=True, nullable=False)
     
     # Venta asociada
-    venta_id = Column(Integer, ForeignKey("ventas.id"), nullable=False)
+    # Una venta tiene un solo envío
+    venta_id = Column(Integer, ForeignKey("ventas.id"), nullable=False, unique=True, index=True)
+    
+    # Zona de reparto (según el distrito del cliente al crear el envío)
+    zona_id = Column(Integer, ForeignKey("zonas_reparto.id"), index=True)
     
     # Ruta asignada
-    ruta_id = Column(Integer, ForeignKey("rutas_reparto.id"))
+    ruta_id = Column(Integer, ForeignKey("rutas_reparto.id"), index=True)
     
     # Asignación directa (si no hay ruta)
     vehiculo_id = Column(Integer, ForeignKey("vehiculos.id"))
@@ -211,6 +219,7 @@ class Envio(Base):
     
     # Relaciones
     venta = relationship("Venta", back_populates="envio")
+    zona = relationship("ZonaReparto")
     ruta = relationship("RutaReparto", back_populates="envios")
     vehiculo = relationship("Vehiculo", back_populates="envios")
     conductor = relationship("Conductor", back_populates="envios")
@@ -43,6 +43,10 @@ class Producto(Base):
     stock_minimo = Column(Integer, default=10)
     stock_maximo = Column(Integer, default=1000)
     
+    # Logística (por unidad; se usan para la capacidad de los vehículos)
+    peso = Column(Float)  # en kg
+    volumen = Column(Float)  # en m3
+    
     # Estado
     activo = Column(Boolean, default=True)
     destacado = Column(Boolean, default=False)
@@ -1,11 +1,12 @@
 """
 Modelo de Venta - Gestión de pedidos y facturación
 """
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, Date, DateTime, ForeignKey, Index, Enum as SQLEnum, func, literal_column
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 from app.database import Base
+from app.models.cliente import TipoCliente
 
 
 class EstadoVenta(str, enum.Enum):
@@ -33,12 +34,20 @@ class TipoDocumento(str, enum.Enum):
 
 class Venta(Base):
     __tablename__ = "ventas"
+    __table_args__ = (
+        # Paginación por (fecha_pedido, id), global y por vendedor/cliente
+        Index("ix_ventas_fecha_pedido_id", "fecha_pedido", "id"),
+        Index("ix_ventas_vendedor_fecha_pedido", "vendedor_id", "fecha_pedido", "id"),
+        Index("ix_ventas_cliente_fecha_pedido", "cliente_id", "fecha_pedido", "id"),
+        Index("ix_ventas_estado_fecha_pedido", "estado", "fecha_pedido"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     numero = Column(String(20), unique=True, index=True, nullable=False)
     
     # Cliente
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
+    cliente_tipo = Column(SQLEnum(TipoCliente))  # Tipo del cliente al crear la venta (resumen diario)
     
     # Vendedor
     vendedor_id = Column(Integer, ForeignKey("usuarios.id"))
@@ -95,8 +104,8 @@ class DetalleVenta(Base):
     __tablename__ = "detalles_venta"
 
     id = Column(Integer, primary_key=True, index=True)
-    venta_id = Column(Integer, ForeignKey("ventas.id"), nullable=False)
-    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
+    venta_id = Column(Integer, ForeignKey("ventas.id"), nullable=False, index=True)
+    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False, index=True)
     
     # Cantidades
     cantidad = Column(Integer, nullable=False)
@@ -124,7 +133,7 @@ class PagoVenta(Base):
     __tablename__ = "pagos_venta"
 
     id = Column(Integer, primary_key=True, index=True)
-    venta_id = Column(Integer, ForeignKey("ventas.id"), nullable=False)
+    venta_id = Column(Integer, ForeignKey("ventas.id"), nullable=False, index=True)
     
     # Pago
     monto = Column(Float, nullable=False)
@@ -140,3 +149,34 @@ class PagoVenta(Base):
     
     def __repr__(self):
         return f"<PagoVenta {self.venta_id} - {self.monto}>"
+
+
+class VentaResumenDiario(Base):
+    """Resumen materializado de ventas por día, estado, vendedor y tipo de cliente"""
+    __tablename__ = "ventas_resumen_diario"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fecha = Column(Date, nullable=False, index=True)  # Día de fecha_creacion de la venta
+    estado = Column(SQLEnum(EstadoVenta), nullable=False)
+    vendedor_id = Column(Integer, ForeignKey("usuarios.id"))
+    # Texto y no ENUM nativo: PostgreSQL no admite un ENUM convertido a texto en un índice
+    cliente_tipo = Column(SQLEnum(TipoCliente, native_enum=False, create_constraint=False))
+    
+    # Acumulados
+    cantidad = Column(Integer, default=0, nullable=False)
+    total = Column(Float, default=0.0, nullable=False)
+    
+    def __repr__(self):
+        return f"<VentaResumenDiario {self.fecha} {self.estado}: {self.cantidad}>"
+
+
+# Clave de cada acumulado. Sin vendedor o sin tipo de cliente (NULL) también es un
+# grupo y en un UNIQUE los NULL nunca coinciden, por eso se indexa con coalesce;
+# INSERT ... ON CONFLICT (reporte_service) usa estas mismas expresiones.
+CLAVE_RESUMEN_DIARIO = (
+    VentaResumenDiario.fecha,
+    VentaResumenDiario.estado,
+    func.coalesce(VentaResumenDiario.vendedor_id, literal_column("0")),
+    func.coalesce(VentaResumenDiario.cliente_tipo, literal_column("''")),
+)
+Index("uq_resumen_diario_clave", *CLAVE_RESUMEN_DIARIO, unique=True)
@@ -0,0 +1,110 @@
+"""
+Paginación por cursor (keyset) y conteo opcional de resultados
+"""
+from typing import List, NamedTuple, Optional, Tuple
+from datetime import datetime
+import base64
+import enum
+import json
+
+from fastapi import Response
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from app.config import settings
+
+
+class ModoConteo(str, enum.Enum):
+    EXACTO = "exacto"
+    APROXIMADO = "aproximado"  # Cuenta hasta CONTEO_APROXIMADO_LIMITE filas
+    NINGUNO = "ninguno"
+
+
+class Pagina(NamedTuple):
+    items: list
+    total: Optional[int]
+    total_exacto: bool
+    siguiente_cursor: Optional[str]
+
+
+def codificar_cursor(fecha: Optional[datetime], id: int) -> str:
+    """Cursor opaco con la posición (fecha, id) del último elemento entregado"""
+    datos = json.dumps([fecha.isoformat() if fecha else None, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        datos = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        fecha, id = json.loads(datos)
+        return (datetime.fromisoformat(fecha) if fecha else None), int(id)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginación inválido")
+
+
+def contar(query: Query, modo: ModoConteo) -> Tuple[Optional[int], bool]:
+    """
+    Cuenta los resultados según el modo. En modo aproximado el conteo se
+    detiene en el límite configurado y se informa que no es exacto.
+    """
+    if modo == ModoConteo.NINGUNO:
+        return None, False
+    if modo == ModoConteo.APROXIMADO:
+        limite = settings.CONTEO_APROXIMADO_LIMITE
+        total = query.order_by(None).limit(limite + 1).count()
+        if total > limite:
+            return limite, False
+        return total, True
+    return query.order_by(None).count(), True
+
+
+def paginar_por_cursor(
+    query: Query,
+    columna_fecha,
+    columna_id,
+    cursor: Optional[str],
+    limit: int,
+    descendente: bool = True,
+    nulos_al_final: bool = False
+) -> Tuple[List, Optional[str]]:
+    """
+    Devuelve la página siguiente a la posición del cursor (vacío o None para
+    la primera) ordenando por (fecha, id). Con nulos_al_final las filas sin
+    fecha van al final en cualquier motor de base de datos.
+    """
+    orden = [columna_fecha.desc(), columna_id.desc()] if descendente else [columna_fecha, columna_id]
+    if nulos_al_final:
+        orden.insert(0, columna_fecha.is_(None))
+
+    if cursor:
+        fecha, ultimo_id = decodificar_cursor(cursor)
+        mayor = (lambda a, b: a < b) if descendente else (lambda a, b: a > b)
+        if fecha is None:
+            query = query.filter(columna_fecha.is_(None), mayor(columna_id, ultimo_id))
+        else:
+            condicion = or_(
+                mayor(columna_fecha, fecha),
+                and_(columna_fecha == fecha, mayor(columna_id, ultimo_id))
+            )
+            if nulos_al_final:
+                condicion = or_(columna_fecha.is_(None), condicion)
+            query = query.filter(condicion)
+
+    # Se pide una fila extra para saber si hay página siguiente sin contar
+    filas = query.order_by(*orden).limit(limit + 1).all()
+    if len(filas) <= limit:
+        return filas, None
+
+    filas = filas[:limit]
+    ultima = filas[-1]
+    return filas, codificar_cursor(getattr(ultima, columna_fecha.key), getattr(ultima, columna_id.key))
+
+
+def encabezados_pagina(response: Response, pagina: Pagina) -> list:
+    """Publica total y cursor en encabezados para endpoints que devuelven una lista"""
+    if pagina.total is not None:
+        response.headers["X-Total-Count"] = str(pagina.total)
+        response.headers["X-Total-Exacto"] = "true" if pagina.total_exacto else "false"
+    if pagina.siguiente_cursor:
+        response.headers["X-Siguiente-Cursor"] = pagina.siguiente_cursor
+    return pagina.items
@@ -0,0 +1,97 @@
+"""
+Estado en memoria construido desde la base de datos con recarga en segundo plano
+
+Lo usan los índices de autocompletado y el índice espacial de clientes:
+
+- La primera carga la hace la solicitud que la necesita y las que llegan
+  mientras tanto esperan esa misma carga (una sola lectura de la tabla).
+- Al vencer el TTL se sigue respondiendo con el estado anterior y un único
+  hilo, con su propia sesión, lo reconstruye y lo reemplaza al terminar.
+- Los cambios aplicados mientras se construye un estado se guardan y se
+  vuelven a aplicar sobre el nuevo antes de publicarlo, así no se pierde
+  ninguno. Por eso cada cambio debe ser idempotente (reemplazar el registro
+  completo) y no guardar objetos de la sesión, que se leen en otro hilo.
+"""
+from typing import Callable, Generic, List, Optional, TypeVar
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+
+T = TypeVar("T")
+
+
+class EstadoRecargable(Generic[T]):
+
+    def __init__(self, nombre: str, construir: Callable[[Session], T], ttl_segundos: float):
+        self.nombre = nombre
+        self._construir = construir
+        self.ttl_segundos = ttl_segundos
+        # Protege el estado: quien lo lee o modifica debe tomarlo
+        self.lock = threading.Lock()
+        self.estado: Optional[T] = None
+        self._expira = 0.0
+        self._cargando: Optional[threading.Event] = None
+        self._pendientes: List[Callable[[T], None]] = []
+
+    def _iniciar_carga(self) -> threading.Event:
+        self._cargando = threading.Event()
+        self._pendientes = []
+        return self._cargando
+
+    def _terminar_carga(self):
+        self._cargando.set()
+        self._cargando = None
+        self._pendientes = []
+
+    def _cargar(self, db: Session):
+        try:
+            estado = self._construir(db)
+        except BaseException:
+            with self.lock:
+                self._terminar_carga()
+            raise
+        with self.lock:
+            for cambio in self._pendientes:
+                cambio(estado)
+            self.estado = estado
+            self._expira = time.monotonic() + self.ttl_segundos
+            self._terminar_carga()
+
+    def _recargar(self):
+        db = SessionLocal()
+        try:
+            self._cargar(db)
+        except Exception as e:
+            # Se sigue usando el estado anterior; la próxima consulta vuelve a intentarlo
+            print(f"⚠️  No se pudo recargar {self.nombre}: {e.__class__.__name__}")
+        finally:
+            db.close()
+
+    def asegurar(self, db: Session):
+        """Garantiza un estado cargado y lanza la recarga en segundo plano si venció"""
+        while True:
+            with self.lock:
+                if self.estado is not None:
+                    if self._cargando is None and self._expira <= time.monotonic():
+                        self._iniciar_carga()
+                        threading.Thread(target=self._recargar, name=f"recarga-{self.nombre}", daemon=True).start()
+                    return
+                evento = self._cargando
+                if evento is None:
+                    self._iniciar_carga()
+            if evento is None:
+                self._cargar(db)
+                return
+            # Otra solicitud está haciendo la primera carga; si falla, se reintenta aquí
+            evento.wait()
+
+    def aplicar(self, cambio: Callable[[T], None]):
+        """Aplica el cambio al estado actual y al que se esté construyendo"""
+        with self.lock:
+            if self.estado is not None:
+                cambio(self.estado)
+            if self._cargando is not None:
+                self._pendientes.append(cambio)
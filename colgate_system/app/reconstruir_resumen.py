@@ -0,0 +1,27 @@
+"""
+Script para reconstruir el resumen diario de ventas (backfill)
+Uso: python -m app.reconstruir_resumen
+"""
+from app.database import SessionLocal, init_db
+from app.services.reporte_service import reconstruir_resumen_diario
+
+
+def reconstruir():
+    """Recalcula ventas_resumen_diario a partir de la tabla de ventas"""
+    db = SessionLocal()
+    
+    try:
+        print("🔄 Reconstruyendo resumen diario de ventas...")
+        filas = reconstruir_resumen_diario(db)
+        print(f"✅ Resumen reconstruido: {filas} filas")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error al reconstruir resumen: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    init_db()
+    reconstruir()
@@ -2,6 +2,7 @@
 Router de Autenticación
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
@@ -13,8 +14,8 @@ from app.schemas.usuario import (
     Token, UsuarioLogin
 )
 from app.services.auth import (
-    autenticar_usuario, crear_token_acceso, get_password_hash,
-    get_usuario_actual, es_admin
+    autenticar_usuario, crear_token_acceso, get_password_hash_async,
+    verificar_password_async, get_usuario_actual, es_admin, invalidar_usuario_cache
 )
 from app.config import settings
 
@@ -27,7 +28,7 @@ async def login(
     db: Session = Depends(get_db)
 ):
     """Iniciar sesión y obtener token de acceso"""
-    usuario = autenticar_usuario(db, form_data.username, form_data.password)
+    usuario = await autenticar_usuario(db, form_data.username, form_data.password)
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,9 +36,9 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Actualizar último acceso
+    # Actualizar último acceso (y el hash, si se recalculó)
     usuario.ultimo_acceso = datetime.utcnow()
-    db.commit()
+    await run_in_threadpool(db.commit)
     
     # Crear token
     access_token = crear_token_acceso(
@@ -54,15 +55,18 @@ async def registrar_usuario(
     admin: Usuario = Depends(es_admin)
 ):
     """Registrar nuevo usuario (solo administradores)"""
+    def buscar(campo, valor):
+        return db.query(Usuario).filter(campo == valor).first()
+    
     # Verificar si username ya existe
-    if db.query(Usuario).filter(Usuario.username == usuario.username).first():
+    if await run_in_threadpool(buscar, Usuario.username, usuario.username):
         raise HTTPException(
             status_code=400,
             detail="El nombre de usuario ya está registrado"
         )
     
     # Verificar si email ya existe
-    if db.query(Usuario).filter(Usuario.email == usuario.email).first():
+    if await run_in_threadpool(buscar, Usuario.email, usuario.email):
         raise HTTPException(
             status_code=400,
             detail="El email ya está registrado"
@@ -72,28 +76,31 @@ async def registrar_usuario(
     db_usuario = Usuario(
         username=usuario.username,
         email=usuario.email,
-        hashed_password=get_password_hash(usuario.password),
+        hashed_password=await get_password_hash_async(usuario.password),
         nombres=usuario.nombres,
         apellidos=usuario.apellidos,
         dni=usuario.dni,
         telefono=usuario.telefono,
         rol=usuario.rol
     )
-    db.add(db_usuario)
-    db.commit()
-    db.refresh(db_usuario)
     
+    def guardar():
+        db.add(db_usuario)
+        db.commit()
+        db.refresh(db_usuario)
+    
+    await run_in_threadpool(guardar)
     return db_usuario
 
 
 @router.get("/me", response_model=UsuarioResponse)
-async def obtener_usuario_actual(usuario: Usuario = Depends(get_usuario_actual)):
+def obtener_usuario_actual(usuario: Usuario = Depends(get_usuario_actual)):
     """Obtener información del usuario actual"""
     return usuario
 
 
 @router.put("/me", response_model=UsuarioResponse)
-async def actualizar_mi_perfil(
+def actualizar_mi_perfil(
     datos: UsuarioUpdate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -111,6 +118,7 @@ async def actualizar_mi_perfil(
             setattr(usuario, key, value)
     
     db.commit()
+    invalidar_usuario_cache(usuario.username)
     db.refresh(usuario)
     return usuario
 
@@ -123,23 +131,22 @@ async def cambiar_password(
     usuario: Usuario = Depends(get_usuario_actual)
 ):
     """Cambiar contraseña del usuario actual"""
-    from app.services.auth import verificar_password
-    
-    if not verificar_password(password_actual, usuario.hashed_password):
+    if not await verificar_password_async(password_actual, usuario.hashed_password):
         raise HTTPException(
             status_code=400,
             detail="Contraseña actual incorrecta"
         )
     
-    usuario.hashed_password = get_password_hash(password_nuevo)
-    db.commit()
+    usuario.hashed_password = await get_password_hash_async(password_nuevo)
+    await run_in_threadpool(db.commit)
+    invalidar_usuario_cache(usuario.username)
     
     return {"mensaje": "Contraseña actualizada exitosamente"}
 
 
 # ============ GESTIÓN DE USUARIOS (ADMIN) ============
 @router.get("/usuarios", response_model=list[UsuarioResponse])
-async def listar_usuarios(
+def listar_usuarios(
     skip: int = 0,
     limit: int = 100,
     activo: bool = None,
@@ -154,7 +161,7 @@ async def listar_usuarios(
 
 
 @router.get("/usuarios/{usuario_id}", response_model=UsuarioResponse)
-async def obtener_usuario(
+def obtener_usuario(
     usuario_id: int,
     db: Session = Depends(get_db),
     admin: Usuario = Depends(es_admin)
@@ -167,7 +174,7 @@ async def obtener_usuario(
 
 
 @router.put("/usuarios/{usuario_id}", response_model=UsuarioResponse)
-async def actualizar_usuario(
+def actualizar_usuario(
     usuario_id: int,
     datos: UsuarioUpdate,
     db: Session = Depends(get_db),
@@ -178,16 +185,21 @@ async def actualizar_usuario(
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
+    # El cache se indexa por username: si cambia se invalidan el anterior y el nuevo
+    username_anterior = usuario.username
     for key, value in datos.model_dump(exclude_unset=True).items():
         setattr(usuario, key, value)
     
     db.commit()
+    invalidar_usuario_cache(username_anterior)
+    if usuario.username != username_anterior:
+        invalidar_usuario_cache(usuario.username)
     db.refresh(usuario)
     return usuario
 
 
 @router.delete("/usuarios/{usuario_id}")
-async def desactivar_usuario(
+def desactivar_usuario(
     usuario_id: int,
     db: Session = Depends(get_db),
     admin: Usuario = Depends(es_admin)
@@ -202,5 +214,6 @@ async def desactivar_usuario(
     
     usuario.activo = False
     db.commit()
+    invalidar_usuario_cache(usuario.username)
     
     return {"mensaje": "Usuario desactivado exitosamente"}
@@ -1,15 +1,17 @@
 """
 Router de Clientes
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.config import settings
 from app.database import get_db
 from app.models.usuario import Usuario
 from app.models.cliente import TipoCliente
 from app.schemas.cliente import (
-    ClienteCreate, ClienteUpdate, ClienteResponse, ClienteListResponse
+    ClienteCreate, ClienteUpdate, ClienteResponse, ClienteListResponse, ClienteAutocompletado,
+    ClienteCercano
 )
 from app.services import cliente_service
 from app.services.auth import get_usuario_actual, es_vendedor
@@ -18,7 +20,7 @@ router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
 
 @router.get("", response_model=ClienteListResponse)
-async def listar_clientes(
+def listar_clientes(
     skip: int = 0,
     limit: int = 100,
     busqueda: Optional[str] = None,
@@ -41,8 +43,53 @@ async def listar_clientes(
     return ClienteListResponse(total=total, items=clientes)
 
 
+@router.get("/autocomplete", response_model=list[ClienteAutocompletado])
+def autocompletar_clientes(
+    q: str = "",
+    limit: int = Query(default=settings.AUTOCOMPLETADO_LIMITE, ge=1, le=50),
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(get_usuario_actual)
+):
+    """Sugerencias de clientes por prefijo de razón social, nombre comercial, código o RUC"""
+    return cliente_service.autocompletar_clientes(db, q, limit)
+
+
+@router.get("/cerca", response_model=list[ClienteCercano])
+def clientes_cerca(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radio_km: float = Query(default=5, gt=0, le=500),
+    limit: int = Query(default=settings.GEO_LIMITE, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(get_usuario_actual)
+):
+    """Clientes a no más de radio_km del punto, del más cercano al más lejano"""
+    return cliente_service.get_clientes_cerca(db, lat, lon, radio_km, limit)
+
+
+@router.get("/bbox", response_model=list[ClienteCercano])
+def clientes_en_rectangulo(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lon: Optional[float] = Query(default=None, ge=-180, le=180),
+    limit: int = Query(default=settings.GEO_LIMITE, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(get_usuario_actual)
+):
+    """Clientes dentro del rectángulo, ordenados por distancia a (lat, lon) o al centro"""
+    try:
+        return cliente_service.get_clientes_en_rectangulo(
+            db, min_lat, min_lon, max_lat, max_lon, limit, latitud=lat, longitud=lon
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/por-zona/{distrito}", response_model=list[ClienteResponse])
-async def clientes_por_zona(
+def clientes_por_zona(
     distrito: str,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -52,7 +99,7 @@ async def clientes_por_zona(
 
 
 @router.get("/credito-vencido", response_model=list[ClienteResponse])
-async def clientes_credito_vencido(
+def clientes_credito_vencido(
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
@@ -61,7 +108,7 @@ async def clientes_credito_vencido(
 
 
 @router.get("/{cliente_id}", response_model=ClienteResponse)
-async def obtener_cliente(
+def obtener_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -74,7 +121,7 @@ async def obtener_cliente(
 
 
 @router.get("/codigo/{codigo}", response_model=ClienteResponse)
-async def obtener_cliente_por_codigo(
+def obtener_cliente_por_codigo(
     codigo: str,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -87,7 +134,7 @@ async def obtener_cliente_por_codigo(
 
 
 @router.get("/ruc/{ruc}", response_model=ClienteResponse)
-async def obtener_cliente_por_ruc(
+def obtener_cliente_por_ruc(
     ruc: str,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -100,7 +147,7 @@ async def obtener_cliente_por_ruc(
 
 
 @router.post("", response_model=ClienteResponse)
-async def crear_cliente(
+def crear_cliente(
     cliente: ClienteCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_vendedor)
@@ -121,7 +168,7 @@ async def crear_cliente(
 
 
 @router.put("/{cliente_id}", response_model=ClienteResponse)
-async def actualizar_cliente(
+def actualizar_cliente(
     cliente_id: int,
     cliente: ClienteUpdate,
     db: Session = Depends(get_db),
@@ -135,7 +182,7 @@ async def actualizar_cliente(
 
 
 @router.delete("/{cliente_id}")
-async def eliminar_cliente(
+def eliminar_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_vendedor)
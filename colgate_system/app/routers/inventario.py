@@ -1,7 +1,7 @@
 """
 Router de Inventario
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
@@ -16,13 +16,14 @@ from app.schemas.inventario import (
 )
 from app.services import inventario_service
 from app.services.auth import get_usuario_actual, es_almacenero
+from app.paginacion import ModoConteo, encabezados_pagina
 
 router = APIRouter(prefix="/inventario", tags=["Inventario"])
 
 
 # ============ ALMACENES ============
 @router.get("/almacenes", response_model=list[AlmacenResponse])
-async def listar_almacenes(
+def listar_almacenes(
     solo_activos: bool = True,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -32,7 +33,7 @@ async def listar_almacenes(
 
 
 @router.get("/almacenes/{almacen_id}", response_model=AlmacenResponse)
-async def obtener_almacen(
+def obtener_almacen(
     almacen_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -45,7 +46,7 @@ async def obtener_almacen(
 
 
 @router.post("/almacenes", response_model=AlmacenResponse)
-async def crear_almacen(
+def crear_almacen(
     almacen: AlmacenCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_almacenero)
@@ -55,7 +56,7 @@ async def crear_almacen(
 
 
 @router.put("/almacenes/{almacen_id}", response_model=AlmacenResponse)
-async def actualizar_almacen(
+def actualizar_almacen(
     almacen_id: int,
     almacen: AlmacenUpdate,
     db: Session = Depends(get_db),
@@ -70,7 +71,7 @@ async def actualizar_almacen(
 
 # ============ INVENTARIO ============
 @router.get("/producto/{producto_id}", response_model=list[InventarioResponse])
-async def stock_producto(
+def stock_producto(
     producto_id: int,
     almacen_id: Optional[int] = None,
     db: Session = Depends(get_db),
@@ -81,7 +82,7 @@ async def stock_producto(
 
 
 @router.get("/producto/{producto_id}/total")
-async def stock_total_producto(
+def stock_total_producto(
     producto_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -97,7 +98,7 @@ async def stock_total_producto(
 
 
 @router.get("/almacen/{almacen_id}", response_model=list[InventarioResponse])
-async def inventario_almacen(
+def inventario_almacen(
     almacen_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -107,7 +108,7 @@ async def inventario_almacen(
 
 
 @router.get("/por-vencer", response_model=list[InventarioResponse])
-async def productos_por_vencer(
+def productos_por_vencer(
     dias: int = 90,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -118,7 +119,7 @@ async def productos_por_vencer(
 
 # ============ AJUSTES ============
 @router.post("/ajuste", response_model=MovimientoResponse)
-async def ajustar_inventario(
+def ajustar_inventario(
     ajuste: AjusteInventario,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_almacenero)
@@ -131,7 +132,7 @@ async def ajustar_inventario(
 
 
 @router.post("/transferencia")
-async def transferir_inventario(
+def transferir_inventario(
     transferencia: TransferenciaInventario,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_almacenero)
@@ -152,7 +153,8 @@ async def transferir_inventario(
 
 # ============ MOVIMIENTOS ============
 @router.get("/movimientos", response_model=list[MovimientoResponse])
-async def listar_movimientos(
+def listar_movimientos(
+    response: Response,
     almacen_id: Optional[int] = None,
     producto_id: Optional[int] = None,
     tipo: Optional[TipoMovimiento] = None,
@@ -160,17 +162,25 @@ async def listar_movimientos(
     fecha_hasta: Optional[datetime] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    conteo: ModoConteo = ModoConteo.NINGUNO,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
-    """Listar movimientos de inventario"""
-    return inventario_service.get_movimientos(
-        db,
-        almacen_id=almacen_id,
-        producto_id=producto_id,
-        tipo=tipo,
-        fecha_desde=fecha_desde,
-        fecha_hasta=fecha_hasta,
-        skip=skip,
-        limit=limit
-    )
+    """Listar movimientos de inventario (el cursor siguiente va en X-Siguiente-Cursor)"""
+    try:
+        pagina = inventario_service.get_movimientos(
+            db,
+            almacen_id=almacen_id,
+            producto_id=producto_id,
+            tipo=tipo,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            conteo=conteo
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return encabezados_pagina(response, pagina)
@@ -1,40 +1,48 @@
 """
 Router de Logística
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import date, datetime
 
+from app import fechas
 from app.database import get_db
+from app.cache import cache_respuestas
 from app.models.usuario import Usuario
 from app.models.logistica import EstadoEnvio
 from app.schemas.logistica import (
     VehiculoCreate, VehiculoUpdate, VehiculoResponse,
     ConductorCreate, ConductorUpdate, ConductorResponse,
-    ZonaRepartoCreate, ZonaRepartoUpdate, ZonaRepartoResponse,
-    EnvioCreate, EnvioUpdate, EnvioResponse,
-    RutaRepartoCreate, RutaRepartoUpdate, RutaRepartoResponse
+    ZonaRepartoCreate, ZonaRepartoUpdate, ZonaRepartoResponse, ZonaEnvios,
+    EnvioCreate, EnvioUpdate, EnvioResponse, EnvioLoteRequest, EnvioLoteResponse,
+    RutaRepartoCreate, RutaRepartoUpdate, RutaRepartoResponse,
+    RutaOptimizarRequest, RutaOptimizacionResponse
 )
 from app.services import logistica_service
 from app.services.auth import get_usuario_actual, es_logistica
+from app.paginacion import ModoConteo, encabezados_pagina
 
 router = APIRouter(prefix="/logistica", tags=["Logística"])
 
 
 # ============ DASHBOARD ============
 @router.get("/dashboard")
-async def dashboard_logistica(
+def dashboard_logistica(
+    request: Request,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
     """Dashboard de logística con métricas del día"""
-    return logistica_service.get_dashboard_logistica(db)
+    return cache_respuestas.responder(
+        request, usuario.rol.value, ("logistica",),
+        lambda: logistica_service.get_dashboard_logistica(db)
+    )
 
 
 # ============ VEHÍCULOS ============
 @router.get("/vehiculos", response_model=list[VehiculoResponse])
-async def listar_vehiculos(
+def listar_vehiculos(
     solo_activos: bool = True,
     solo_disponibles: bool = False,
     db: Session = Depends(get_db),
@@ -45,7 +53,7 @@ async def listar_vehiculos(
 
 
 @router.get("/vehiculos/{vehiculo_id}", response_model=VehiculoResponse)
-async def obtener_vehiculo(
+def obtener_vehiculo(
     vehiculo_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -58,7 +66,7 @@ async def obtener_vehiculo(
 
 
 @router.post("/vehiculos", response_model=VehiculoResponse)
-async def crear_vehiculo(
+def crear_vehiculo(
     vehiculo: VehiculoCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_logistica)
@@ -68,7 +76,7 @@ async def crear_vehiculo(
 
 
 @router.put("/vehiculos/{vehiculo_id}", response_model=VehiculoResponse)
-async def actualizar_vehiculo(
+def actualizar_vehiculo(
     vehiculo_id: int,
     vehiculo: VehiculoUpdate,
     db: Session = Depends(get_db),
@@ -83,7 +91,7 @@ async def actualizar_vehiculo(
 
 # ============ CONDUCTORES ============
 @router.get("/conductores", response_model=list[ConductorResponse])
-async def listar_conductores(
+def listar_conductores(
     solo_activos: bool = True,
     solo_disponibles: bool = False,
     db: Session = Depends(get_db),
@@ -94,7 +102,7 @@ async def listar_conductores(
 
 
 @router.get("/conductores/{conductor_id}", response_model=ConductorResponse)
-async def obtener_conductor(
+def obtener_conductor(
     conductor_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -107,7 +115,7 @@ async def obtener_conductor(
 
 
 @router.post("/conductores", response_model=ConductorResponse)
-async def crear_conductor(
+def crear_conductor(
     conductor: ConductorCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_logistica)
@@ -117,7 +125,7 @@ async def crear_conductor(
 
 
 @router.put("/conductores/{conductor_id}", response_model=ConductorResponse)
-async def actualizar_conductor(
+def actualizar_conductor(
     conductor_id: int,
     conductor: ConductorUpdate,
     db: Session = Depends(get_db),
@@ -132,7 +140,7 @@ async def actualizar_conductor(
 
 # ============ ZONAS ============
 @router.get("/zonas", response_model=list[ZonaRepartoResponse])
-async def listar_zonas(
+def listar_zonas(
     solo_activas: bool = True,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -142,7 +150,7 @@ async def listar_zonas(
 
 
 @router.post("/zonas", response_model=ZonaRepartoResponse)
-async def crear_zona(
+def crear_zona(
     zona: ZonaRepartoCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_logistica)
@@ -151,26 +159,57 @@ async def crear_zona(
     return logistica_service.crear_zona(db, zona)
 
 
+@router.put("/zonas/{zona_id}", response_model=ZonaRepartoResponse)
+def actualizar_zona(
+    zona_id: int,
+    zona: ZonaRepartoUpdate,
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(es_logistica)
+):
+    """Actualizar zona de reparto (los envíos nuevos usan los distritos actualizados)"""
+    resultado = logistica_service.actualizar_zona(db, zona_id, zona)
+    if not resultado:
+        raise HTTPException(status_code=404, detail="Zona no encontrada")
+    return resultado
+
+
 # ============ ENVÍOS ============
 @router.get("/envios", response_model=list[EnvioResponse])
-async def listar_envios(
+def listar_envios(
+    response: Response,
     estado: Optional[EstadoEnvio] = None,
     fecha: Optional[date] = None,
     vehiculo_id: Optional[int] = None,
     conductor_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    conteo: ModoConteo = ModoConteo.NINGUNO,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
-    """Listar envíos con filtros"""
-    return logistica_service.get_envios(
-        db, estado, fecha, vehiculo_id, conductor_id, skip, limit
-    )
+    """Listar envíos con filtros (el cursor siguiente va en X-Siguiente-Cursor)"""
+    try:
+        pagina = logistica_service.get_envios(
+            db, estado, fecha, vehiculo_id, conductor_id, skip, limit, cursor, conteo
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return encabezados_pagina(response, pagina)
+
+
+@router.get("/envios/por-zona", response_model=list[ZonaEnvios])
+def envios_por_zona(
+    fecha: Optional[date] = None,
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(get_usuario_actual)
+):
+    """Envíos del día agrupados por zona y estado (por defecto hoy)"""
+    return logistica_service.get_envios_por_zona(db, fecha or fechas.hoy())
 
 
 @router.get("/envios/pendientes-hoy", response_model=list[EnvioResponse])
-async def envios_pendientes_hoy(
+def envios_pendientes_hoy(
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
@@ -179,7 +218,7 @@ async def envios_pendientes_hoy(
 
 
 @router.get("/envios/{envio_id}", response_model=EnvioResponse)
-async def obtener_envio(
+def obtener_envio(
     envio_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -192,7 +231,7 @@ async def obtener_envio(
 
 
 @router.post("/envios/venta/{venta_id}", response_model=EnvioResponse)
-async def crear_envio(
+def crear_envio(
     venta_id: int,
     fecha_programada: Optional[datetime] = None,
     db: Session = Depends(get_db),
@@ -205,8 +244,18 @@ async def crear_envio(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/envios/lote", response_model=EnvioLoteResponse)
+def crear_envios_lote(
+    solicitud: EnvioLoteRequest,
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(es_logistica)
+):
+    """Crear los envíos de todas las ventas listas para envío (opcionalmente por zona o día)"""
+    return logistica_service.crear_envios_lote(db, solicitud)
+
+
 @router.post("/envios/{envio_id}/asignar", response_model=EnvioResponse)
-async def asignar_envio(
+def asignar_envio(
     envio_id: int,
     vehiculo_id: int,
     conductor_id: int,
@@ -222,7 +271,7 @@ async def asignar_envio(
 
 
 @router.post("/envios/{envio_id}/iniciar", response_model=EnvioResponse)
-async def iniciar_envio(
+def iniciar_envio(
     envio_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_logistica)
@@ -235,7 +284,7 @@ async def iniciar_envio(
 
 
 @router.post("/envios/{envio_id}/completar", response_model=EnvioResponse)
-async def completar_envio(
+def completar_envio(
     envio_id: int,
     nombre_recibio: str,
     dni_recibio: Optional[str] = None,
@@ -256,7 +305,7 @@ async def completar_envio(
 
 
 @router.post("/envios/{envio_id}/no-entregado", response_model=EnvioResponse)
-async def marcar_no_entregado(
+def marcar_no_entregado(
     envio_id: int,
     motivo: str,
     reprogramar: bool = True,
@@ -272,7 +321,7 @@ async def marcar_no_entregado(
 
 # ============ RUTAS ============
 @router.post("/rutas", response_model=RutaRepartoResponse)
-async def crear_ruta(
+def crear_ruta(
     ruta: RutaRepartoCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_logistica)
@@ -281,8 +330,21 @@ async def crear_ruta(
     return logistica_service.crear_ruta(db, ruta)
 
 
+@router.post("/rutas/optimizar", response_model=RutaOptimizacionResponse)
+def optimizar_rutas(
+    solicitud: RutaOptimizarRequest,
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(es_logistica)
+):
+    """Armar y ordenar las rutas del día con los envíos pendientes y la flota disponible"""
+    try:
+        return logistica_service.optimizar_rutas(db, solicitud)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/rutas/{ruta_id}/completar", response_model=RutaRepartoResponse)
-async def completar_ruta(
+def completar_ruta(
     ruta_id: int,
     kilometros: float = 0,
     db: Session = Depends(get_db),
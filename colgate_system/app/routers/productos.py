@@ -5,10 +5,11 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.config import settings
 from app.database import get_db
 from app.models.usuario import Usuario
 from app.schemas.producto import (
-    ProductoCreate, ProductoUpdate, ProductoResponse, ProductoListResponse,
+    ProductoCreate, ProductoUpdate, ProductoResponse, ProductoListResponse, ProductoAutocompletado,
     CategoriaCreate, CategoriaUpdate, CategoriaResponse,
     MarcaCreate, MarcaUpdate, MarcaResponse
 )
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/productos", tags=["Productos"])
 
 # ============ CATEGORÍAS ============
 @router.get("/categorias", response_model=list[CategoriaResponse])
-async def listar_categorias(
+def listar_categorias(
     solo_activos: bool = True,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -30,7 +31,7 @@ async def listar_categorias(
 
 
 @router.post("/categorias", response_model=CategoriaResponse)
-async def crear_categoria(
+def crear_categoria(
     categoria: CategoriaCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_gerente_o_admin)
@@ -43,7 +44,7 @@ async def crear_categoria(
 
 
 @router.put("/categorias/{categoria_id}", response_model=CategoriaResponse)
-async def actualizar_categoria(
+def actualizar_categoria(
     categoria_id: int,
     categoria: CategoriaUpdate,
     db: Session = Depends(get_db),
@@ -58,7 +59,7 @@ async def actualizar_categoria(
 
 # ============ MARCAS ============
 @router.get("/marcas", response_model=list[MarcaResponse])
-async def listar_marcas(
+def listar_marcas(
     solo_activos: bool = True,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -68,7 +69,7 @@ async def listar_marcas(
 
 
 @router.post("/marcas", response_model=MarcaResponse)
-async def crear_marca(
+def crear_marca(
     marca: MarcaCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_gerente_o_admin)
@@ -78,7 +79,7 @@ async def crear_marca(
 
 
 @router.put("/marcas/{marca_id}", response_model=MarcaResponse)
-async def actualizar_marca(
+def actualizar_marca(
     marca_id: int,
     marca: MarcaUpdate,
     db: Session = Depends(get_db),
@@ -93,7 +94,7 @@ async def actualizar_marca(
 
 # ============ PRODUCTOS ============
 @router.get("", response_model=ProductoListResponse)
-async def listar_productos(
+def listar_productos(
     skip: int = 0,
     limit: int = 100,
     busqueda: Optional[str] = None,
@@ -116,8 +117,19 @@ async def listar_productos(
     return ProductoListResponse(total=total, items=productos)
 
 
+@router.get("/autocomplete", response_model=list[ProductoAutocompletado])
+def autocompletar_productos(
+    q: str = "",
+    limit: int = Query(default=settings.AUTOCOMPLETADO_LIMITE, ge=1, le=50),
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(get_usuario_actual)
+):
+    """Sugerencias de productos por prefijo de nombre, código o código de barras"""
+    return producto_service.autocompletar_productos(db, q, limit)
+
+
 @router.get("/bajo-stock", response_model=list[ProductoResponse])
-async def productos_bajo_stock(
+def productos_bajo_stock(
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
@@ -126,7 +138,7 @@ async def productos_bajo_stock(
 
 
 @router.get("/{producto_id}", response_model=ProductoResponse)
-async def obtener_producto(
+def obtener_producto(
     producto_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -139,7 +151,7 @@ async def obtener_producto(
 
 
 @router.get("/codigo/{codigo}", response_model=ProductoResponse)
-async def obtener_producto_por_codigo(
+def obtener_producto_por_codigo(
     codigo: str,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -152,7 +164,7 @@ async def obtener_producto_por_codigo(
 
 
 @router.get("/barras/{codigo_barras}", response_model=ProductoResponse)
-async def obtener_producto_por_barras(
+def obtener_producto_por_barras(
     codigo_barras: str,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -165,7 +177,7 @@ async def obtener_producto_por_barras(
 
 
 @router.post("", response_model=ProductoResponse)
-async def crear_producto(
+def crear_producto(
     producto: ProductoCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_gerente_o_admin)
@@ -186,7 +198,7 @@ async def crear_producto(
 
 
 @router.put("/{producto_id}", response_model=ProductoResponse)
-async def actualizar_producto(
+def actualizar_producto(
     producto_id: int,
     producto: ProductoUpdate,
     db: Session = Depends(get_db),
@@ -200,7 +212,7 @@ async def actualizar_producto(
 
 
 @router.delete("/{producto_id}")
-async def eliminar_producto(
+def eliminar_producto(
     producto_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(es_gerente_o_admin)
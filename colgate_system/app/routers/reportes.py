@@ -1,89 +1,73 @@
 """
 Router de Reportes y Estadísticas
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, extract
-from datetime import datetime, timedelta
+from sqlalchemy import func, desc
+from datetime import timedelta
 from typing import Optional
 
 from app.database import get_db
+from app.cache import cache_respuestas
 from app.models.producto import Producto
 from app.models.cliente import Cliente
 from app.models.venta import Venta, DetalleVenta, EstadoVenta
-from app.models.inventario import Inventario, MovimientoInventario
+from app.models.inventario import MovimientoInventario
 from app.models.logistica import Envio
 from app.models.usuario import Usuario
 from app.services.auth import get_usuario_actual
+from app.services import alerta_service, reporte_service, producto_service
+from app import fechas
 
 router = APIRouter(prefix="/reportes", tags=["Reportes y Estadísticas"])
 
 
 @router.get("/dashboard")
-async def get_dashboard_stats(
+def get_dashboard_stats(
+    request: Request,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
     """Obtiene estadísticas generales para el dashboard"""
-    
+    return cache_respuestas.responder(
+        request, usuario.rol.value, ("ventas", "inventario", "logistica"),
+        lambda: _calcular_dashboard(db)
+    )
+
+
+def _calcular_dashboard(db: Session) -> dict:
+    """Calcula las estadísticas del dashboard"""
     # Fecha de hoy y hace 30 días
-    hoy = datetime.now().date()
-    hace_30_dias = hoy - timedelta(days=30)
-    hace_7_dias = hoy - timedelta(days=7)
+    hoy = fechas.hoy()
+    desde_30_dias = fechas.inicio_dia(hoy - timedelta(days=30))
     
     # Estadísticas generales
     total_productos = db.query(func.count(Producto.id)).filter(Producto.activo == True).scalar()
     total_clientes = db.query(func.count(Cliente.id)).filter(Cliente.activo == True).scalar()
     
-    # Ventas del mes
-    ventas_mes = db.query(Venta).filter(
-        func.date(Venta.fecha_creacion) >= hace_30_dias,
-        Venta.estado != EstadoVenta.CANCELADO
-    ).all()
-    
-    total_ventas_mes = len(ventas_mes)
-    ingresos_mes = sum(v.total for v in ventas_mes) if ventas_mes else 0
+    # Ventas del mes, de la semana, por día y por estado (una sola consulta)
+    resumen_ventas = reporte_service.get_resumen_dashboard(db, hoy)
     
-    # Ventas de la semana
-    ventas_semana = db.query(Venta).filter(
-        func.date(Venta.fecha_creacion) >= hace_7_dias,
-        Venta.estado != EstadoVenta.CANCELADO
-    ).all()
-    ingresos_semana = sum(v.total for v in ventas_semana) if ventas_semana else 0
-    
-    # Productos con bajo stock
-    productos_bajo_stock = db.query(Inventario).join(Producto).filter(
-        Inventario.cantidad <= Producto.stock_minimo,
-        Producto.activo == True
-    ).count()
+    # Productos sin stock o bajo el mínimo (stock sumado de todos los almacenes)
+    productos_bajo_stock = sum(
+        1 for a in alerta_service.get_alertas(db) if a.tipo != alerta_service.TipoAlerta.STOCK_ALTO
+    )
     
     # Envíos pendientes
     envios_pendientes = db.query(func.count(Envio.id)).filter(
         Envio.estado.in_(['pendiente', 'en_ruta'])
     ).scalar()
     
-    # Ventas por día (últimos 7 días)
-    ventas_por_dia = []
-    for i in range(7):
-        fecha = hoy - timedelta(days=6-i)
-        ventas_dia = db.query(Venta).filter(
-            func.date(Venta.fecha_creacion) == fecha,
-            Venta.estado != EstadoVenta.CANCELADO
-        ).all()
-        ventas_por_dia.append({
-            "fecha": fecha.strftime("%d/%m"),
-            "cantidad": len(ventas_dia),
-            "total": sum(v.total for v in ventas_dia) if ventas_dia else 0
-        })
-    
     # Top 5 productos más vendidos
+    # (los nombres salen del catálogo en memoria, sin unir con productos)
     top_productos = db.query(
-        Producto.nombre,
+        DetalleVenta.producto_id,
         func.sum(DetalleVenta.cantidad).label('total_vendido')
-    ).join(DetalleVenta).join(Venta).filter(
+    ).join(Venta).filter(
         Venta.estado != EstadoVenta.CANCELADO,
-        func.date(Venta.fecha_creacion) >= hace_30_dias
-    ).group_by(Producto.id).order_by(desc('total_vendido')).limit(5).all()
+        Venta.fecha_creacion >= desde_30_dias
+    ).group_by(DetalleVenta.producto_id).order_by(desc('total_vendido')).limit(5).all()
+    nombres_productos = producto_service.get_nombres_productos(db, [p[0] for p in top_productos])
     
     # Top 5 clientes
     top_clientes = db.query(
@@ -91,148 +75,152 @@ async def get_dashboard_stats(
         func.sum(Venta.total).label('total_comprado')
     ).join(Venta).filter(
         Venta.estado != EstadoVenta.CANCELADO,
-        func.date(Venta.fecha_creacion) >= hace_30_dias
+        Venta.fecha_creacion >= desde_30_dias
     ).group_by(Cliente.id).order_by(desc('total_comprado')).limit(5).all()
     
-    # Ventas por estado
-    ventas_por_estado = db.query(
-        Venta.estado,
-        func.count(Venta.id).label('cantidad')
-    ).filter(
-        func.date(Venta.fecha_creacion) >= hace_30_dias
-    ).group_by(Venta.estado).all()
-    
     return {
         "resumen": {
             "total_productos": total_productos,
             "total_clientes": total_clientes,
-            "ventas_mes": total_ventas_mes,
-            "ingresos_mes": float(ingresos_mes),
-            "ingresos_semana": float(ingresos_semana),
+            "ventas_mes": resumen_ventas["ventas_mes"],
+            "ingresos_mes": float(resumen_ventas["ingresos_mes"]),
+            "ingresos_semana": float(resumen_ventas["ingresos_semana"]),
             "productos_bajo_stock": productos_bajo_stock,
             "envios_pendientes": envios_pendientes
         },
-        "ventas_por_dia": ventas_por_dia,
+        "ventas_por_dia": resumen_ventas["ventas_por_dia"],
         "top_productos": [
-            {"nombre": p[0], "cantidad": int(p[1])} for p in top_productos
+            {"nombre": nombres_productos.get(p[0]), "cantidad": int(p[1])} for p in top_productos
         ],
         "top_clientes": [
             {"nombre": c[0], "total": float(c[1])} for c in top_clientes
         ],
-        "ventas_por_estado": [
-            {"estado": v[0].value, "cantidad": v[1]} for v in ventas_por_estado
-        ]
+        "ventas_por_estado": resumen_ventas["ventas_por_estado"]
     }
 
 
 @router.get("/ventas/mensual")
-async def get_ventas_mensuales(
+def get_ventas_mensuales(
     year: int = Query(default=None),
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
     """Obtiene ventas agrupadas por mes"""
     if year is None:
-        year = datetime.now().year
+        year = fechas.hoy().year
+    
+    totales = reporte_service.get_ventas_mensuales(db, year, fechas.hoy())
     
     ventas_por_mes = []
     for mes in range(1, 13):
-        ventas = db.query(Venta).filter(
-            extract('year', Venta.fecha_creacion) == year,
-            extract('month', Venta.fecha_creacion) == mes,
-            Venta.estado != EstadoVenta.CANCELADO
-        ).all()
-        
+        cantidad, total = totales.get(mes, (0, 0))
         ventas_por_mes.append({
             "mes": mes,
             "nombre_mes": [
                 "Ene", "Feb", "Mar", "Abr", "May", "Jun",
                 "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"
             ][mes-1],
-            "cantidad": len(ventas),
-            "total": sum(v.total for v in ventas) if ventas else 0
+            "cantidad": cantidad,
+            "total": total
         })
     
     return {"year": year, "datos": ventas_por_mes}
 
 
 @router.get("/inventario/alertas")
-async def get_alertas_inventario(
+def get_alertas_inventario(
+    request: Request,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
     """Obtiene productos con alertas de stock"""
-    
-    # Productos con stock bajo
-    stock_bajo = db.query(Inventario, Producto).join(Producto).filter(
-        Inventario.cantidad <= Producto.stock_minimo,
-        Inventario.cantidad > 0,
-        Producto.activo == True
-    ).all()
-    
-    # Productos sin stock
-    sin_stock = db.query(Inventario, Producto).join(Producto).filter(
-        Inventario.cantidad == 0,
-        Producto.activo == True
-    ).all()
-    
-    # Productos cerca del máximo
-    stock_alto = db.query(Inventario, Producto).join(Producto).filter(
-        Inventario.cantidad >= Producto.stock_maximo * 0.9,
-        Producto.activo == True
-    ).all()
-    
+    return cache_respuestas.responder(
+        request, usuario.rol.value, ("inventario",),
+        lambda: _calcular_alertas_inventario(db)
+    )
+
+
+def _calcular_alertas_inventario(db: Session) -> dict:
+    """Agrupa las alertas vigentes del motor de alertas por tipo"""
+    TipoAlerta = alerta_service.TipoAlerta
+    por_tipo = {tipo: [] for tipo in TipoAlerta}
+    for alerta in alerta_service.get_alertas(db):
+        por_tipo[alerta.tipo].append(alerta)
     return {
         "stock_bajo": [
             {
-                "producto": p.nombre,
-                "codigo": p.codigo,
-                "cantidad": i.cantidad,
-                "minimo": p.stock_minimo
-            } for i, p in stock_bajo
+                "producto": a.producto,
+                "codigo": a.codigo,
+                "cantidad": a.cantidad,
+                "minimo": a.minimo
+            } for a in por_tipo[TipoAlerta.STOCK_BAJO]
         ],
         "sin_stock": [
             {
-                "producto": p.nombre,
-                "codigo": p.codigo
-            } for i, p in sin_stock
+                "producto": a.producto,
+                "codigo": a.codigo
+            } for a in por_tipo[TipoAlerta.SIN_STOCK]
         ],
         "stock_alto": [
             {
-                "producto": p.nombre,
-                "codigo": p.codigo,
-                "cantidad": i.cantidad,
-                "maximo": p.stock_maximo
-            } for i, p in stock_alto
+                "producto": a.producto,
+                "codigo": a.codigo,
+                "cantidad": a.cantidad,
+                "maximo": a.maximo
+            } for a in por_tipo[TipoAlerta.STOCK_ALTO]
         ]
     }
 
 
+@router.get("/inventario/alertas/cambios")
+def get_cambios_alertas_inventario(
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(get_usuario_actual)
+):
+    """
+    Cambios de alertas de stock desde el cursor de la consulta anterior.
+    Sin cursor (o con uno vencido) devuelve todas las alertas con reiniciar=true.
+    """
+    try:
+        return alerta_service.get_cambios(db, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/kpis")
-async def get_kpis(
+def get_kpis(
+    request: Request,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
     """Obtiene KPIs del negocio"""
-    
-    hoy = datetime.now().date()
+    return cache_respuestas.responder(
+        request, usuario.rol.value, ("ventas",),
+        lambda: _calcular_kpis(db)
+    )
+
+
+def _calcular_kpis(db: Session) -> dict:
+    """Calcula los KPIs del mes actual"""
+    hoy = fechas.hoy()
     inicio_mes = hoy.replace(day=1)
     mes_anterior = (inicio_mes - timedelta(days=1)).replace(day=1)
     
-    # Ventas mes actual
-    ventas_mes_actual = db.query(Venta).filter(
-        func.date(Venta.fecha_creacion) >= inicio_mes,
-        Venta.estado != EstadoVenta.CANCELADO
-    ).all()
-    total_mes_actual = sum(v.total for v in ventas_mes_actual) if ventas_mes_actual else 0
+    # Ventas del mes actual (por estado) y del mes anterior desde el resumen diario
+    resumen = reporte_service.get_resumen_kpis(db, inicio_mes, mes_anterior)
+    por_estado = resumen["actual_por_estado"]
     
-    # Ventas mes anterior
-    ventas_mes_anterior = db.query(Venta).filter(
-        func.date(Venta.fecha_creacion) >= mes_anterior,
-        func.date(Venta.fecha_creacion) < inicio_mes,
-        Venta.estado != EstadoVenta.CANCELADO
-    ).all()
-    total_mes_anterior = sum(v.total for v in ventas_mes_anterior) if ventas_mes_anterior else 0
+    total_ventas = sum(cantidad for cantidad, _ in por_estado.values())
+    ordenes_mes_actual = sum(
+        cantidad for estado, (cantidad, _) in por_estado.items()
+        if estado != EstadoVenta.CANCELADO
+    )
+    total_mes_actual = sum(
+        total for estado, (_, total) in por_estado.items()
+        if estado != EstadoVenta.CANCELADO
+    )
+    total_mes_anterior = resumen["anterior"]["total"]
     
     # Crecimiento
     if total_mes_anterior > 0:
@@ -241,23 +229,19 @@ async def get_kpis(
         crecimiento = 100 if total_mes_actual > 0 else 0
     
     # Ticket promedio
-    ticket_promedio = total_mes_actual / len(ventas_mes_actual) if ventas_mes_actual else 0
+    ticket_promedio = total_mes_actual / ordenes_mes_actual if ordenes_mes_actual else 0
     
     # Clientes nuevos este mes
     clientes_nuevos = db.query(func.count(Cliente.id)).filter(
-        func.date(Cliente.fecha_registro) >= inicio_mes
+        Cliente.fecha_creacion >= fechas.inicio_dia(inicio_mes)
     ).scalar()
     
     # Tasa de conversión (ventas confirmadas / total ventas)
-    ventas_confirmadas = db.query(func.count(Venta.id)).filter(
-        func.date(Venta.fecha_creacion) >= inicio_mes,
-        Venta.estado.in_([EstadoVenta.CONFIRMADO, EstadoVenta.EN_PREPARACION, 
-                         EstadoVenta.LISTO_ENVIO, EstadoVenta.EN_RUTA, EstadoVenta.ENTREGADO])
-    ).scalar()
-    
-    total_ventas = db.query(func.count(Venta.id)).filter(
-        func.date(Venta.fecha_creacion) >= inicio_mes
-    ).scalar()
+    ventas_confirmadas = sum(
+        por_estado.get(estado, (0, 0))[0]
+        for estado in [EstadoVenta.CONFIRMADO, EstadoVenta.EN_PREPARACION,
+                       EstadoVenta.LISTO_ENVIO, EstadoVenta.EN_RUTA, EstadoVenta.ENTREGADO]
+    )
     
     tasa_conversion = (ventas_confirmadas / total_ventas * 100) if total_ventas > 0 else 0
     
@@ -268,5 +252,5 @@ async def get_kpis(
         "ticket_promedio": round(float(ticket_promedio), 2),
         "clientes_nuevos": clientes_nuevos,
         "tasa_conversion": round(tasa_conversion, 1),
-        "total_ordenes": len(ventas_mes_actual)
+        "total_ordenes": ordenes_mes_actual
     }
@@ -1,69 +1,89 @@
 """
 Router de Ventas
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
+import json
 
+from app.config import settings
 from app.database import get_db
+from app.cache import cache_respuestas
 from app.models.usuario import Usuario
 from app.models.venta import EstadoVenta
 from app.schemas.venta import (
     VentaCreate, VentaUpdate, VentaResponse, VentaListResponse,
-    PagoVentaCreate, PagoVentaResponse
+    VentaLoteResponse, PagoVentaCreate, PagoVentaResponse
 )
-from app.services import venta_service
+from app.services import venta_service, reporte_service
 from app.services.auth import get_usuario_actual, es_vendedor
+from app.paginacion import ModoConteo
 
 router = APIRouter(prefix="/ventas", tags=["Ventas"])
 
 
 @router.get("", response_model=VentaListResponse)
-async def listar_ventas(
+def listar_ventas(
     skip: int = 0,
     limit: int = 100,
     cliente_id: Optional[int] = None,
     estado: Optional[EstadoVenta] = None,
     fecha_desde: Optional[datetime] = None,
     fecha_hasta: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    conteo: Optional[ModoConteo] = None,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
-    """Listar ventas con filtros"""
-    ventas, total = venta_service.get_ventas(
-        db,
-        skip=skip,
-        limit=limit,
-        cliente_id=cliente_id,
-        estado=estado,
-        fecha_desde=fecha_desde,
-        fecha_hasta=fecha_hasta
-    )
-    return VentaListResponse(total=total, items=ventas)
+    """Listar ventas con filtros (cursor vacío inicia la paginación por cursor)"""
+    try:
+        pagina = venta_service.get_ventas(
+            db,
+            skip=skip,
+            limit=limit,
+            cliente_id=cliente_id,
+            estado=estado,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            cursor=cursor,
+            conteo=conteo
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return VentaListResponse.model_validate(pagina, from_attributes=True)
 
 
 @router.get("/mis-ventas", response_model=VentaListResponse)
-async def mis_ventas(
+def mis_ventas(
     skip: int = 0,
     limit: int = 100,
     estado: Optional[EstadoVenta] = None,
+    cursor: Optional[str] = None,
+    conteo: Optional[ModoConteo] = None,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
 ):
     """Listar ventas del vendedor actual"""
-    ventas, total = venta_service.get_ventas(
-        db,
-        skip=skip,
-        limit=limit,
-        vendedor_id=usuario.id,
-        estado=estado
-    )
-    return VentaListResponse(total=total, items=ventas)
+    try:
+        pagina = venta_service.get_ventas(
+            db,
+            skip=skip,
+            limit=limit,
+            vendedor_id=usuario.id,
+            estado=estado,
+            cursor=cursor,
+            conteo=conteo
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return VentaListResponse.model_validate(pagina, from_attributes=True)
 
 
 @router.get("/resumen")
-async def resumen_ventas(
+def resumen_ventas(
     fecha_desde: datetime,
     fecha_hasta: datetime,
     db: Session = Depends(get_db),
@@ -74,7 +94,7 @@ async def resumen_ventas(
 
 
 @router.get("/{venta_id}", response_model=VentaResponse)
-async def obtener_venta(
+def obtener_venta(
     venta_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -87,7 +107,7 @@ async def obtener_venta(
 
 
 @router.get("/numero/{numero}", response_model=VentaResponse)
-async def obtener_venta_por_numero(
+def obtener_venta_por_numero(
     numero: str,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -100,7 +120,7 @@ async def obtener_venta_por_numero(
 
 
 @router.post("", response_model=VentaResponse)
-async def crear_venta(
+def crear_venta(
     venta: VentaCreate,
     almacen_id: int = 1,
     db: Session = Depends(get_db),
@@ -113,8 +133,78 @@ async def crear_venta(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=VentaLoteResponse)
+async def crear_ventas_lote(
+    request: Request,
+    db: Session = Depends(get_db),
+    usuario: Usuario = Depends(es_vendedor)
+):
+    """
+    Crear ventas en lote. Acepta un arreglo JSON de ventas o NDJSON
+    (Content-Type application/x-ndjson, una venta por línea). Cada venta se
+    informa por separado: las inválidas no impiden crear las demás.
+    """
+    ventas, resultados = await _leer_lote_ventas(request)
+    if ventas:
+        resultados += await run_in_threadpool(
+            venta_service.crear_ventas_lote, db, ventas, usuario.id
+        )
+    resultados.sort(key=lambda r: r["indice"])
+    
+    creadas = sum(1 for r in resultados if r["error"] is None)
+    return VentaLoteResponse(
+        total=len(resultados),
+        creadas=creadas,
+        con_error=len(resultados) - creadas,
+        resultados=resultados
+    )
+
+
+async def _leer_lote_ventas(request: Request) -> tuple[list, list]:
+    """Lee el cuerpo del lote y valida cada venta; devuelve (válidas, errores por índice)"""
+    if "ndjson" in request.headers.get("content-type", ""):
+        items = []
+        pendiente = b""
+        async for bloque in request.stream():
+            pendiente += bloque
+            *lineas, pendiente = pendiente.split(b"\n")
+            items.extend(linea for linea in lineas if linea.strip())
+            if len(items) > settings.VENTAS_LOTE_MAX:
+                break
+        if pendiente.strip():
+            items.append(pendiente)
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="El cuerpo no es JSON válido")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Se esperaba un arreglo de ventas")
+    
+    if len(items) > settings.VENTAS_LOTE_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote supera el máximo de {settings.VENTAS_LOTE_MAX} ventas"
+        )
+    
+    ventas, errores = [], []
+    for indice, item in enumerate(items):
+        try:
+            if isinstance(item, bytes):
+                ventas.append((indice, VentaCreate.model_validate_json(item)))
+            else:
+                ventas.append((indice, VentaCreate.model_validate(item)))
+        except ValidationError as e:
+            detalle = "; ".join(
+                f"{'.'.join(str(p) for p in err['loc']) or 'venta'}: {err['msg']}"
+                for err in e.errors()
+            )
+            errores.append({"indice": indice, "venta_id": None, "numero": None, "error": detalle})
+    return ventas, errores
+
+
 @router.post("/{venta_id}/confirmar", response_model=VentaResponse)
-async def confirmar_venta(
+def confirmar_venta(
     venta_id: int,
     almacen_id: int = 1,
     db: Session = Depends(get_db),
@@ -128,7 +218,7 @@ async def confirmar_venta(
 
 
 @router.post("/{venta_id}/preparar", response_model=VentaResponse)
-async def preparar_venta(
+def preparar_venta(
     venta_id: int,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
@@ -141,7 +231,7 @@ async def preparar_venta(
 
 
 @router.post("/{venta_id}/listo-envio", response_model=VentaResponse)
-async def marcar_listo_envio(
+def marcar_listo_envio(
     venta_id: int,
     almacen_id: int = 1,
     db: Session = Depends(get_db),
@@ -155,7 +245,7 @@ async def marcar_listo_envio(
 
 
 @router.post("/{venta_id}/cancelar", response_model=VentaResponse)
-async def cancelar_venta(
+def cancelar_venta(
     venta_id: int,
     almacen_id: int = 1,
     db: Session = Depends(get_db),
@@ -169,7 +259,7 @@ async def cancelar_venta(
 
 
 @router.put("/{venta_id}", response_model=VentaResponse)
-async def actualizar_venta(
+def actualizar_venta(
     venta_id: int,
     datos: VentaUpdate,
     db: Session = Depends(get_db),
@@ -186,17 +276,25 @@ async def actualizar_venta(
             detail=f"No se puede modificar una venta en estado {venta.estado}"
         )
     
-    for key, value in datos.model_dump(exclude_unset=True).items():
+    cambios = datos.model_dump(exclude_unset=True)
+    estado = cambios.pop("estado", None)
+    for key, value in cambios.items():
         setattr(venta, key, value)
     
+    # El estado cambia con un UPDATE condicionado para no mover dos veces el resumen diario
+    if estado is not None and estado != venta.estado:
+        if not reporte_service.cambiar_estado_venta(db, venta, estado):
+            db.rollback()
+            raise HTTPException(status_code=400, detail="La venta ya cambió de estado por otra operación")
     db.commit()
+    cache_respuestas.invalidar("ventas")
     db.refresh(venta)
     return venta
 
 
 # ============ PAGOS ============
 @router.post("/pagos", response_model=PagoVentaResponse)
-async def registrar_pago(
+def registrar_pago(
     pago: PagoVentaCreate,
     db: Session = Depends(get_db),
     usuario: Usuario = Depends(get_usuario_actual)
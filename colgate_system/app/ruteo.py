@@ -0,0 +1,273 @@
+"""
+Optimización de rutas de reparto con capacidad (CVRP)
+
+1. Construcción por ahorros de Clarke-Wright: se parte de una ruta por
+   parada y se unen los extremos de rutas con mayor ahorro
+   d(0,i) + d(0,j) - d(i,j) mientras quepan en el vehículo.
+2. Mejora local de cada ruta con 2-opt (invertir tramos) y or-opt (mover
+   tramos de 1 a 3 paradas).
+
+Las coordenadas se proyectan a un plano en km alrededor del depósito (error
+despreciable a escala de ciudad), salvo que se entregue la matriz de
+distancias entre los nodos (app.distancias). Tanto los ahorros como las mejoras se
+limitan a los vecinos más cercanos de cada parada, así el costo crece casi
+linealmente con la cantidad de paradas en lugar de cuadráticamente.
+"""
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import heapq
+import math
+
+KM_POR_GRADO_LATITUD = 110.574
+KM_POR_GRADO_LONGITUD = 111.320  # en el ecuador; se multiplica por cos(latitud)
+VECINOS = 20
+MEJORA_MINIMA = 1e-9
+
+
+class Parada(NamedTuple):
+    id: int
+    latitud: float
+    longitud: float
+    peso: float = 0.0
+    volumen: float = 0.0
+
+
+class Capacidad(NamedTuple):
+    """Límites por vehículo; None = sin límite"""
+    peso: Optional[float] = None
+    volumen: Optional[float] = None
+    paradas: Optional[int] = None
+
+
+class _Plano:
+    """Puntos proyectados; el nodo 0 es el depósito y el nodo i la parada i-1"""
+
+    def __init__(
+        self,
+        origen: Tuple[float, float],
+        paradas: Sequence[Parada],
+        distancias: Optional[Sequence[Sequence[float]]] = None
+    ):
+        lat0, lon0 = origen
+        escala_x = KM_POR_GRADO_LONGITUD * math.cos(math.radians(lat0))
+        self.x = [0.0] + [(p.longitud - lon0) * escala_x for p in paradas]
+        self.y = [0.0] + [(p.latitud - lat0) * KM_POR_GRADO_LATITUD for p in paradas]
+        # Distancias reales nodo x nodo; la grilla de vecinos sigue usando el plano
+        self.distancias = distancias
+
+    def d(self, i: int, j: int) -> float:
+        if self.distancias is not None:
+            return self.distancias[i][j]
+        return math.hypot(self.x[i] - self.x[j], self.y[i] - self.y[j])
+
+    def vecinos(self, k: int) -> List[List[int]]:
+        """Los k nodos (sin depósito) más cercanos a cada nodo, usando una grilla"""
+        n = len(self.x) - 1
+        if n <= 1:
+            return [[] for _ in range(n + 1)]
+        k = min(k, n - 1)
+        xs, ys = self.x[1:], self.y[1:]
+        ancho = max(max(xs) - min(xs), max(ys) - min(ys), 1e-6)
+        celda = ancho / max(1.0, math.sqrt(n / 2))  # ~2 puntos por celda
+        x0, y0 = min(xs), min(ys)
+        grilla: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        posicion = [(0, 0)]
+        for i in range(1, n + 1):
+            c = (int((self.x[i] - x0) / celda), int((self.y[i] - y0) / celda))
+            grilla[c].append(i)
+            posicion.append(c)
+
+        def anillo(cx: int, cy: int, radio: int) -> List[int]:
+            puntos = []
+            for gx in range(cx - radio, cx + radio + 1):
+                for gy in range(cy - radio, cy + radio + 1):
+                    if max(abs(gx - cx), abs(gy - cy)) == radio:
+                        puntos.extend(grilla.get((gx, gy), ()))
+            return puntos
+
+        resultado = [[]]
+        for i in range(1, n + 1):
+            cx, cy = posicion[i]
+            candidatos = anillo(cx, cy, 0)
+            radio = 0
+            while len(candidatos) <= k:  # incluye al propio punto
+                radio += 1
+                candidatos.extend(anillo(cx, cy, radio))
+            # Un anillo más: un punto de la esquina del anillo puede estar más lejos que uno del siguiente
+            candidatos.extend(anillo(cx, cy, radio + 1))
+            resultado.append(heapq.nsmallest(k, (j for j in candidatos if j != i), key=lambda j: self.d(i, j)))
+        return resultado
+
+
+def _cabe(carga: List[float], extra: List[float], capacidad: Capacidad) -> bool:
+    peso, volumen, paradas = carga[0] + extra[0], carga[1] + extra[1], carga[2] + extra[2]
+    return (
+        (capacidad.peso is None or peso <= capacidad.peso)
+        and (capacidad.volumen is None or volumen <= capacidad.volumen)
+        and (capacidad.paradas is None or paradas <= capacidad.paradas)
+    )
+
+
+def _ahorros(plano: _Plano, vecinos: List[List[int]], paradas: Sequence[Parada], capacidad: Capacidad) -> List[List[int]]:
+    n = len(paradas)
+    rutas: Dict[int, List[int]] = {i: [i] for i in range(1, n + 1)}
+    carga: Dict[int, List[float]] = {i: [paradas[i - 1].peso, paradas[i - 1].volumen, 1] for i in range(1, n + 1)}
+    ruta_de = list(range(n + 1))
+
+    ahorros = []
+    for i in range(1, n + 1):
+        for j in vecinos[i]:
+            if i < j or i not in vecinos[j]:
+                ahorros.append((plano.d(0, i) + plano.d(0, j) - plano.d(i, j), i, j))
+    ahorros.sort(reverse=True)
+
+    for ahorro, i, j in ahorros:
+        if ahorro <= 0:
+            break
+        ri, rj = ruta_de[i], ruta_de[j]
+        if ri == rj or not _cabe(carga[ri], carga[rj], capacidad):
+            continue
+        a, b = rutas[ri], rutas[rj]
+        # i y j deben ser extremos de sus rutas: se orientan para unir ...i + j...
+        if a[-1] != i:
+            if a[0] != i:
+                continue
+            a.reverse()
+        if b[0] != j:
+            if b[-1] != j:
+                continue
+            b.reverse()
+        # Se conserva la ruta más larga para no copiar de más
+        if len(a) >= len(b):
+            a.extend(b)
+            destino, origen = ri, rj
+        else:
+            b[:0] = a
+            destino, origen = rj, ri
+        for nodo in rutas[origen]:
+            ruta_de[nodo] = destino
+        carga[destino] = [x + y for x, y in zip(carga[destino], carga[origen])]
+        del rutas[origen], carga[origen]
+
+    return list(rutas.values())
+
+
+def _dos_opt(t: List[int], plano: _Plano, vecinos: List[List[int]]) -> bool:
+    """Una pasada de 2-opt sobre el recorrido t (con el depósito en ambos extremos)"""
+    d = plano.d
+    pos = {nodo: p for p, nodo in enumerate(t)}
+    mejoro = False
+    i = 1
+    while i < len(t) - 1:
+        u = t[i]
+        for c in vecinos[u]:
+            j = pos.get(c)
+            if j is None or j == 0 or j == len(t) - 1:
+                continue
+            if i < j:
+                # Quita (u, sig(u)) y (c, sig(c)); agrega (u, c) y (sig(u), sig(c))
+                delta = d(u, c) + d(t[i + 1], t[j + 1]) - d(u, t[i + 1]) - d(c, t[j + 1])
+                desde, hasta = i + 1, j
+            elif j < i - 1:
+                # Quita (ant(c), c) y (ant(u), u); agrega (ant(c), ant(u)) y (c, u)
+                delta = d(t[j - 1], t[i - 1]) + d(c, u) - d(t[j - 1], c) - d(t[i - 1], u)
+                desde, hasta = j, i - 1
+            else:
+                continue
+            if delta < -MEJORA_MINIMA:
+                t[desde:hasta + 1] = t[desde:hasta + 1][::-1]
+                for p in range(desde, hasta + 1):
+                    pos[t[p]] = p
+                mejoro = True
+                break
+        i += 1
+    return mejoro
+
+
+def _or_opt(t: List[int], plano: _Plano, vecinos: List[List[int]]) -> bool:
+    """Una pasada de or-opt: mueve tramos de 1 a 3 paradas junto a un vecino"""
+    d = plano.d
+    mejoro = False
+    for largo in (1, 2, 3):
+        i = 1
+        while i + largo < len(t):
+            tramo = t[i:i + largo]
+            ant, sig = t[i - 1], t[i + largo]
+            primero, ultimo = tramo[0], tramo[-1]
+            ganancia = d(ant, primero) + d(ultimo, sig) - d(ant, sig)
+            if ganancia <= MEJORA_MINIMA:
+                i += 1
+                continue
+            resto = t[:i] + t[i + largo:]
+            pos = {nodo: p for p, nodo in enumerate(resto)}
+            mejor = None
+            for extremo in (primero, ultimo):
+                for c in vecinos[extremo]:
+                    p = pos.get(c)
+                    if p is None:
+                        continue
+                    # Insertar entre (c, sig) o (ant, c), en el sentido que convenga
+                    for a, b in ((p, p + 1), (p - 1, p)):
+                        if a < 0 or b >= len(resto):
+                            continue
+                        x, y = resto[a], resto[b]
+                        base = d(x, y)
+                        costo = d(x, primero) + d(ultimo, y) - base
+                        costo_inv = d(x, ultimo) + d(primero, y) - base
+                        invertir = costo_inv < costo
+                        costo = min(costo, costo_inv)
+                        if costo < ganancia - MEJORA_MINIMA and (mejor is None or costo < mejor[0]):
+                            mejor = (costo, b, invertir)
+            if mejor:
+                _, b, invertir = mejor
+                t[:] = resto[:b] + (tramo[::-1] if invertir else tramo) + resto[b:]
+                mejoro = True
+            else:
+                i += 1
+    return mejoro
+
+
+def _mejorar(ruta: List[int], plano: _Plano, vecinos: List[List[int]], max_pasadas: int = 50) -> List[int]:
+    t = [0] + ruta + [0]
+    for _ in range(max_pasadas):
+        cambio = _dos_opt(t, plano, vecinos)
+        cambio = _or_opt(t, plano, vecinos) or cambio
+        if not cambio:
+            break
+    return t[1:-1]
+
+
+def longitud_km(
+    origen: Tuple[float, float],
+    paradas: Sequence[Parada],
+    distancias: Optional[Sequence[Sequence[float]]] = None
+) -> float:
+    """Distancia del recorrido depósito -> paradas en orden -> depósito"""
+    plano = _Plano(origen, paradas, distancias)
+    nodos = [0] + list(range(1, len(paradas) + 1)) + [0]
+    return sum(plano.d(a, b) for a, b in zip(nodos, nodos[1:]))
+
+
+def optimizar(
+    origen: Tuple[float, float],
+    paradas: Sequence[Parada],
+    capacidad: Capacidad,
+    vecinos: int = VECINOS,
+    distancias: Optional[Sequence[Sequence[float]]] = None
+) -> List[List[Parada]]:
+    """
+    Agrupa las paradas en rutas que respetan la capacidad y ordena cada ruta.
+    Una parada que por sí sola excede la capacidad queda en su propia ruta
+    (quien asigna los vehículos decide qué hacer con ella).
+
+    `distancias[i][j]` es la distancia en km entre nodos, con el depósito como
+    nodo 0 y la parada k como nodo k + 1.
+    """
+    if not paradas:
+        return []
+    plano = _Plano(origen, paradas, distancias)
+    cercanos = plano.vecinos(vecinos)
+    rutas = _ahorros(plano, cercanos, paradas, capacidad)
+    rutas = [_mejorar(r, plano, cercanos) for r in rutas]
+    rutas.sort(key=lambda r: -len(r))
+    return [[paradas[nodo - 1] for nodo in r] for r in rutas]
@@ -75,3 +75,21 @@ class ClienteResponse(ClienteBase):
 class ClienteListResponse(BaseModel):
     total: int
     items: List[ClienteResponse]
+
+
+class ClienteAutocompletado(BaseModel):
+    id: int
+    codigo: str
+    razon_social: str
+    nombre_comercial: Optional[str] = None
+    ruc: Optional[str] = None
+
+
+class ClienteCercano(BaseModel):
+    id: int
+    codigo: str
+    razon_social: str
+    distrito: Optional[str] = None
+    latitud: float
+    longitud: float
+    distancia_km: float
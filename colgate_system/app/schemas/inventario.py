@@ -15,6 +15,8 @@ class AlmacenBase(BaseModel):
     direccion: Optional[str] = None
     distrito: Optional[str] = None
     ciudad: Optional[str] = None
+    latitud: Optional[float] = None
+    longitud: Optional[float] = None
     responsable: Optional[str] = None
     telefono: Optional[str] = None
 
@@ -29,6 +31,8 @@ class AlmacenUpdate(BaseModel):
     direccion: Optional[str] = None
     distrito: Optional[str] = None
     ciudad: Optional[str] = None
+    latitud: Optional[float] = None
+    longitud: Optional[float] = None
     responsable: Optional[str] = None
     telefono: Optional[str] = None
     activo: Optional[bool] = None
@@ -1,9 +1,9 @@
 """
 Schemas de Logística
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime, time
+from datetime import date, datetime, time
 from app.models.logistica import EstadoEnvio, TipoVehiculo
 
 
@@ -117,6 +117,19 @@ class ZonaRepartoResponse(ZonaRepartoBase):
         from_attributes = True
 
 
+class ZonaEnvios(BaseModel):
+    """Envíos de un día agrupados por zona (zona_id None = sin zona)"""
+    zona_id: Optional[int] = None
+    codigo: Optional[str] = None
+    nombre: Optional[str] = None
+    envios: int
+    pendientes: int
+    en_proceso: int
+    entregados: int
+    no_entregados: int
+    monto_total: float
+
+
 # ============ ENVÍO ============
 class EnvioBase(BaseModel):
     venta_id: int
@@ -151,6 +164,7 @@ class EnvioResponse(EnvioBase):
     id: int
     codigo: str
     estado: EstadoEnvio
+    zona_id: Optional[int] = None
     ruta_id: Optional[int] = None
     vehiculo_id: Optional[int] = None
     conductor_id: Optional[int] = None
@@ -164,6 +178,24 @@ class EnvioResponse(EnvioBase):
         from_attributes = True
 
 
+class EnvioLoteRequest(BaseModel):
+    zona_id: Optional[int] = None  # Solo ventas de clientes de la zona
+    fecha: Optional[date] = None  # Solo ventas con entrega solicitada ese día
+    fecha_programada: Optional[datetime] = None  # Por defecto la entrega solicitada de cada venta
+
+
+class ZonaEnviosCreados(BaseModel):
+    zona_id: Optional[int] = None
+    envios: int
+
+
+class EnvioLoteResponse(BaseModel):
+    creados: int
+    codigo_desde: Optional[str] = None
+    codigo_hasta: Optional[str] = None
+    por_zona: List[ZonaEnviosCreados]
+
+
 # ============ RUTA REPARTO ============
 class RutaRepartoBase(BaseModel):
     codigo: str
@@ -202,3 +234,34 @@ class RutaRepartoResponse(RutaRepartoBase):
 
     class Config:
         from_attributes = True
+
+
+# ============ OPTIMIZACIÓN DE RUTAS ============
+class RutaOptimizarRequest(BaseModel):
+    fecha: Optional[date] = None  # Por defecto hoy (zona horaria del negocio)
+    almacen_id: int = 1  # Punto de partida y retorno
+    zona_id: Optional[int] = None  # Solo envíos de la zona; se registra en las rutas creadas
+    vehiculo_ids: Optional[List[int]] = None  # Por defecto todos los disponibles
+    conductor_ids: Optional[List[int]] = None
+    max_paradas: Optional[int] = Field(default=None, ge=1)
+    guardar: bool = True  # False = solo simular, sin crear rutas
+
+
+class RutaOptimizada(BaseModel):
+    ruta_id: Optional[int] = None
+    codigo: Optional[str] = None
+    vehiculo_id: int
+    conductor_id: int
+    envio_ids: List[int]  # En orden de entrega
+    distancia_km: float
+    peso: float
+    volumen: float
+
+
+class RutaOptimizacionResponse(BaseModel):
+    fecha: date
+    guardado: bool
+    distancia_total_km: float
+    rutas: List[RutaOptimizada]
+    sin_asignar: List[int]  # Envíos que no entraron en ningún vehículo
+    sin_coordenadas: List[int]  # Envíos cuyo cliente no tiene latitud/longitud
@@ -77,6 +77,8 @@ class ProductoBase(BaseModel):
     precio_mayorista: float = 0.0
     stock_minimo: int = 10
     stock_maximo: int = 1000
+    peso: Optional[float] = None  # kg por unidad
+    volumen: Optional[float] = None  # m3 por unidad
 
 
 class ProductoCreate(ProductoBase):
@@ -97,6 +99,8 @@ class ProductoUpdate(BaseModel):
     precio_mayorista: Optional[float] = None
     stock_minimo: Optional[int] = None
     stock_maximo: Optional[int] = None
+    peso: Optional[float] = None
+    volumen: Optional[float] = None
     activo: Optional[bool] = None
     destacado: Optional[bool] = None
 
@@ -116,3 +120,10 @@ class ProductoResponse(ProductoBase):
 class ProductoListResponse(BaseModel):
     total: int
     items: List[ProductoResponse]
+
+
+class ProductoAutocompletado(BaseModel):
+    id: int
+    codigo: str
+    nombre: str
+    precio_venta: float
@@ -83,10 +83,26 @@ class VentaResponse(VentaBase):
 
 
 class VentaListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # None si no se pidió conteo
+    total_exacto: bool = True
+    siguiente_cursor: Optional[str] = None
     items: List[VentaResponse]
 
 
+class VentaLoteResultado(BaseModel):
+    indice: int  # Posición de la venta en el lote recibido
+    venta_id: Optional[int] = None
+    numero: Optional[str] = None
+    error: Optional[str] = None
+
+
+class VentaLoteResponse(BaseModel):
+    total: int
+    creadas: int
+    con_error: int
+    resultados: List[VentaLoteResultado]
+
+
 # ============ PAGO ============
 class PagoVentaBase(BaseModel):
     venta_id: int
@@ -0,0 +1,212 @@
+"""
+Motor de alertas de stock: sin stock, stock bajo y stock alto por producto,
+sumando el stock de todos los almacenes.
+
+Las alertas vigentes se guardan en memoria y se recalculan solo para los
+productos afectados después de cada movimiento de inventario o cambio de
+producto; cada diferencia queda en un registro de cambios numerado que los
+clientes consultan con un cursor (`get_cambios`). Un recálculo completo cada
+ALERTAS_TTL_SEGUNDOS incorpora los cambios hechos por otros procesos.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+import enum
+import threading
+import time
+import uuid
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.inventario import Inventario
+from app.models.producto import Producto
+
+# Fracción de stock_maximo a partir de la cual se avisa stock alto
+UMBRAL_STOCK_ALTO = 0.9
+
+
+class TipoAlerta(str, enum.Enum):
+    SIN_STOCK = "sin_stock"
+    STOCK_BAJO = "stock_bajo"
+    STOCK_ALTO = "stock_alto"
+
+
+class AlertaStock(NamedTuple):
+    producto_id: int
+    codigo: str
+    producto: str
+    tipo: TipoAlerta
+    cantidad: int
+    minimo: int
+    maximo: int
+
+
+def _tipo_alerta(cantidad: int, minimo: Optional[int], maximo: Optional[int]) -> Optional[TipoAlerta]:
+    if cantidad <= 0:
+        return TipoAlerta.SIN_STOCK
+    if minimo is not None and cantidad <= minimo:
+        return TipoAlerta.STOCK_BAJO
+    if maximo and cantidad >= maximo * UMBRAL_STOCK_ALTO:
+        return TipoAlerta.STOCK_ALTO
+    return None
+
+
+def calcular_alertas(db: Session, producto_ids: Optional[Iterable[int]] = None) -> Dict[int, AlertaStock]:
+    """
+    Alertas de los productos activos (o solo de los indicados) en una única
+    consulta agrupada por producto; los productos sin inventario cuentan con 0.
+    """
+    total = func.coalesce(func.sum(Inventario.stock_actual), 0)
+    query = db.query(
+        Producto.id, Producto.codigo, Producto.nombre,
+        Producto.stock_minimo, Producto.stock_maximo, total
+    ).outerjoin(
+        Inventario, Inventario.producto_id == Producto.id
+    ).filter(
+        Producto.activo == True
+    ).group_by(Producto.id).having(
+        or_(
+            total <= func.coalesce(Producto.stock_minimo, 0),
+            and_(Producto.stock_maximo > 0, total >= Producto.stock_maximo * UMBRAL_STOCK_ALTO)
+        )
+    )
+    if producto_ids is not None:
+        query = query.filter(Producto.id.in_(set(producto_ids)))
+
+    alertas = {}
+    for id, codigo, nombre, minimo, maximo, cantidad in query:
+        tipo = _tipo_alerta(int(cantidad), minimo, maximo)
+        if tipo:
+            alertas[id] = AlertaStock(id, codigo, nombre, tipo, int(cantidad), minimo, maximo)
+    return alertas
+
+
+class MotorAlertas:
+    """
+    Estado de alertas del proceso y registro acotado de cambios. El cursor
+    incluye un identificador del proceso: un cursor de otro proceso (o uno
+    tan antiguo que sus cambios ya se descartaron) obliga a reiniciar.
+    """
+
+    def __init__(self, ttl_segundos: float, max_cambios: int):
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._alertas: Dict[int, AlertaStock] = {}
+        self._cambios: deque = deque(maxlen=max_cambios)  # (secuencia, producto_id, anterior, actual)
+        self._secuencia = 0
+        self._epoca = uuid.uuid4().hex[:8]
+        self._expira = 0.0  # 0 = sin cargar
+
+    def _aplicar(self, nuevas: Dict[int, AlertaStock], revisados: Optional[Set[int]]):
+        """Registra las diferencias entre las alertas vigentes y las recalculadas"""
+        with self._lock:
+            if revisados is None:
+                revisados = set(self._alertas) | set(nuevas)
+            for producto_id in sorted(revisados):
+                anterior = self._alertas.get(producto_id)
+                actual = nuevas.get(producto_id)
+                if anterior == actual:
+                    continue
+                self._secuencia += 1
+                self._cambios.append((self._secuencia, producto_id, anterior, actual))
+                if actual:
+                    self._alertas[producto_id] = actual
+                else:
+                    del self._alertas[producto_id]
+
+    def _asegurar_vigente(self, db: Session):
+        with self._lock:
+            if self._expira > time.monotonic():
+                return
+            cargado = bool(self._expira)
+        alertas = calcular_alertas(db)
+        if cargado:
+            self._aplicar(alertas, None)
+        else:
+            with self._lock:
+                self._alertas = alertas
+        with self._lock:
+            self._expira = time.monotonic() + self.ttl_segundos
+
+    def actualizar(self, db: Session, producto_ids: Iterable[int]):
+        """Recalcula las alertas de los productos indicados (después de un commit)"""
+        with self._lock:
+            if not self._expira:
+                return  # Sin cargar: se calculará completo en la próxima consulta
+        ids = set(producto_ids)
+        if ids:
+            self._aplicar(calcular_alertas(db, ids), ids)
+
+    def alertas(self, db: Session) -> List[AlertaStock]:
+        self._asegurar_vigente(db)
+        with self._lock:
+            return sorted(self._alertas.values(), key=lambda a: (a.tipo.value, a.producto))
+
+    def cambios(self, db: Session, cursor: Optional[str]) -> dict:
+        """
+        Cambios de alertas posteriores al cursor. Sin cursor, o si el cursor no
+        es de este proceso o es demasiado antiguo, devuelve todas las alertas
+        vigentes con reiniciar=True.
+        """
+        desde = None
+        if cursor:
+            try:
+                epoca, secuencia = cursor.split(".")
+                secuencia = int(secuencia)
+            except ValueError:
+                raise ValueError("Cursor de alertas inválido")
+            if epoca == self._epoca:
+                desde = secuencia
+
+        self._asegurar_vigente(db)
+        with self._lock:
+            siguiente = f"{self._epoca}.{self._secuencia}"
+            primera = self._cambios[0][0] if self._cambios else self._secuencia + 1
+            if desde is None or desde > self._secuencia or desde < primera - 1:
+                return {
+                    "cursor": siguiente,
+                    "reiniciar": True,
+                    "cambios": [_cambio(None, None, a) for a in self._alertas.values()]
+                }
+            return {
+                "cursor": siguiente,
+                "reiniciar": False,
+                "cambios": [
+                    _cambio(secuencia, anterior, actual)
+                    for secuencia, _, anterior, actual in self._cambios
+                    if secuencia > desde
+                ]
+            }
+
+
+def _cambio(secuencia: Optional[int], anterior: Optional[AlertaStock], actual: Optional[AlertaStock]) -> dict:
+    """Un cambio del feed; tipo None indica que la alerta del producto se resolvió"""
+    alerta = actual or anterior
+    return {
+        "secuencia": secuencia,
+        "producto_id": alerta.producto_id,
+        "codigo": alerta.codigo,
+        "producto": alerta.producto,
+        "tipo": actual.tipo.value if actual else None,
+        "tipo_anterior": anterior.tipo.value if anterior else None,
+        "cantidad": actual.cantidad if actual else None
+    }
+
+
+motor_alertas = MotorAlertas(
+    ttl_segundos=settings.ALERTAS_TTL_SEGUNDOS,
+    max_cambios=settings.ALERTAS_CAMBIOS_MAX
+)
+
+
+def actualizar_alertas(db: Session, producto_ids: Iterable[int]):
+    motor_alertas.actualizar(db, producto_ids)
+
+
+def get_alertas(db: Session) -> List[AlertaStock]:
+    return motor_alertas.alertas(db)
+
+
+def get_cambios(db: Session, cursor: Optional[str]) -> dict:
+    return motor_alertas.cambios(db, cursor)
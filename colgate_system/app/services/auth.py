@@ -1,29 +1,44 @@
 """
 Servicio de Autenticación y Seguridad
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import threading
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.config import settings
 from app.database import get_db
 from app.models.usuario import Usuario, RolUsuario
 from app.schemas.usuario import TokenData
 
-# Configuración de password hashing - compatible con nuevas versiones de bcrypt
+# Configuración de password hashing - compatible con nuevas versiones de bcrypt.
+# min = max = objetivo: cualquier hash con otro costo se marca para actualizar.
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
 )
 
+# Pool acotado para bcrypt: evita bloquear el event loop y limita la CPU usada por logins
+_hash_executor = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="bcrypt")
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Cache de usuarios autenticados: username (sub del token) -> (expira, Usuario desacoplado)
+_cache_usuarios: dict = {}
+_cache_usuarios_lock = threading.Lock()
+
 
 def verificar_password(password_plano: str, password_hash: str) -> bool:
     """Verifica si el password coincide con el hash"""
@@ -35,6 +50,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verificar_password_async(password_plano: str, password_hash: str) -> bool:
+    """Verifica el password en el pool de hashing sin bloquear el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verificar_password, password_plano, password_hash)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Genera el hash en el pool de hashing sin bloquear el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
+
 def crear_token_acceso(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Crea un token JWT"""
     to_encode = data.copy()
@@ -47,19 +74,60 @@ def crear_token_acceso(data: dict, expires_delta: Optional[timedelta] = None) ->
     return encoded_jwt
 
 
-def autenticar_usuario(db: Session, username: str, password: str) -> Optional[Usuario]:
-    """Autentica un usuario por username y password"""
-    usuario = db.query(Usuario).filter(Usuario.username == username).first()
+async def autenticar_usuario(db: Session, username: str, password: str) -> Optional[Usuario]:
+    """
+    Autentica un usuario por username y password. Si el hash fue generado con
+    un costo distinto a BCRYPT_ROUNDS se reemplaza (se guarda con el commit del login).
+    """
+    usuario = await run_in_threadpool(
+        lambda: db.query(Usuario).filter(Usuario.username == username).first()
+    )
     if not usuario:
         return None
-    if not verificar_password(password, usuario.hashed_password):
+    loop = asyncio.get_running_loop()
+    valido, nuevo_hash = await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, password, usuario.hashed_password
+    )
+    if not valido:
         return None
     if not usuario.activo:
         return None
+    if nuevo_hash:
+        usuario.hashed_password = nuevo_hash
+        invalidar_usuario_cache(usuario.username)
     return usuario
 
 
-async def get_usuario_actual(
+def _copia_desacoplada(usuario: Usuario) -> Usuario:
+    """Copia de las columnas del usuario sin sesión, apta para db.merge(load=False)"""
+    copia = Usuario(**{c.key: getattr(usuario, c.key) for c in Usuario.__table__.columns})
+    make_transient_to_detached(copia)
+    return copia
+
+
+def _usuario_cacheado(db: Session, username: str) -> Optional[Usuario]:
+    """Devuelve el usuario cacheado asociado a la sesión actual, sin consultar la base de datos"""
+    with _cache_usuarios_lock:
+        entrada = _cache_usuarios.get(username)
+        if entrada is None:
+            return None
+        if entrada[0] < time.monotonic():
+            del _cache_usuarios[username]
+            return None
+        usuario = entrada[1]
+    return db.merge(usuario, load=False)
+
+
+def invalidar_usuario_cache(username: Optional[str] = None):
+    """Elimina un usuario del cache (o todos); llamar al modificar datos, rol, estado o password"""
+    with _cache_usuarios_lock:
+        if username is None:
+            _cache_usuarios.clear()
+        else:
+            _cache_usuarios.pop(username, None)
+
+
+def get_usuario_actual(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> Usuario:
@@ -78,9 +146,17 @@ async def get_usuario_actual(
     except JWTError:
         raise credentials_exception
     
-    usuario = db.query(Usuario).filter(Usuario.username == token_data.username).first()
+    usuario = _usuario_cacheado(db, token_data.username)
     if usuario is None:
-        raise credentials_exception
+        usuario = db.query(Usuario).filter(Usuario.username == token_data.username).first()
+        if usuario is None:
+            raise credentials_exception
+        if usuario.activo:
+            with _cache_usuarios_lock:
+                _cache_usuarios[usuario.username] = (
+                    time.monotonic() + settings.AUTH_CACHE_TTL_SEGUNDOS,
+                    _copia_desacoplada(usuario)
+                )
     if not usuario.activo:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -3,8 +3,10 @@ Servicio CRUD de Clientes
 """
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
+from app import busqueda as busqueda_texto, distancias
+from app.autocompletado import indice_clientes
+from app.indice_espacial import indice_clientes_geo
 from app.models.cliente import Cliente, TipoCliente
 from app.schemas.cliente import ClienteCreate, ClienteUpdate
 
@@ -27,14 +29,7 @@ def get_clientes(
     if distrito:
         query = query.filter(Cliente.distrito.ilike(f"%{distrito}%"))
     if busqueda:
-        query = query.filter(
-            or_(
-                Cliente.razon_social.ilike(f"%{busqueda}%"),
-                Cliente.nombre_comercial.ilike(f"%{busqueda}%"),
-                Cliente.codigo.ilike(f"%{busqueda}%"),
-                Cliente.ruc.ilike(f"%{busqueda}%")
-            )
-        )
+        query = busqueda_texto.filtrar(query, Cliente, busqueda)
     
     total = query.count()
     clientes = query.offset(skip).limit(limit).all()
@@ -58,16 +53,23 @@ def crear_cliente(db: Session, cliente: ClienteCreate) -> Cliente:
     db.add(db_cliente)
     db.commit()
     db.refresh(db_cliente)
+    indice_clientes.actualizar(db_cliente)
+    indice_clientes_geo.actualizar(db_cliente)
     return db_cliente
 
 
 def actualizar_cliente(db: Session, cliente_id: int, cliente: ClienteUpdate) -> Optional[Cliente]:
     db_cliente = get_cliente(db, cliente_id)
     if db_cliente:
-        for key, value in cliente.model_dump(exclude_unset=True).items():
+        datos = cliente.model_dump(exclude_unset=True)
+        for key, value in datos.items():
             setattr(db_cliente, key, value)
         db.commit()
         db.refresh(db_cliente)
+        indice_clientes.actualizar(db_cliente)
+        indice_clientes_geo.actualizar(db_cliente)
+        if "latitud" in datos or "longitud" in datos:
+            distancias.actualizar_cliente(db_cliente)
     return db_cliente
 
 
@@ -77,10 +79,38 @@ def eliminar_cliente(db: Session, cliente_id: int) -> bool:
     if db_cliente:
         db_cliente.activo = False
         db.commit()
+        indice_clientes.actualizar(db_cliente)
+        indice_clientes_geo.actualizar(db_cliente)
         return True
     return False
 
 
+def autocompletar_clientes(db: Session, texto: str, limite: int) -> List[dict]:
+    """Clientes activos cuya razón social (o una de sus palabras), nombre comercial, código o RUC empieza con el texto"""
+    return indice_clientes.buscar(db, texto, limite)
+
+
+def get_clientes_cerca(db: Session, latitud: float, longitud: float, radio_km: float, limite: int) -> List[dict]:
+    """Clientes activos a no más de radio_km del punto, ordenados por distancia"""
+    return indice_clientes_geo.cerca(db, latitud, longitud, radio_km, limite)
+
+
+def get_clientes_en_rectangulo(
+    db: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    limite: int,
+    latitud: Optional[float] = None,
+    longitud: Optional[float] = None
+) -> List[dict]:
+    """Clientes activos dentro del rectángulo, ordenados por distancia al punto (o al centro)"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("El rectángulo es inválido: los mínimos superan a los máximos")
+    return indice_clientes_geo.rectangulo(db, min_lat, min_lon, max_lat, max_lon, limite, latitud, longitud)
+
+
 def get_clientes_por_zona(db: Session, distrito: str) -> List[Cliente]:
     """Obtiene clientes de un distrito específico"""
     return db.query(Cliente).filter(
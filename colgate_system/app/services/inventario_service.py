@@ -1,13 +1,16 @@
 """
 Servicio de Inventario y Movimientos
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case
 from datetime import datetime
 
 from app.models.inventario import Inventario, MovimientoInventario, Almacen, TipoMovimiento, TipoAlmacen
-from app.models.producto import Producto
+from app import distancias
+from app.cache import cache_respuestas
+from app.services import alerta_service, producto_service
+from app.paginacion import ModoConteo, Pagina, contar, paginar_por_cursor
 from app.schemas.inventario import (
     InventarioCreate, InventarioUpdate,
     AlmacenCreate, AlmacenUpdate,
@@ -15,6 +18,12 @@ from app.schemas.inventario import (
 )
 
 
+# Registro que se usa de un producto en un almacén: el sin lote (NULL va primero) o
+# el primer lote. Es el orden del índice uq_inventario_producto_almacen_lote, así la
+# búsqueda no recorre todo el inventario del almacén ni necesita ordenar.
+ORDEN_REGISTRO = (Inventario.producto_id, Inventario.almacen_id, Inventario.lote.asc().nulls_first(), Inventario.id)
+
+
 # ============ ALMACÉN ============
 def get_almacenes(db: Session, solo_activos: bool = True) -> List[Almacen]:
     query = db.query(Almacen)
@@ -38,10 +47,13 @@ def crear_almacen(db: Session, almacen: AlmacenCreate) -> Almacen:
 def actualizar_almacen(db: Session, almacen_id: int, almacen: AlmacenUpdate) -> Optional[Almacen]:
     db_almacen = get_almacen(db, almacen_id)
     if db_almacen:
-        for key, value in almacen.model_dump(exclude_unset=True).items():
+        datos = almacen.model_dump(exclude_unset=True)
+        for key, value in datos.items():
             setattr(db_almacen, key, value)
         db.commit()
         db.refresh(db_almacen)
+        if "latitud" in datos or "longitud" in datos:
+            distancias.actualizar_almacen(db_almacen)
     return db_almacen
 
 
@@ -76,7 +88,7 @@ def get_o_crear_inventario(db: Session, producto_id: int, almacen_id: int) -> In
     inventario = db.query(Inventario).filter(
         Inventario.producto_id == producto_id,
         Inventario.almacen_id == almacen_id
-    ).first()
+    ).order_by(*ORDEN_REGISTRO).first()
     
     if not inventario:
         inventario = Inventario(
@@ -93,6 +105,94 @@ def get_o_crear_inventario(db: Session, producto_id: int, almacen_id: int) -> In
     return inventario
 
 
+def registrar_movimientos(
+    db: Session,
+    movimientos: List[MovimientoCreate],
+    usuario_id: Optional[int] = None
+) -> List[MovimientoInventario]:
+    """
+    Aplica varios movimientos dentro de la transacción en curso, sin commit.
+    Cada movimiento es un UPDATE que suma o resta sobre el stock guardado (no
+    sobre el leído antes), y las salidas quedan condicionadas a que el stock
+    alcance: una reserva o un movimiento simultáneo no se pisa ni se pierde.
+    Los movimientos se insertan en un solo flush. Si alguna salida no alcanza
+    lanza ValueError y el llamador debe hacer rollback.
+    """
+    if not movimientos:
+        return []
+
+    inventario_por_clave = {}
+    for inventario_id, producto_id, almacen_id in db.query(
+        Inventario.id, Inventario.producto_id, Inventario.almacen_id
+    ).filter(
+        Inventario.producto_id.in_({m.producto_id for m in movimientos}),
+        Inventario.almacen_id.in_({m.almacen_id for m in movimientos})
+    ).order_by(*ORDEN_REGISTRO):
+        inventario_por_clave.setdefault((producto_id, almacen_id), inventario_id)
+
+    nuevos = {}
+    for mov in movimientos:
+        clave = (mov.producto_id, mov.almacen_id)
+        if clave not in inventario_por_clave and clave not in nuevos:
+            nuevos[clave] = Inventario(
+                producto_id=mov.producto_id,
+                almacen_id=mov.almacen_id,
+                stock_actual=0,
+                stock_reservado=0,
+                stock_disponible=0
+            )
+            db.add(nuevos[clave])
+    if nuevos:
+        db.flush()
+        inventario_por_clave.update({clave: inventario.id for clave, inventario in nuevos.items()})
+
+    registros = [None] * len(movimientos)
+    # Orden fijo por id para que transacciones concurrentes no se bloqueen mutuamente
+    orden = sorted(
+        range(len(movimientos)),
+        key=lambda i: inventario_por_clave[(movimientos[i].producto_id, movimientos[i].almacen_id)]
+    )
+    for i in orden:
+        mov = movimientos[i]
+        inventario_id = inventario_por_clave[(mov.producto_id, mov.almacen_id)]
+        
+        # Determinar si es entrada o salida
+        entrada = mov.tipo.value.startswith('entrada')
+        cambio = mov.cantidad if entrada else -mov.cantidad
+        query = db.query(Inventario).filter(Inventario.id == inventario_id)
+        if not entrada:
+            query = query.filter(Inventario.stock_actual >= mov.cantidad)
+        actualizadas = query.update({
+            Inventario.stock_actual: Inventario.stock_actual + cambio,
+            Inventario.stock_disponible: Inventario.stock_actual + cambio - Inventario.stock_reservado
+        }, synchronize_session=False)
+
+        # La fila queda bloqueada por el UPDATE: el stock leído es el que dejó este movimiento
+        stock_actual = db.query(Inventario.stock_actual).filter(Inventario.id == inventario_id).scalar()
+        if not actualizadas:
+            raise ValueError(f"Stock insuficiente. Disponible: {stock_actual}, Solicitado: {mov.cantidad}")
+
+        registros[i] = MovimientoInventario(
+            almacen_id=mov.almacen_id,
+            producto_id=mov.producto_id,
+            tipo=mov.tipo,
+            cantidad=mov.cantidad,
+            stock_anterior=stock_actual - cambio,
+            stock_posterior=stock_actual,
+            documento_tipo=mov.documento_tipo,
+            documento_id=mov.documento_id,
+            documento_numero=mov.documento_numero,
+            motivo=mov.motivo,
+            usuario_id=usuario_id
+        )
+
+    # Los objetos Inventario ya cargados en la sesión deben releerse
+    db.expire_all()
+    db.add_all(registros)
+    db.flush()
+    return registros
+
+
 def registrar_movimiento(
     db: Session,
     almacen_id: int,
@@ -106,43 +206,34 @@ def registrar_movimiento(
     motivo: Optional[str] = None
 ) -> MovimientoInventario:
     """Registra un movimiento de inventario y actualiza el stock"""
-    
-    # Obtener o crear inventario
-    inventario = get_o_crear_inventario(db, producto_id, almacen_id)
-    stock_anterior = inventario.stock_actual
-    
-    # Determinar si es entrada o salida
-    es_entrada = tipo.value.startswith('entrada')
-    
-    if es_entrada:
-        inventario.stock_actual += cantidad
-    else:
-        if inventario.stock_actual < cantidad:
-            raise ValueError(f"Stock insuficiente. Disponible: {inventario.stock_actual}, Solicitado: {cantidad}")
-        inventario.stock_actual -= cantidad
-    
-    inventario.stock_disponible = inventario.stock_actual - inventario.stock_reservado
-    
-    # Crear movimiento
-    movimiento = MovimientoInventario(
+    movimiento = MovimientoCreate(
         almacen_id=almacen_id,
         producto_id=producto_id,
         tipo=tipo,
         cantidad=cantidad,
-        stock_anterior=stock_anterior,
-        stock_posterior=inventario.stock_actual,
         documento_tipo=documento_tipo,
         documento_id=documento_id,
         documento_numero=documento_numero,
-        motivo=motivo,
-        usuario_id=usuario_id
+        motivo=motivo
     )
-    
-    db.add(movimiento)
+    return _confirmar_movimientos(db, [movimiento], usuario_id)[0]
+
+
+def _confirmar_movimientos(
+    db: Session,
+    movimientos: List[MovimientoCreate],
+    usuario_id: Optional[int]
+) -> List[MovimientoInventario]:
+    """Registra los movimientos y hace commit (o rollback si alguno falla)"""
+    try:
+        registros = registrar_movimientos(db, movimientos, usuario_id)
+    except ValueError:
+        db.rollback()
+        raise
     db.commit()
-    db.refresh(movimiento)
-    
-    return movimiento
+    cache_respuestas.invalidar("inventario")
+    alerta_service.actualizar_alertas(db, {m.producto_id for m in movimientos})
+    return registros
 
 
 def ajustar_inventario(db: Session, ajuste: AjusteInventario, usuario_id: int) -> MovimientoInventario:
@@ -163,53 +254,115 @@ def ajustar_inventario(db: Session, ajuste: AjusteInventario, usuario_id: int) -
 
 
 def transferir_inventario(db: Session, transferencia: TransferenciaInventario, usuario_id: int) -> tuple:
-    """Transfiere inventario entre almacenes"""
-    # Salida del almacén origen
-    mov_salida = registrar_movimiento(
-        db=db,
-        almacen_id=transferencia.almacen_origen_id,
-        producto_id=transferencia.producto_id,
-        tipo=TipoMovimiento.SALIDA_TRANSFERENCIA,
-        cantidad=transferencia.cantidad,
-        usuario_id=usuario_id,
-        documento_tipo="transferencia",
-        motivo=transferencia.motivo
-    )
-    
-    # Entrada al almacén destino
-    mov_entrada = registrar_movimiento(
-        db=db,
-        almacen_id=transferencia.almacen_destino_id,
-        producto_id=transferencia.producto_id,
-        tipo=TipoMovimiento.ENTRADA_TRANSFERENCIA,
-        cantidad=transferencia.cantidad,
-        usuario_id=usuario_id,
-        documento_tipo="transferencia",
-        motivo=transferencia.motivo
-    )
+    """Transfiere inventario entre almacenes (salida y entrada en una sola transacción)"""
+    mov_salida, mov_entrada = _confirmar_movimientos(db, [
+        # Salida del almacén origen
+        MovimientoCreate(
+            almacen_id=transferencia.almacen_origen_id,
+            producto_id=transferencia.producto_id,
+            tipo=TipoMovimiento.SALIDA_TRANSFERENCIA,
+            cantidad=transferencia.cantidad,
+            documento_tipo="transferencia",
+            motivo=transferencia.motivo
+        ),
+        # Entrada al almacén destino
+        MovimientoCreate(
+            almacen_id=transferencia.almacen_destino_id,
+            producto_id=transferencia.producto_id,
+            tipo=TipoMovimiento.ENTRADA_TRANSFERENCIA,
+            cantidad=transferencia.cantidad,
+            documento_tipo="transferencia",
+            motivo=transferencia.motivo
+        )
+    ], usuario_id)
     
     return mov_salida, mov_entrada
 
 
+def _inventario_por_producto(db: Session, almacen_id: int, productos) -> Dict[int, int]:
+    """Id del registro de cada producto en el almacén (el mismo que usa get_o_crear_inventario)"""
+    filas = db.query(Inventario.id, Inventario.producto_id).filter(
+        Inventario.almacen_id == almacen_id,
+        Inventario.producto_id.in_(productos)
+    ).order_by(*ORDEN_REGISTRO).all()
+    inventario_por_producto = {}
+    for inventario_id, producto_id in filas:
+        inventario_por_producto.setdefault(producto_id, inventario_id)
+    return inventario_por_producto
+
+
+def reservar_lineas(db: Session, almacen_id: int, lineas: Dict[int, int]):
+    """
+    Reserva {producto_id: cantidad} en un almacén dentro de la transacción
+    en curso, sin commit. Cada reserva es un UPDATE condicionado a que
+    stock_disponible alcance, de modo que dos reservas simultáneas no pueden
+    dejarlo negativo. Si una línea no alcanza lanza ValueError y el llamador
+    debe hacer rollback para deshacer las anteriores.
+    """
+    inventario_por_producto = _inventario_por_producto(db, almacen_id, lineas)
+
+    # Orden fijo por id para que transacciones concurrentes no se bloqueen mutuamente
+    for producto_id in sorted(lineas, key=lambda p: inventario_por_producto.get(p, 0)):
+        cantidad = lineas[producto_id]
+        inventario_id = inventario_por_producto.get(producto_id)
+        actualizadas = 0
+        if inventario_id is not None:
+            actualizadas = db.query(Inventario).filter(
+                Inventario.id == inventario_id,
+                Inventario.stock_disponible >= cantidad
+            ).update({
+                Inventario.stock_reservado: Inventario.stock_reservado + cantidad,
+                Inventario.stock_disponible: Inventario.stock_disponible - cantidad
+            }, synchronize_session=False)
+
+        if not actualizadas:
+            disponible = db.query(Inventario.stock_disponible).filter(
+                Inventario.id == inventario_id
+            ).scalar() if inventario_id is not None else 0
+            producto = producto_service.get_nombres_productos(db, [producto_id]).get(producto_id)
+            raise ValueError(
+                f"Stock insuficiente para {producto}. Disponible: {disponible or 0}, Requerido: {cantidad}"
+            )
+
+    # Los objetos Inventario ya cargados en la sesión deben releerse
+    db.expire_all()
+
+
 def reservar_stock(db: Session, producto_id: int, almacen_id: int, cantidad: int) -> bool:
     """Reserva stock para un pedido"""
-    inventario = get_o_crear_inventario(db, producto_id, almacen_id)
-    
-    if inventario.stock_disponible < cantidad:
+    try:
+        reservar_lineas(db, almacen_id, {producto_id: cantidad})
+    except ValueError:
+        db.rollback()
         return False
-    
-    inventario.stock_reservado += cantidad
-    inventario.stock_disponible = inventario.stock_actual - inventario.stock_reservado
     db.commit()
+    cache_respuestas.invalidar("inventario")
     return True
 
 
+def liberar_lineas(db: Session, almacen_id: int, lineas: Dict[int, int]):
+    """Libera {producto_id: cantidad} reservado en un almacén dentro de la transacción en curso, sin commit"""
+    inventario_por_producto = _inventario_por_producto(db, almacen_id, lineas)
+    for producto_id, inventario_id in sorted(inventario_por_producto.items(), key=lambda x: x[1]):
+        cantidad = lineas[producto_id]
+        reservado = case(
+            (Inventario.stock_reservado > cantidad, Inventario.stock_reservado - cantidad),
+            else_=0
+        )
+        db.query(Inventario).filter(Inventario.id == inventario_id).update({
+            Inventario.stock_reservado: reservado,
+            Inventario.stock_disponible: Inventario.stock_actual - reservado
+        }, synchronize_session=False)
+
+    # Los objetos Inventario ya cargados en la sesión deben releerse
+    db.expire_all()
+
+
 def liberar_reserva(db: Session, producto_id: int, almacen_id: int, cantidad: int):
     """Libera stock reservado"""
-    inventario = get_o_crear_inventario(db, producto_id, almacen_id)
-    inventario.stock_reservado = max(0, inventario.stock_reservado - cantidad)
-    inventario.stock_disponible = inventario.stock_actual - inventario.stock_reservado
+    liberar_lineas(db, almacen_id, {producto_id: cantidad})
     db.commit()
+    cache_respuestas.invalidar("inventario")
 
 
 def get_movimientos(
@@ -220,8 +373,11 @@ def get_movimientos(
     fecha_desde: Optional[datetime] = None,
     fecha_hasta: Optional[datetime] = None,
     skip: int = 0,
-    limit: int = 100
-) -> List[MovimientoInventario]:
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    conteo: ModoConteo = ModoConteo.NINGUNO
+) -> Pagina:
+    """Lista movimientos; con cursor (vacío para la primera página) pagina por (fecha, id)"""
     query = db.query(MovimientoInventario)
     
     if almacen_id:
@@ -235,7 +391,17 @@ def get_movimientos(
     if fecha_hasta:
         query = query.filter(MovimientoInventario.fecha <= fecha_hasta)
     
-    return query.order_by(MovimientoInventario.fecha.desc()).offset(skip).limit(limit).all()
+    total, total_exacto = contar(query, conteo)
+    if cursor is not None:
+        movimientos, siguiente = paginar_por_cursor(
+            query, MovimientoInventario.fecha, MovimientoInventario.id, cursor, limit
+        )
+        return Pagina(movimientos, total, total_exacto, siguiente)
+
+    movimientos = query.order_by(
+        MovimientoInventario.fecha.desc(), MovimientoInventario.id.desc()
+    ).offset(skip).limit(limit).all()
+    return Pagina(movimientos, total, total_exacto, None)
 
 
 def get_productos_por_vencer(db: Session, dias: int = 90) -> List[Inventario]:
@@ -1,56 +1,58 @@
 """
 Servicio de Logística - Envíos, Rutas y Distribución
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
+from sqlalchemy import case, func, insert, or_
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, date
+import threading
+import time
+
+import numpy as np
 
 from app.models.logistica import (
     Vehiculo, Conductor, ZonaReparto, RutaReparto, Envio, RutaCliente,
     EstadoEnvio, TipoVehiculo
 )
-from app.models.venta import Venta, EstadoVenta
+from app.models.venta import Venta, DetalleVenta, EstadoVenta
+from app.models.cliente import Cliente
+from app.models.producto import Producto
+from app.models.inventario import Almacen
+from app.config import settings
+from app.services import reporte_service, numeracion_service
+from app.cache import cache_respuestas
+from app.paginacion import ModoConteo, Pagina, contar, paginar_por_cursor
+from app import distancias, fechas, ruteo
+from app.busqueda import terminos
 from app.schemas.logistica import (
     VehiculoCreate, VehiculoUpdate,
     ConductorCreate, ConductorUpdate,
     ZonaRepartoCreate, ZonaRepartoUpdate,
     RutaRepartoCreate, RutaRepartoUpdate,
-    EnvioCreate, EnvioUpdate
+    EnvioCreate, EnvioUpdate, EnvioLoteRequest,
+    RutaOptimizarRequest
 )
 
+# Intentos de crear_envios_lote cuando otra solicitud crea envíos de las mismas ventas
+REINTENTOS_ENVIOS_LOTE = 3
+
+# Zonas en memoria: (expira, version, distrito normalizado -> zona_id)
+_zonas: Optional[tuple] = None
+_zonas_lock = threading.Lock()
+_zonas_version = 0
+
 
 def generar_codigo_envio(db: Session) -> str:
     """Genera código único de envío"""
-    hoy = datetime.utcnow()
-    prefijo = f"ENV{hoy.strftime('%Y%m%d')}"
-    
-    ultimo = db.query(Envio).filter(
-        Envio.codigo.like(f"{prefijo}%")
-    ).order_by(Envio.codigo.desc()).first()
-    
-    if ultimo:
-        num = int(ultimo.codigo[-4:]) + 1
-    else:
-        num = 1
-    
-    return f"{prefijo}{num:04d}"
+    prefijo = f"ENV{datetime.utcnow().strftime('%Y%m%d')}"
+    return numeracion_service.generar_codigos(Envio.codigo, prefijo, 4)[0]
 
 
 def generar_codigo_ruta(db: Session) -> str:
     """Genera código único de ruta"""
-    hoy = datetime.utcnow()
-    prefijo = f"RUT{hoy.strftime('%Y%m%d')}"
-    
-    ultima = db.query(RutaReparto).filter(
-        RutaReparto.codigo.like(f"{prefijo}%")
-    ).order_by(RutaReparto.codigo.desc()).first()
-    
-    if ultima:
-        num = int(ultima.codigo[-3:]) + 1
-    else:
-        num = 1
-    
-    return f"{prefijo}{num:03d}"
+    prefijo = f"RUT{datetime.utcnow().strftime('%Y%m%d')}"
+    return numeracion_service.generar_codigos(RutaReparto.codigo, prefijo, 3)[0]
 
 
 # ============ VEHÍCULOS ============
@@ -71,6 +73,7 @@ def crear_vehiculo(db: Session, vehiculo: VehiculoCreate) -> Vehiculo:
     db_vehiculo = Vehiculo(**vehiculo.model_dump())
     db.add(db_vehiculo)
     db.commit()
+    cache_respuestas.invalidar("logistica")
     db.refresh(db_vehiculo)
     return db_vehiculo
 
@@ -81,6 +84,7 @@ def actualizar_vehiculo(db: Session, vehiculo_id: int, vehiculo: VehiculoUpdate)
         for key, value in vehiculo.model_dump(exclude_unset=True).items():
             setattr(db_vehiculo, key, value)
         db.commit()
+        cache_respuestas.invalidar("logistica")
         db.refresh(db_vehiculo)
     return db_vehiculo
 
@@ -103,6 +107,7 @@ def crear_conductor(db: Session, conductor: ConductorCreate) -> Conductor:
     db_conductor = Conductor(**conductor.model_dump())
     db.add(db_conductor)
     db.commit()
+    cache_respuestas.invalidar("logistica")
     db.refresh(db_conductor)
     return db_conductor
 
@@ -113,6 +118,7 @@ def actualizar_conductor(db: Session, conductor_id: int, conductor: ConductorUpd
         for key, value in conductor.model_dump(exclude_unset=True).items():
             setattr(db_conductor, key, value)
         db.commit()
+        cache_respuestas.invalidar("logistica")
         db.refresh(db_conductor)
     return db_conductor
 
@@ -133,10 +139,71 @@ def crear_zona(db: Session, zona: ZonaRepartoCreate) -> ZonaReparto:
     db_zona = ZonaReparto(**zona.model_dump())
     db.add(db_zona)
     db.commit()
+    invalidar_zonas()
     db.refresh(db_zona)
     return db_zona
 
 
+def actualizar_zona(db: Session, zona_id: int, zona: ZonaRepartoUpdate) -> Optional[ZonaReparto]:
+    db_zona = get_zona(db, zona_id)
+    if db_zona:
+        for key, value in zona.model_dump(exclude_unset=True).items():
+            setattr(db_zona, key, value)
+        db.commit()
+        invalidar_zonas()
+        db.refresh(db_zona)
+    return db_zona
+
+
+def _normalizar_distrito(distrito: Optional[str]) -> str:
+    """Minúsculas, sin tildes ni espacios extra ("San  Martín de Porres" -> "san martin de porres")"""
+    return " ".join(terminos(distrito)) if distrito else ""
+
+
+def invalidar_zonas():
+    """Descarta el mapa de distritos cacheado; se recarga en la próxima consulta"""
+    global _zonas, _zonas_version
+    with _zonas_lock:
+        _zonas_version += 1
+        _zonas = None
+
+
+def _get_mapa_zonas(db: Session) -> Dict[str, int]:
+    """
+    Distrito normalizado -> zona activa, a partir de ZonaReparto.distritos
+    (separados por coma). Si un distrito figura en varias zonas gana la de
+    menor id. El vencimiento (ZONAS_TTL_SEGUNDOS) cubre cambios de otros procesos.
+    """
+    global _zonas
+    with _zonas_lock:
+        zonas = _zonas
+        version = _zonas_version
+    if zonas is not None and zonas[0] > time.monotonic():
+        return zonas[2]
+
+    por_distrito = {}
+    filas = db.query(ZonaReparto.id, ZonaReparto.distritos).filter(
+        ZonaReparto.activo == True
+    ).order_by(ZonaReparto.id)
+    for zona_id, distritos in filas:
+        for distrito in (distritos or "").split(","):
+            clave = _normalizar_distrito(distrito)
+            if clave:
+                por_distrito.setdefault(clave, zona_id)
+
+    zonas = (time.monotonic() + settings.ZONAS_TTL_SEGUNDOS, version, por_distrito)
+    with _zonas_lock:
+        # Si hubo una invalidación mientras se cargaba, no se guarda
+        if version == _zonas_version:
+            _zonas = zonas
+    return por_distrito
+
+
+def resolver_zona(db: Session, distrito: Optional[str]) -> Optional[int]:
+    """Zona de reparto que cubre el distrito (ignora mayúsculas, tildes y espacios)"""
+    return _get_mapa_zonas(db).get(_normalizar_distrito(distrito))
+
+
 # ============ ENVÍOS ============
 def get_envios(
     db: Session,
@@ -145,20 +212,36 @@ def get_envios(
     vehiculo_id: Optional[int] = None,
     conductor_id: Optional[int] = None,
     skip: int = 0,
-    limit: int = 100
-) -> List[Envio]:
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    conteo: ModoConteo = ModoConteo.NINGUNO
+) -> Pagina:
+    """
+    Lista envíos por fecha programada. Con cursor (vacío para la primera
+    página) pagina por (fecha_programada, id), dejando al final los envíos
+    sin fecha.
+    """
     query = db.query(Envio)
     
     if estado:
         query = query.filter(Envio.estado == estado)
     if fecha:
-        query = query.filter(func.date(Envio.fecha_programada) == fecha)
+        query = query.filter(fechas.en_rango(Envio.fecha_programada, fechas.rango_dia_local(fecha)))
     if vehiculo_id:
         query = query.filter(Envio.vehiculo_id == vehiculo_id)
     if conductor_id:
         query = query.filter(Envio.conductor_id == conductor_id)
     
-    return query.order_by(Envio.fecha_programada).offset(skip).limit(limit).all()
+    total, total_exacto = contar(query, conteo)
+    if cursor is not None:
+        envios, siguiente = paginar_por_cursor(
+            query, Envio.fecha_programada, Envio.id, cursor, limit,
+            descendente=False, nulos_al_final=True
+        )
+        return Pagina(envios, total, total_exacto, siguiente)
+
+    envios = query.order_by(Envio.fecha_programada).offset(skip).limit(limit).all()
+    return Pagina(envios, total, total_exacto, None)
 
 
 def get_envio(db: Session, envio_id: int) -> Optional[Envio]:
@@ -174,19 +257,106 @@ def crear_envio_para_venta(db: Session, venta_id: int, fecha_programada: Optiona
     if venta.estado not in [EstadoVenta.LISTO_ENVIO, EstadoVenta.CONFIRMADO]:
         raise ValueError(f"La venta no está lista para envío. Estado: {venta.estado}")
     
+    if db.query(Envio.id).filter(Envio.venta_id == venta_id).first():
+        raise ValueError("La venta ya tiene un envío")
+
+    distrito = db.query(Cliente.distrito).filter(Cliente.id == venta.cliente_id).scalar()
     codigo = generar_codigo_envio(db)
     envio = Envio(
         codigo=codigo,
         venta_id=venta_id,
+        zona_id=resolver_zona(db, distrito),
         fecha_programada=fecha_programada or venta.fecha_entrega_solicitada,
         estado=EstadoEnvio.PENDIENTE
     )
     db.add(envio)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Otra solicitud creó el envío de la venta al mismo tiempo
+        db.rollback()
+        raise ValueError("La venta ya tiene un envío")
+    cache_respuestas.invalidar("logistica")
     db.refresh(envio)
     return envio
 
 
+def _ventas_sin_envio(db: Session, solicitud: EnvioLoteRequest) -> List[Tuple[int, Optional[datetime], Optional[int]]]:
+    """(venta_id, entrega solicitada, zona_id) de las ventas listas para envío sin envío"""
+    query = db.query(
+        Venta.id, Venta.fecha_entrega_solicitada, Cliente.distrito
+    ).join(
+        Cliente, Cliente.id == Venta.cliente_id
+    ).outerjoin(
+        Envio, Envio.venta_id == Venta.id
+    ).filter(
+        Venta.estado == EstadoVenta.LISTO_ENVIO,
+        Envio.id.is_(None)
+    )
+    if solicitud.fecha:
+        query = query.filter(
+            fechas.en_rango(Venta.fecha_entrega_solicitada, fechas.rango_dia_local(solicitud.fecha))
+        )
+
+    ventas = []
+    for venta_id, entrega_solicitada, distrito in query.order_by(Venta.id):
+        zona_id = resolver_zona(db, distrito)
+        if solicitud.zona_id is None or zona_id == solicitud.zona_id:
+            ventas.append((venta_id, entrega_solicitada, zona_id))
+    return ventas
+
+
+def crear_envios_lote(db: Session, solicitud: EnvioLoteRequest) -> dict:
+    """
+    Crea en una sola transacción los envíos de todas las ventas listas para
+    envío que todavía no tienen uno (opcionalmente de una zona o con entrega
+    solicitada en un día). Las ventas se leen en una consulta, los códigos se
+    reservan en un bloque contiguo y los envíos se insertan en bloque.
+
+    Una venta admite un solo envío (índice único en envios.venta_id): si otra
+    solicitud simultánea creó envíos para alguna de las ventas, la inserción
+    falla completa y se vuelve a leer qué ventas siguen sin envío.
+    """
+    for _ in range(REINTENTOS_ENVIOS_LOTE):
+        ventas = _ventas_sin_envio(db, solicitud)
+        if not ventas:
+            return {"creados": 0, "codigo_desde": None, "codigo_hasta": None, "por_zona": []}
+
+        prefijo = f"ENV{datetime.utcnow().strftime('%Y%m%d')}"
+        codigos = numeracion_service.generar_codigos(Envio.codigo, prefijo, 4, len(ventas))
+        try:
+            db.execute(insert(Envio), [
+                {
+                    "codigo": codigo,
+                    "venta_id": venta_id,
+                    "zona_id": zona_id,
+                    "fecha_programada": solicitud.fecha_programada or entrega_solicitada,
+                    "estado": EstadoEnvio.PENDIENTE
+                }
+                for (venta_id, entrega_solicitada, zona_id), codigo in zip(ventas, codigos)
+            ])
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+    else:
+        raise ValueError("Otras solicitudes están creando envíos para las mismas ventas; intente nuevamente")
+    cache_respuestas.invalidar("logistica")
+
+    por_zona: Dict[Optional[int], int] = {}
+    for _, _, zona_id in ventas:
+        por_zona[zona_id] = por_zona.get(zona_id, 0) + 1
+    return {
+        "creados": len(ventas),
+        "codigo_desde": codigos[0],
+        "codigo_hasta": codigos[-1],
+        "por_zona": [
+            {"zona_id": zona_id, "envios": cantidad}
+            for zona_id, cantidad in sorted(por_zona.items(), key=lambda z: (z[0] is None, z[0] or 0))
+        ]
+    }
+
+
 def asignar_envio(
     db: Session,
     envio_id: int,
@@ -205,6 +375,7 @@ def asignar_envio(
     envio.estado = EstadoEnvio.ASIGNADO
     
     db.commit()
+    cache_respuestas.invalidar("logistica")
     db.refresh(envio)
     return envio
 
@@ -213,11 +384,20 @@ def iniciar_envio(db: Session, envio_id: int) -> Envio:
     """Marca el envío como en ruta"""
     envio = get_envio(db, envio_id)
     if envio and envio.estado == EstadoEnvio.ASIGNADO:
-        envio.estado = EstadoEnvio.EN_RUTA
+        # Cambio de estado condicional: un inicio simultáneo del mismo envío no pasa
+        iniciados = db.query(Envio).filter(
+            Envio.id == envio_id,
+            Envio.estado == EstadoEnvio.ASIGNADO
+        ).update({Envio.estado: EstadoEnvio.EN_RUTA}, synchronize_session=False)
+        if not iniciados:
+            db.rollback()
+            db.refresh(envio)
+            return envio
         # Actualizar venta
         if envio.venta:
-            envio.venta.estado = EstadoVenta.EN_RUTA
+            reporte_service.cambiar_estado_venta(db, envio.venta, EstadoVenta.EN_RUTA)
         db.commit()
+        cache_respuestas.invalidar("logistica", "ventas")
         db.refresh(envio)
     return envio
 
@@ -237,26 +417,40 @@ def completar_envio(
     if not envio:
         raise ValueError("Envío no encontrado")
     
-    envio.estado = EstadoEnvio.ENTREGADO
-    envio.fecha_entrega = datetime.utcnow()
-    envio.nombre_recibio = nombre_recibio
-    envio.dni_recibio = dni_recibio
-    envio.firma_recibido = firma
-    envio.latitud_entrega = latitud
-    envio.longitud_entrega = longitud
+    # Cambio de estado condicional: completar dos veces el mismo envío no cuenta dos entregas
+    datos = {
+        Envio.estado: EstadoEnvio.ENTREGADO,
+        Envio.fecha_entrega: datetime.utcnow(),
+        Envio.nombre_recibio: nombre_recibio,
+        Envio.dni_recibio: dni_recibio,
+        Envio.firma_recibido: firma,
+        Envio.latitud_entrega: latitud,
+        Envio.longitud_entrega: longitud
+    }
     if observaciones:
-        envio.observaciones = observaciones
+        datos[Envio.observaciones] = observaciones
+    completados = db.query(Envio).filter(
+        Envio.id == envio_id,
+        Envio.estado != EstadoEnvio.ENTREGADO
+    ).update(datos, synchronize_session=False)
+    if not completados:
+        db.rollback()
+        raise ValueError("El envío ya fue entregado")
     
     # Actualizar venta
     if envio.venta:
-        envio.venta.estado = EstadoVenta.ENTREGADO
-        envio.venta.fecha_entrega_real = datetime.utcnow()
+        reporte_service.cambiar_estado_venta(
+            db, envio.venta, EstadoVenta.ENTREGADO, fecha_entrega_real=datetime.utcnow()
+        )
     
     # Actualizar ruta si existe
-    if envio.ruta:
-        envio.ruta.entregas_exitosas += 1
+    if envio.ruta_id:
+        db.query(RutaReparto).filter(RutaReparto.id == envio.ruta_id).update(
+            {RutaReparto.entregas_exitosas: RutaReparto.entregas_exitosas + 1}, synchronize_session=False
+        )
     
     db.commit()
+    cache_respuestas.invalidar("logistica", "ventas")
     db.refresh(envio)
     return envio
 
@@ -280,6 +474,7 @@ def marcar_no_entregado(
         envio.ruta.entregas_fallidas += 1
     
     db.commit()
+    cache_respuestas.invalidar("logistica")
     db.refresh(envio)
     return envio
 
@@ -322,6 +517,7 @@ def crear_ruta(db: Session, ruta: RutaRepartoCreate) -> RutaReparto:
             conductor.disponible = False
     
     db.commit()
+    cache_respuestas.invalidar("logistica")
     db.refresh(db_ruta)
     return db_ruta
 
@@ -341,28 +537,270 @@ def completar_ruta(db: Session, ruta_id: int, kilometros: float = 0) -> RutaRepa
             ruta.conductor.disponible = True
         
         db.commit()
+        cache_respuestas.invalidar("logistica")
         db.refresh(ruta)
     return ruta
 
 
+# ============ OPTIMIZACIÓN DE RUTAS ============
+def _paradas_pendientes(
+    db: Session, fecha: date, zona_id: Optional[int] = None
+) -> Tuple[List[ruteo.Parada], List[int], Dict[int, int]]:
+    """
+    Envíos pendientes sin ruta del día (o sin fecha programada) con la
+    ubicación del cliente y la carga de la venta, en una sola consulta.
+    Devuelve también el cliente de cada parada (envio_id -> cliente_id).
+    """
+    peso = func.coalesce(func.sum(DetalleVenta.cantidad * func.coalesce(Producto.peso, 0)), 0)
+    volumen = func.coalesce(func.sum(DetalleVenta.cantidad * func.coalesce(Producto.volumen, 0)), 0)
+    filas = db.query(
+        Envio.id, Cliente.id, Cliente.latitud, Cliente.longitud, peso, volumen
+    ).join(
+        Venta, Venta.id == Envio.venta_id
+    ).join(
+        Cliente, Cliente.id == Venta.cliente_id
+    ).outerjoin(
+        DetalleVenta, DetalleVenta.venta_id == Venta.id
+    ).outerjoin(
+        Producto, Producto.id == DetalleVenta.producto_id
+    ).filter(
+        Envio.estado == EstadoEnvio.PENDIENTE,
+        Envio.ruta_id.is_(None),
+        or_(
+            fechas.en_rango(Envio.fecha_programada, fechas.rango_dia_local(fecha)),
+            Envio.fecha_programada.is_(None)
+        )
+    )
+    if zona_id is not None:
+        filas = filas.filter(Envio.zona_id == zona_id)
+    filas = filas.group_by(Envio.id, Cliente.id, Cliente.latitud, Cliente.longitud).order_by(Envio.id)
+
+    paradas, sin_coordenadas, cliente_de = [], [], {}
+    for envio_id, cliente_id, latitud, longitud, peso_envio, volumen_envio in filas:
+        if latitud is None or longitud is None:
+            sin_coordenadas.append(envio_id)
+        else:
+            paradas.append(ruteo.Parada(envio_id, latitud, longitud, float(peso_envio), float(volumen_envio)))
+            cliente_de[envio_id] = cliente_id
+    return paradas, sin_coordenadas, cliente_de
+
+
+def _filas_matriz(
+    db: Session, almacen: Almacen, paradas: List[ruteo.Parada], cliente_de: Dict[int, int]
+) -> Optional[Tuple[distancias.MatrizDistancias, Dict[Optional[int], int]]]:
+    """
+    Matriz de distancias (de la caché en disco) entre el almacén y los
+    clientes de las paradas, con la fila de cada envío (None = almacén).
+    None si hay demasiadas paradas o alguna ubicación no está en la matriz
+    (almacén sin coordenadas, cliente inactivo): se usa el plano aproximado.
+    """
+    if not paradas or len(paradas) > settings.DISTANCIAS_MAX_PARADAS:
+        return None
+    matriz = distancias.matriz_distancias(db, set(cliente_de.values()))
+    fila = {clave: i for i, clave in enumerate(matriz.claves)}
+    claves = {None: distancias.clave_almacen(almacen.id)}
+    claves.update({p.id: distancias.clave_cliente(cliente_de[p.id]) for p in paradas})
+    if any(clave not in fila for clave in claves.values()):
+        return None
+    return matriz, {envio_id: fila[clave] for envio_id, clave in claves.items()}
+
+
+def _submatriz(
+    filas_matriz: Optional[Tuple[distancias.MatrizDistancias, Dict[Optional[int], int]]],
+    paradas: List[ruteo.Parada]
+) -> Optional[List[List[float]]]:
+    """Distancias entre el almacén (nodo 0) y las paradas en el orden dado, como espera ruteo"""
+    if filas_matriz is None:
+        return None
+    matriz, filas = filas_matriz
+    nodos = [filas[None]] + [filas[p.id] for p in paradas]
+    return matriz.distancias[np.ix_(nodos, nodos)].astype(np.float64).tolist()
+
+
+def _cabe_en_vehiculo(vehiculo: Vehiculo, peso: float, volumen: float) -> bool:
+    return (
+        (vehiculo.capacidad_peso is None or peso <= vehiculo.capacidad_peso)
+        and (vehiculo.capacidad_volumen is None or volumen <= vehiculo.capacidad_volumen)
+    )
+
+
+def optimizar_rutas(db: Session, solicitud: RutaOptimizarRequest) -> dict:
+    """
+    Arma las rutas del día con los envíos pendientes y los vehículos y
+    conductores disponibles: agrupa por capacidad, ordena las entregas de
+    cada ruta y asigna a cada ruta el vehículo libre más chico donde entra.
+    Con guardar=True crea las rutas y escribe ruta, vehículo, conductor y
+    orden_entrega en los envíos.
+    """
+    fecha = solicitud.fecha or fechas.hoy()
+    almacen = db.query(Almacen).filter(Almacen.id == solicitud.almacen_id).first()
+    if not almacen:
+        raise ValueError("Almacén no encontrado")
+    if almacen.latitud is not None and almacen.longitud is not None:
+        origen = (almacen.latitud, almacen.longitud)
+    else:
+        origen = (settings.DEPOSITO_LATITUD, settings.DEPOSITO_LONGITUD)
+
+    query_vehiculos = db.query(Vehiculo).filter(Vehiculo.activo == True, Vehiculo.disponible == True)
+    if solicitud.vehiculo_ids is not None:
+        query_vehiculos = query_vehiculos.filter(Vehiculo.id.in_(solicitud.vehiculo_ids))
+    query_conductores = db.query(Conductor).filter(Conductor.activo == True, Conductor.disponible == True)
+    if solicitud.conductor_ids is not None:
+        query_conductores = query_conductores.filter(Conductor.id.in_(solicitud.conductor_ids))
+    sin_limite = float("inf")
+    vehiculos = sorted(
+        query_vehiculos.all(),
+        key=lambda v: (-(v.capacidad_peso or sin_limite), -(v.capacidad_volumen or sin_limite), v.id)
+    )
+    # Los vehículos más grandes primero: si faltan conductores quedan sin usar los chicos
+    flota = list(zip(vehiculos, query_conductores.order_by(Conductor.id).all()))
+    if not flota:
+        raise ValueError("No hay vehículos y conductores disponibles")
+
+    paradas, sin_coordenadas, cliente_de = _paradas_pendientes(db, fecha, solicitud.zona_id)
+    filas_matriz = _filas_matriz(db, almacen, paradas, cliente_de)
+
+    # Las rutas se arman con la capacidad del vehículo más grande de la flota
+    capacidad = ruteo.Capacidad(
+        peso=None if any(v.capacidad_peso is None for v, _ in flota) else max(v.capacidad_peso for v, _ in flota),
+        volumen=None if any(v.capacidad_volumen is None for v, _ in flota) else max(v.capacidad_volumen for v, _ in flota),
+        paradas=solicitud.max_paradas
+    )
+    rutas = ruteo.optimizar(origen, paradas, capacidad, distancias=_submatriz(filas_matriz, paradas))
+
+    libres = list(flota)
+    asignadas, sin_asignar = [], []
+    for ruta in sorted(rutas, key=lambda r: -sum(p.peso for p in r)):
+        peso = sum(p.peso for p in ruta)
+        volumen = sum(p.volumen for p in ruta)
+        opciones = [f for f in libres if _cabe_en_vehiculo(f[0], peso, volumen)]
+        if not opciones:
+            sin_asignar.extend(p.id for p in ruta)
+            continue
+        elegido = min(opciones, key=lambda f: (f[0].capacidad_peso or sin_limite, f[0].capacidad_volumen or sin_limite))
+        libres.remove(elegido)
+        asignadas.append((ruta, elegido[0], elegido[1], peso, volumen))
+
+    resultado = [
+        {
+            "ruta_id": None,
+            "codigo": None,
+            "vehiculo_id": vehiculo.id,
+            "conductor_id": conductor.id,
+            "envio_ids": [p.id for p in ruta],
+            "distancia_km": round(ruteo.longitud_km(origen, ruta, _submatriz(filas_matriz, ruta)), 2),
+            "peso": round(peso, 3),
+            "volumen": round(volumen, 3)
+        }
+        for ruta, vehiculo, conductor, peso, volumen in asignadas
+    ]
+
+    if solicitud.guardar and asignadas:
+        prefijo = f"RUT{datetime.utcnow().strftime('%Y%m%d')}"
+        codigos = numeracion_service.generar_codigos(RutaReparto.codigo, prefijo, 3, len(asignadas))
+        envios = {
+            e.id: e for e in db.query(Envio).filter(
+                Envio.id.in_([p.id for ruta, *_ in asignadas for p in ruta])
+            )
+        }
+        db_rutas = []
+        for (ruta, vehiculo, conductor, _, _), codigo in zip(asignadas, codigos):
+            db_ruta = RutaReparto(
+                codigo=codigo,
+                nombre=f"Ruta {vehiculo.codigo} {fecha.strftime('%d/%m/%Y')}",
+                fecha=fechas.inicio_dia_local(fecha),
+                zona_id=solicitud.zona_id,
+                vehiculo_id=vehiculo.id,
+                conductor_id=conductor.id,
+                total_entregas=len(ruta)
+            )
+            db.add(db_ruta)
+            db_rutas.append(db_ruta)
+            for orden, parada in enumerate(ruta, 1):
+                envio = envios[parada.id]
+                envio.ruta = db_ruta
+                envio.orden_entrega = orden
+                envio.vehiculo_id = vehiculo.id
+                envio.conductor_id = conductor.id
+                envio.estado = EstadoEnvio.ASIGNADO
+            vehiculo.disponible = False
+            conductor.disponible = False
+        db.commit()
+        cache_respuestas.invalidar("logistica")
+        for datos, db_ruta in zip(resultado, db_rutas):
+            datos["ruta_id"] = db_ruta.id
+            datos["codigo"] = db_ruta.codigo
+
+    return {
+        "fecha": fecha,
+        "guardado": bool(solicitud.guardar and asignadas),
+        "distancia_total_km": round(sum(r["distancia_km"] for r in resultado), 2),
+        "rutas": resultado,
+        "sin_asignar": sin_asignar,
+        "sin_coordenadas": sin_coordenadas
+    }
+
+
+def get_envios_por_zona(db: Session, fecha: date) -> List[dict]:
+    """
+    Vista de planificación: envíos del día agrupados por zona y estado, en
+    una sola consulta. Para hoy o días futuros incluye también los envíos
+    pendientes sin fecha programada, que pueden salir ese día.
+    """
+    def contar_estados(*estados):
+        return func.coalesce(func.sum(case((Envio.estado.in_(estados), 1), else_=0)), 0)
+
+    del_dia = fechas.en_rango(Envio.fecha_programada, fechas.rango_dia_local(fecha))
+    if fecha >= fechas.hoy():
+        del_dia = or_(del_dia, (Envio.fecha_programada.is_(None)) & (Envio.estado == EstadoEnvio.PENDIENTE))
+
+    filas = db.query(
+        Envio.zona_id, ZonaReparto.codigo, ZonaReparto.nombre,
+        func.count(Envio.id),
+        contar_estados(EstadoEnvio.PENDIENTE),
+        contar_estados(EstadoEnvio.ASIGNADO, EstadoEnvio.EN_CARGA, EstadoEnvio.EN_RUTA),
+        contar_estados(EstadoEnvio.ENTREGADO, EstadoEnvio.ENTREGA_PARCIAL),
+        contar_estados(EstadoEnvio.NO_ENTREGADO, EstadoEnvio.REPROGRAMADO),
+        func.coalesce(func.sum(Venta.total), 0)
+    ).join(
+        Venta, Venta.id == Envio.venta_id
+    ).outerjoin(
+        ZonaReparto, ZonaReparto.id == Envio.zona_id
+    ).filter(del_dia).group_by(
+        Envio.zona_id, ZonaReparto.codigo, ZonaReparto.nombre
+    ).order_by(ZonaReparto.nombre.is_(None), ZonaReparto.nombre)
+
+    return [
+        {
+            "zona_id": zona_id,
+            "codigo": codigo,
+            "nombre": nombre,
+            "envios": envios,
+            "pendientes": int(pendientes),
+            "en_proceso": int(en_proceso),
+            "entregados": int(entregados),
+            "no_entregados": int(no_entregados),
+            "monto_total": round(float(monto), 2)
+        }
+        for zona_id, codigo, nombre, envios, pendientes, en_proceso, entregados, no_entregados, monto in filas
+    ]
+
+
 def get_envios_pendientes_hoy(db: Session) -> List[Envio]:
     """Obtiene envíos pendientes para hoy"""
-    hoy = date.today()
     return db.query(Envio).filter(
         Envio.estado.in_([EstadoEnvio.PENDIENTE, EstadoEnvio.ASIGNADO]),
-        func.date(Envio.fecha_programada) == hoy
+        fechas.en_rango(Envio.fecha_programada, fechas.rango_dia_local(fechas.hoy()))
     ).all()
 
 
 def get_dashboard_logistica(db: Session) -> dict:
     """Dashboard de logística"""
-    from sqlalchemy import func
-    
-    hoy = date.today()
+    hoy = fechas.hoy()
     
     # Envíos de hoy
     envios_hoy = db.query(Envio).filter(
-        func.date(Envio.fecha_programada) == hoy
+        fechas.en_rango(Envio.fecha_programada, fechas.rango_dia_local(hoy))
     ).all()
     
     # Vehículos disponibles
@@ -393,6 +831,3 @@ def get_dashboard_logistica(db: Session) -> dict:
         }
     }
 
-
-# Importación necesaria para func
-from sqlalchemy import func
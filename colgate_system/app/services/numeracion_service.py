@@ -0,0 +1,89 @@
+"""
+Servicio de Numeración - Códigos de documentos con contadores atómicos
+"""
+from typing import Dict, List, Tuple
+import threading
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.contador import ContadorDocumento
+
+# Bloques pre-asignados a este proceso: (tipo, prefijo) -> [siguiente, último]
+_bloques: Dict[Tuple[str, str], List[int]] = {}
+_bloques_lock = threading.Lock()
+
+
+def _ultimo_existente(db: Session, columna, prefijo: str, digitos: int) -> int:
+    """Mayor número ya usado con el prefijo (inicializa el contador en bases con datos previos)"""
+    ultimo = db.query(columna).filter(
+        columna.like(f"{prefijo}%")
+    ).order_by(columna.desc()).first()
+    return int(ultimo[0][-digitos:]) if ultimo else 0
+
+
+def _asignar_en_base(columna, prefijo: str, digitos: int, cantidad: int) -> int:
+    """
+    Incrementa el contador en `cantidad` con un UPDATE atómico en una
+    transacción propia y devuelve el primer número del bloque obtenido.
+    """
+    tipo = columna.class_.__tablename__
+    db = SessionLocal()
+    try:
+        for _ in range(3):
+            contador = db.query(ContadorDocumento).filter(
+                ContadorDocumento.tipo == tipo,
+                ContadorDocumento.prefijo == prefijo
+            )
+            if contador.update(
+                {ContadorDocumento.ultimo: ContadorDocumento.ultimo + cantidad},
+                synchronize_session=False
+            ):
+                # La fila queda bloqueada por el UPDATE hasta el commit
+                ultimo = contador.with_entities(ContadorDocumento.ultimo).scalar()
+                db.commit()
+                return ultimo - cantidad + 1
+
+            try:
+                db.add(ContadorDocumento(
+                    tipo=tipo,
+                    prefijo=prefijo,
+                    ultimo=_ultimo_existente(db, columna, prefijo, digitos)
+                ))
+                db.commit()
+            except IntegrityError:
+                # Otro proceso creó el contador al mismo tiempo: se reintenta el UPDATE
+                db.rollback()
+        raise RuntimeError(f"No se pudo asignar numeración para {tipo} {prefijo}")
+    finally:
+        db.close()
+
+
+def generar_codigos(columna, prefijo: str, digitos: int, cantidad: int = 1) -> List[str]:
+    """
+    Devuelve `cantidad` códigos consecutivos `prefijo + número` para la
+    columna indicada (ej. Venta.numero). Los números salen del bloque que el
+    proceso ya tiene reservado o, si no alcanza, de un nuevo bloque de al
+    menos NUMERACION_BLOQUE números. Los códigos son únicos entre procesos;
+    los números no usados de un bloque se pierden al reiniciar.
+    """
+    clave = (columna.class_.__tablename__, prefijo)
+    with _bloques_lock:
+        bloque = _bloques.get(clave)
+        if bloque and bloque[1] - bloque[0] + 1 >= cantidad:
+            primero = bloque[0]
+            bloque[0] += cantidad
+            return [f"{prefijo}{primero + i:0{digitos}d}" for i in range(cantidad)]
+
+    tamano = max(cantidad, settings.NUMERACION_BLOQUE)
+    primero = _asignar_en_base(columna, prefijo, digitos, tamano)
+
+    if tamano > cantidad:
+        with _bloques_lock:
+            # Los bloques de periodos anteriores ya no se usarán
+            for otra in [c for c in _bloques if c[0] == clave[0] and c[1] != prefijo]:
+                del _bloques[otra]
+            _bloques[clave] = [primero + cantidad, primero + tamano - 1]
+    return [f"{prefijo}{primero + i:0{digitos}d}" for i in range(cantidad)]
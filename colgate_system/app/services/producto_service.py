@@ -1,9 +1,15 @@
 """
 Servicio CRUD de Productos, Categorías y Marcas
 """
-from typing import List, Optional
+from typing import Dict, Iterable, List, NamedTuple, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+import threading
+import time
+
+from app.config import settings
+from app import busqueda as busqueda_texto
+from app.autocompletado import indice_productos
+from app.services import alerta_service
 
 from app.models.producto import Producto, UnidadMedida
 from app.models.categoria import Categoria, Marca
@@ -14,6 +20,25 @@ from app.schemas.producto import (
 )
 
 
+class ProductoCatalogo(NamedTuple):
+    """Datos de un producto que se consultan en cada venta o reporte"""
+    id: int
+    codigo: str
+    codigo_barras: Optional[str]
+    nombre: str
+    precio_venta: float
+    precio_mayorista: float
+    stock_minimo: int
+    stock_maximo: int
+    activo: bool
+
+
+# Catálogo en memoria: (expira, version, por_id, por_codigo, por_barras)
+_catalogo: Optional[tuple] = None
+_catalogo_lock = threading.Lock()
+_catalogo_version = 0
+
+
 # ============ CATEGORÍA ============
 def get_categorias(db: Session, skip: int = 0, limit: int = 100, solo_activos: bool = True) -> List[Categoria]:
     query = db.query(Categoria)
@@ -97,13 +122,7 @@ def get_productos(
     if marca_id:
         query = query.filter(Producto.marca_id == marca_id)
     if busqueda:
-        query = query.filter(
-            or_(
-                Producto.nombre.ilike(f"%{busqueda}%"),
-                Producto.codigo.ilike(f"%{busqueda}%"),
-                Producto.codigo_barras.ilike(f"%{busqueda}%")
-            )
-        )
+        query = busqueda_texto.filtrar(query, Producto, busqueda)
     
     total = query.count()
     productos = query.offset(skip).limit(limit).all()
@@ -126,7 +145,11 @@ def crear_producto(db: Session, producto: ProductoCreate) -> Producto:
     db_producto = Producto(**producto.model_dump())
     db.add(db_producto)
     db.commit()
+    invalidar_catalogo()
     db.refresh(db_producto)
+    indice_productos.actualizar(db_producto)
+    # Un producto nuevo no tiene stock: entra como alerta SIN_STOCK
+    alerta_service.actualizar_alertas(db, [db_producto.id])
     return db_producto
 
 
@@ -136,7 +159,10 @@ def actualizar_producto(db: Session, producto_id: int, producto: ProductoUpdate)
         for key, value in producto.model_dump(exclude_unset=True).items():
             setattr(db_producto, key, value)
         db.commit()
+        invalidar_catalogo()
         db.refresh(db_producto)
+        indice_productos.actualizar(db_producto)
+        alerta_service.actualizar_alertas(db, [producto_id])
     return db_producto
 
 
@@ -146,10 +172,115 @@ def eliminar_producto(db: Session, producto_id: int) -> bool:
     if db_producto:
         db_producto.activo = False
         db.commit()
+        invalidar_catalogo()
+        indice_productos.actualizar(db_producto)
+        alerta_service.actualizar_alertas(db, [producto_id])
         return True
     return False
 
 
+def autocompletar_productos(db: Session, texto: str, limite: int) -> List[dict]:
+    """Productos activos cuyo nombre (o una de sus palabras), código o código de barras empieza con el texto"""
+    return indice_productos.buscar(db, texto, limite)
+
+
+# ============ CATÁLOGO EN MEMORIA ============
+def invalidar_catalogo():
+    """Descarta el catálogo cacheado; se recarga en la próxima consulta"""
+    global _catalogo, _catalogo_version
+    with _catalogo_lock:
+        _catalogo_version += 1
+        _catalogo = None
+
+
+def _columnas_catalogo():
+    return [getattr(Producto, campo) for campo in ProductoCatalogo._fields]
+
+
+def _indexar(producto: ProductoCatalogo, por_id: dict, por_codigo: dict, por_barras: dict):
+    por_id[producto.id] = producto
+    por_codigo[producto.codigo] = producto
+    if producto.codigo_barras:
+        por_barras[producto.codigo_barras] = producto
+
+
+def _get_catalogo(db: Session) -> tuple:
+    """
+    Devuelve los índices del catálogo (por id, código y código de barras),
+    cargándolos en una sola consulta si no están o vencieron. El vencimiento
+    (CATALOGO_TTL_SEGUNDOS) cubre cambios hechos por otros procesos.
+    """
+    global _catalogo
+    with _catalogo_lock:
+        catalogo = _catalogo
+        version = _catalogo_version
+    if catalogo is not None and catalogo[0] > time.monotonic():
+        return catalogo
+
+    por_id, por_codigo, por_barras = {}, {}, {}
+    for fila in db.query(*_columnas_catalogo()):
+        _indexar(ProductoCatalogo(*fila), por_id, por_codigo, por_barras)
+
+    catalogo = (time.monotonic() + settings.CATALOGO_TTL_SEGUNDOS, version, por_id, por_codigo, por_barras)
+    with _catalogo_lock:
+        # Si hubo una invalidación mientras se cargaba, no se guarda
+        if version == _catalogo_version:
+            _catalogo = catalogo
+    return catalogo
+
+
+def _refrescar_catalogo(db: Session, condicion) -> List[ProductoCatalogo]:
+    """
+    Lee de la base de datos los productos que cumplen la condición y
+    actualiza sus entradas en el catálogo cacheado. La invalidación solo
+    alcanza al proceso que hizo el cambio: un producto creado o reactivado
+    desde otro proceso se encuentra así sin esperar al vencimiento.
+    """
+    with _catalogo_lock:
+        version = _catalogo_version
+    productos = [ProductoCatalogo(*fila) for fila in db.query(*_columnas_catalogo()).filter(condicion)]
+    with _catalogo_lock:
+        if _catalogo is not None and version == _catalogo_version:
+            por_id, por_codigo, por_barras = _catalogo[2:]
+            for producto in productos:
+                _indexar(producto, por_id, por_codigo, por_barras)
+    return productos
+
+
+def _vigente(db: Session, producto: Optional[ProductoCatalogo], condicion) -> Optional[ProductoCatalogo]:
+    """El producto del catálogo o, si falta o figura inactivo, el leído de la base de datos"""
+    if producto is not None and producto.activo:
+        return producto
+    encontrados = _refrescar_catalogo(db, condicion)
+    return encontrados[0] if encontrados else None
+
+
+def get_producto_catalogo(db: Session, producto_id: int) -> Optional[ProductoCatalogo]:
+    return _vigente(db, _get_catalogo(db)[2].get(producto_id), Producto.id == producto_id)
+
+
+def get_producto_catalogo_por_codigo(db: Session, codigo: str) -> Optional[ProductoCatalogo]:
+    return _vigente(db, _get_catalogo(db)[3].get(codigo), Producto.codigo == codigo)
+
+
+def get_producto_catalogo_por_barras(db: Session, codigo_barras: str) -> Optional[ProductoCatalogo]:
+    return _vigente(db, _get_catalogo(db)[4].get(codigo_barras), Producto.codigo_barras == codigo_barras)
+
+
+def get_nombres_productos(db: Session, producto_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    Nombres de varios productos desde el catálogo; solo los que no están en
+    él se buscan en la base de datos (en una consulta)
+    """
+    producto_ids = set(producto_ids)
+    por_id = _get_catalogo(db)[2]
+    nombres = {pid: por_id[pid].nombre for pid in producto_ids if pid in por_id}
+    faltantes = producto_ids - nombres.keys()
+    if faltantes:
+        nombres.update((p.id, p.nombre) for p in _refrescar_catalogo(db, Producto.id.in_(faltantes)))
+    return nombres
+
+
 def get_productos_bajo_stock(db: Session) -> List[Producto]:
     """Obtiene productos cuyo stock está por debajo del mínimo"""
     from app.models.inventario import Inventario
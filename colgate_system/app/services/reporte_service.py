@@ -0,0 +1,358 @@
+"""
+Servicio de Reportes - Agregaciones de ventas calculadas en la base de datos
+"""
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import event, func, extract
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, date, timedelta
+import threading
+import time
+
+from app.models.venta import Venta, VentaResumenDiario, EstadoVenta, CLAVE_RESUMEN_DIARIO
+from app.models.cliente import Cliente, TipoCliente
+from app.config import settings
+from app import fechas
+
+# Cache de ventas mensuales: year -> (expira, meses cerrados cubiertos, {mes: (cantidad, total)})
+_cache_mensual: Dict[int, Tuple[int, Dict[int, Tuple[int, float]]]] = {}
+_cache_mensual_lock = threading.Lock()
+_cache_mensual_version = 0  # Evita guardar resultados calculados antes de una invalidación
+
+
+# ============ RESUMEN DIARIO ============
+def _insertar(db: Session):
+    """insert() del dialecto en uso, que admite ON CONFLICT DO UPDATE"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def _ajustar_resumen(
+    db: Session,
+    fecha: date,
+    estado: EstadoVenta,
+    vendedor_id: Optional[int],
+    cliente_tipo: Optional[TipoCliente],
+    cantidad: int,
+    total: float
+):
+    """
+    Suma (o resta) cantidad y total en el acumulado del día: una sola
+    sentencia INSERT ... ON CONFLICT DO UPDATE, así dos transacciones que
+    crean el mismo acumulado a la vez no lo duplican ni pierden la suma.
+    """
+    sentencia = _insertar(db)(VentaResumenDiario).values(
+        fecha=fecha,
+        estado=estado,
+        vendedor_id=vendedor_id,
+        cliente_tipo=cliente_tipo,
+        cantidad=cantidad,
+        total=total
+    )
+    db.execute(sentencia.on_conflict_do_update(
+        index_elements=list(CLAVE_RESUMEN_DIARIO),
+        set_={
+            "cantidad": VentaResumenDiario.cantidad + sentencia.excluded.cantidad,
+            "total": VentaResumenDiario.total + sentencia.excluded.total
+        }
+    ))
+
+
+def _cliente_tipo(venta: Venta) -> Optional[TipoCliente]:
+    """
+    Tipo de cliente con el que se agrupa la venta: el guardado al crearla, así
+    un cambio posterior del tipo del cliente no mueve sus ventas de grupo. Las
+    ventas anteriores a la columna usan el tipo actual, igual que la reconstrucción.
+    """
+    if venta.cliente_tipo is not None:
+        return venta.cliente_tipo
+    return venta.cliente.tipo if venta.cliente else None
+
+
+def actualizar_resumen_venta(
+    db: Session,
+    venta: Venta,
+    estado_anterior: Optional[EstadoVenta] = None,
+    total_anterior: Optional[float] = None
+):
+    """
+    Refleja en el resumen diario una venta nueva o un cambio de estado/total.
+    Debe llamarse antes del commit de la operación que modifica la venta.
+    """
+    fecha = fechas.dia_negocio(venta.fecha_creacion or datetime.utcnow())
+    _invalidar_al_confirmar(db, fecha)
+    cliente_tipo = _cliente_tipo(venta)
+
+    if estado_anterior is not None:
+        _ajustar_resumen(
+            db, fecha, estado_anterior, venta.vendedor_id, cliente_tipo,
+            -1, -(venta.total if total_anterior is None else total_anterior)
+        )
+    _ajustar_resumen(db, fecha, venta.estado, venta.vendedor_id, cliente_tipo, 1, venta.total)
+
+
+def cambiar_estado_venta(db: Session, venta: Venta, estado: EstadoVenta, **valores) -> bool:
+    """
+    Pasa la venta al estado indicado (y asigna los demás valores) con un
+    UPDATE condicionado al estado leído, y refleja el cambio en el resumen
+    diario, sin commit. Si otra operación cambió el estado antes devuelve
+    False sin tocar nada: dos llamadas simultáneas no mueven el resumen dos veces.
+    """
+    estado_anterior = venta.estado
+    valores["estado"] = estado
+    actualizadas = db.query(Venta).filter(
+        Venta.id == venta.id,
+        Venta.estado == estado_anterior
+    ).update({getattr(Venta, campo): valor for campo, valor in valores.items()}, synchronize_session=False)
+    if actualizadas != 1:
+        return False
+    for campo, valor in valores.items():
+        set_committed_value(venta, campo, valor)
+    actualizar_resumen_venta(db, venta, estado_anterior)
+    return True
+
+
+def actualizar_resumen_ventas_nuevas(db: Session, ventas: List[Venta]):
+    """
+    Refleja en el resumen diario un lote de ventas nuevas, con un UPSERT por
+    día/estado/vendedor/tipo de cliente en vez de uno por venta.
+    """
+    grupos = {}
+    for venta in ventas:
+        fecha = fechas.dia_negocio(venta.fecha_creacion or datetime.utcnow())
+        grupo = grupos.setdefault((fecha, venta.estado, venta.vendedor_id, venta.cliente_tipo), [0, 0.0])
+        grupo[0] += 1
+        grupo[1] += venta.total
+    
+    for (fecha, estado, vendedor_id, cliente_tipo), (cantidad, total) in grupos.items():
+        _invalidar_al_confirmar(db, fecha)
+        _ajustar_resumen(db, fecha, estado, vendedor_id, cliente_tipo, cantidad, total)
+
+
+def reconstruir_resumen_diario(db: Session) -> int:
+    """
+    Recalcula el resumen diario completo desde la tabla de ventas. Los días
+    se asignan en la zona horaria del negocio, por eso se agrupa en Python
+    recorriendo las ventas por lotes.
+    """
+    filas = db.query(
+        Venta.fecha_creacion,
+        Venta.estado,
+        Venta.vendedor_id,
+        func.coalesce(Venta.cliente_tipo, Cliente.tipo),
+        Venta.total
+    ).outerjoin(Cliente, Cliente.id == Venta.cliente_id).yield_per(10000)
+
+    acumulado = {}
+    for fecha_creacion, estado, vendedor_id, cliente_tipo, total in filas:
+        fecha = fechas.dia_negocio(fecha_creacion or datetime.utcnow())
+        grupo = acumulado.setdefault((fecha, estado, vendedor_id, cliente_tipo), [0, 0.0])
+        grupo[0] += 1
+        grupo[1] += total or 0.0
+
+    db.query(VentaResumenDiario).delete(synchronize_session=False)
+    db.bulk_insert_mappings(VentaResumenDiario, [
+        {
+            "fecha": fecha,
+            "estado": estado,
+            "vendedor_id": vendedor_id,
+            "cliente_tipo": cliente_tipo,
+            "cantidad": cantidad,
+            "total": total
+        }
+        for (fecha, estado, vendedor_id, cliente_tipo), (cantidad, total) in acumulado.items()
+    ])
+    db.commit()
+    invalidar_cache_mensual()
+    return len(acumulado)
+
+
+def verificar_resumen_diario(db: Session) -> bool:
+    """Reconstruye el resumen si está vacío y ya existen ventas (bases anteriores al resumen)"""
+    if db.query(VentaResumenDiario.id).first() or not db.query(Venta.id).first():
+        return False
+    reconstruir_resumen_diario(db)
+    return True
+
+
+# ============ CONSULTAS ============
+def get_ventas_por_dia_estado(db: Session, desde: date, hasta: Optional[date] = None) -> List[tuple]:
+    """
+    Agrupa las ventas por día y estado leyendo el resumen diario.
+    Devuelve tuplas (fecha, estado, cantidad, total) con fecha en [desde, hasta).
+    """
+    query = db.query(
+        VentaResumenDiario.fecha,
+        VentaResumenDiario.estado,
+        func.sum(VentaResumenDiario.cantidad),
+        func.sum(VentaResumenDiario.total)
+    ).filter(VentaResumenDiario.fecha >= desde)
+    if hasta:
+        query = query.filter(VentaResumenDiario.fecha < hasta)
+
+    filas = query.group_by(VentaResumenDiario.fecha, VentaResumenDiario.estado).all()
+    return [
+        (f, estado, int(cantidad or 0), float(total or 0))
+        for f, estado, cantidad, total in filas
+        if cantidad
+    ]
+
+
+def get_resumen_dashboard(db: Session, hoy: date) -> dict:
+    """
+    Calcula los indicadores de ventas del dashboard (mes, semana, por día y
+    por estado) a partir de una única consulta agrupada.
+    """
+    hace_30_dias = hoy - timedelta(days=30)
+    hace_7_dias = hoy - timedelta(days=7)
+
+    filas = get_ventas_por_dia_estado(db, hace_30_dias)
+
+    ventas_mes = 0
+    ingresos_mes = 0.0
+    ingresos_semana = 0.0
+    por_dia = {}
+    por_estado = {}
+
+    for fecha, estado, cantidad, total in filas:
+        por_estado[estado] = por_estado.get(estado, 0) + cantidad
+        if estado == EstadoVenta.CANCELADO:
+            continue
+
+        ventas_mes += cantidad
+        ingresos_mes += total
+        if fecha >= hace_7_dias:
+            ingresos_semana += total
+
+        acumulado = por_dia.setdefault(fecha, [0, 0.0])
+        acumulado[0] += cantidad
+        acumulado[1] += total
+
+    # Últimos 7 días, incluyendo los días sin ventas
+    ventas_por_dia = []
+    for i in range(7):
+        fecha = hoy - timedelta(days=6-i)
+        cantidad, total = por_dia.get(fecha, (0, 0))
+        ventas_por_dia.append({
+            "fecha": fecha.strftime("%d/%m"),
+            "cantidad": cantidad,
+            "total": total
+        })
+
+    return {
+        "ventas_mes": ventas_mes,
+        "ingresos_mes": ingresos_mes,
+        "ingresos_semana": ingresos_semana,
+        "ventas_por_dia": ventas_por_dia,
+        "ventas_por_estado": [
+            {"estado": estado.value, "cantidad": cantidad}
+            for estado, cantidad in por_estado.items()
+        ]
+    }
+
+
+def get_resumen_kpis(db: Session, inicio_mes: date, mes_anterior: date) -> dict:
+    """Totales del mes actual y del anterior agrupados por estado, leídos del resumen diario"""
+    actual = {}
+    anterior = {"cantidad": 0, "total": 0.0}
+
+    for fecha, estado, cantidad, total in get_ventas_por_dia_estado(db, mes_anterior):
+        if fecha >= inicio_mes:
+            acumulado = actual.setdefault(estado, [0, 0.0])
+            acumulado[0] += cantidad
+            acumulado[1] += total
+        elif estado != EstadoVenta.CANCELADO:
+            anterior["cantidad"] += cantidad
+            anterior["total"] += total
+
+    return {"actual_por_estado": actual, "anterior": anterior}
+
+
+# ============ VENTAS MENSUALES ============
+def _inicio_mes(year: int, mes: int) -> date:
+    """Primer día del mes; mes=13 corresponde a enero del año siguiente"""
+    if mes > 12:
+        return date(year + 1, 1, 1)
+    return date(year, mes, 1)
+
+
+def invalidar_cache_mensual(fecha: Optional[date] = None):
+    """Descarta el año cacheado al que pertenece una venta modificada (o todos)"""
+    global _cache_mensual_version
+    with _cache_mensual_lock:
+        _cache_mensual_version += 1
+        if fecha is None:
+            _cache_mensual.clear()
+        else:
+            _cache_mensual.pop(fecha.year, None)
+
+
+def _invalidar_al_confirmar(db: Session, fecha: date):
+    """
+    Anota el año para invalidarlo recién después del commit: invalidarlo antes
+    dejaría que una consulta simultánea guarde en cache los datos sin la venta.
+    """
+    db.info.setdefault("resumen_anios", set()).add(fecha.year)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_anios_confirmados(db: Session):
+    for year in db.info.pop("resumen_anios", ()):
+        invalidar_cache_mensual(date(year, 1, 1))
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_anios_pendientes(db: Session):
+    db.info.pop("resumen_anios", None)
+
+
+def _ventas_por_mes(db: Session, year: int, desde_mes: int) -> Dict[int, Tuple[int, float]]:
+    """Ventas no canceladas del año agrupadas por mes, desde un mes dado, en una consulta"""
+    mes = extract('month', VentaResumenDiario.fecha)
+    filas = db.query(
+        mes,
+        func.sum(VentaResumenDiario.cantidad),
+        func.sum(VentaResumenDiario.total)
+    ).filter(
+        VentaResumenDiario.fecha >= _inicio_mes(year, desde_mes),
+        VentaResumenDiario.fecha < _inicio_mes(year, 13),
+        VentaResumenDiario.estado != EstadoVenta.CANCELADO
+    ).group_by(mes).all()
+
+    return {int(m): (int(cantidad or 0), float(total or 0)) for m, cantidad, total in filas}
+
+
+def get_ventas_mensuales(db: Session, year: int, hoy: date) -> Dict[int, Tuple[int, float]]:
+    """
+    Ventas por mes de un año. Los meses cerrados (anteriores al mes en curso)
+    se guardan en cache hasta que una venta de ese año cambie en este proceso
+    o venza REPORTE_MENSUAL_TTL_SEGUNDOS (cambios de otros procesos); el mes
+    en curso y los siguientes se recalculan en cada llamada.
+    """
+    if year < hoy.year:
+        meses_cerrados = 12
+    elif year == hoy.year:
+        meses_cerrados = hoy.month - 1
+    else:
+        meses_cerrados = 0
+
+    with _cache_mensual_lock:
+        entrada = _cache_mensual.get(year)
+        version = _cache_mensual_version
+
+    if entrada is not None and entrada[0] > time.monotonic() and entrada[1] == meses_cerrados:
+        datos = dict(entrada[2])
+        if meses_cerrados < 12:
+            datos.update(_ventas_por_mes(db, year, meses_cerrados + 1))
+        return datos
+
+    datos = _ventas_por_mes(db, year, 1)
+    cerrados = {m: v for m, v in datos.items() if m <= meses_cerrados}
+    with _cache_mensual_lock:
+        if version == _cache_mensual_version:
+            _cache_mensual[year] = (
+                time.monotonic() + settings.REPORTE_MENSUAL_TTL_SEGUNDOS, meses_cerrados, cerrados
+            )
+    return datos
@@ -1,35 +1,35 @@
 """
 Servicio de Ventas y Pedidos
 """
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
 from datetime import datetime, timedelta
+import time
 
 from app.models.venta import Venta, DetalleVenta, PagoVenta, EstadoVenta, TipoPago
-from app.models.producto import Producto
 from app.models.cliente import Cliente
 from app.schemas.venta import VentaCreate, VentaUpdate, DetalleVentaCreate, PagoVentaCreate
-from app.services import inventario_service
+from app.services import (
+    alerta_service, inventario_service, reporte_service, numeracion_service, producto_service
+)
+from app.config import settings
+from app.cache import cache_respuestas
+from app.paginacion import ModoConteo, Pagina, contar, paginar_por_cursor
 from app.models.inventario import TipoMovimiento
+from app.schemas.inventario import MovimientoCreate
 
 
 def generar_numero_venta(db: Session) -> str:
     """Genera un número único de venta"""
-    hoy = datetime.utcnow()
-    prefijo = f"V{hoy.strftime('%Y%m')}"
-    
-    ultima = db.query(Venta).filter(
-        Venta.numero.like(f"{prefijo}%")
-    ).order_by(Venta.numero.desc()).first()
-    
-    if ultima:
-        ultimo_numero = int(ultima.numero[-5:])
-        nuevo_numero = ultimo_numero + 1
-    else:
-        nuevo_numero = 1
-    
-    return f"{prefijo}{nuevo_numero:05d}"
+    return generar_numeros_venta(db, 1)[0]
+
+
+def generar_numeros_venta(db: Session, cantidad: int) -> List[str]:
+    """Genera un bloque contiguo de números de venta"""
+    prefijo = f"V{datetime.utcnow().strftime('%Y%m')}"
+    return numeracion_service.generar_codigos(Venta.numero, prefijo, 5, cantidad)
 
 
 def get_ventas(
@@ -40,8 +40,15 @@ def get_ventas(
     vendedor_id: Optional[int] = None,
     estado: Optional[EstadoVenta] = None,
     fecha_desde: Optional[datetime] = None,
-    fecha_hasta: Optional[datetime] = None
-) -> tuple[List[Venta], int]:
+    fecha_hasta: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    conteo: Optional[ModoConteo] = None
+) -> Pagina:
+    """
+    Lista ventas con filtros. Con cursor (vacío para la primera página) se
+    pagina por (fecha_pedido, id) en lugar de offset; el total solo se cuenta
+    por defecto en modo offset.
+    """
     query = db.query(Venta)
     
     if cliente_id:
@@ -55,27 +62,41 @@ def get_ventas(
     if fecha_hasta:
         query = query.filter(Venta.fecha_pedido <= fecha_hasta)
     
-    total = query.count()
-    ventas = query.order_by(Venta.fecha_pedido.desc()).offset(skip).limit(limit).all()
-    return ventas, total
+    if conteo is None:
+        conteo = ModoConteo.NINGUNO if cursor is not None else ModoConteo.EXACTO
+    total, total_exacto = contar(query, conteo)
+
+    # Los detalles se cargan en una sola consulta adicional (evita N+1 al serializar)
+    query = query.options(selectinload(Venta.detalles))
+    if cursor is not None:
+        ventas, siguiente = paginar_por_cursor(query, Venta.fecha_pedido, Venta.id, cursor, limit)
+        return Pagina(ventas, total, total_exacto, siguiente)
+
+    ventas = query.order_by(
+        Venta.fecha_pedido.desc(), Venta.id.desc()
+    ).offset(skip).limit(limit).all()
+    return Pagina(ventas, total, total_exacto, None)
 
 
 def get_venta(db: Session, venta_id: int) -> Optional[Venta]:
-    return db.query(Venta).filter(Venta.id == venta_id).first()
+    return db.query(Venta).options(selectinload(Venta.detalles)).filter(Venta.id == venta_id).first()
 
 
 def get_venta_por_numero(db: Session, numero: str) -> Optional[Venta]:
-    return db.query(Venta).filter(Venta.numero == numero).first()
+    return db.query(Venta).options(selectinload(Venta.detalles)).filter(Venta.numero == numero).first()
 
 
 def crear_venta(db: Session, venta: VentaCreate, vendedor_id: int, almacen_id: int = 1) -> Venta:
     """Crea una nueva venta con sus detalles"""
     
+    cliente = db.query(Cliente.tipo, Cliente.dias_credito).filter(Cliente.id == venta.cliente_id).first()
+    
     # Crear venta
     numero = generar_numero_venta(db)
     db_venta = Venta(
         numero=numero,
         cliente_id=venta.cliente_id,
+        cliente_tipo=cliente.tipo if cliente else None,
         vendedor_id=vendedor_id,
         tipo_documento=venta.tipo_documento,
         tipo_pago=venta.tipo_pago,
@@ -89,63 +110,173 @@ def crear_venta(db: Session, venta: VentaCreate, vendedor_id: int, almacen_id: i
     db.flush()
     
     # Agregar detalles
-    subtotal = 0
     for detalle in venta.detalles:
-        producto = db.query(Producto).filter(Producto.id == detalle.producto_id).first()
-        if not producto:
+        if not producto_service.get_producto_catalogo(db, detalle.producto_id):
             raise ValueError(f"Producto {detalle.producto_id} no encontrado")
-        
-        precio_final = detalle.precio_unitario * (1 - detalle.descuento_porcentaje / 100)
-        subtotal_detalle = (precio_final * detalle.cantidad) - detalle.descuento_monto
-        
-        db_detalle = DetalleVenta(
-            venta_id=db_venta.id,
-            producto_id=detalle.producto_id,
-            cantidad=detalle.cantidad,
-            precio_unitario=detalle.precio_unitario,
-            descuento_porcentaje=detalle.descuento_porcentaje,
-            descuento_monto=detalle.descuento_monto,
-            subtotal=subtotal_detalle
-        )
-        db.add(db_detalle)
-        subtotal += subtotal_detalle
+        db_venta.detalles.append(_nuevo_detalle(detalle))
     
     # Calcular totales
-    db_venta.subtotal = subtotal
-    db_venta.impuesto = subtotal * 0.18  # IGV 18%
-    db_venta.total = db_venta.subtotal + db_venta.impuesto - db_venta.descuento
+    _calcular_totales(db_venta)
     
     # Calcular fecha vencimiento si es crédito
     if venta.tipo_pago == TipoPago.CREDITO:
-        cliente = db.query(Cliente).filter(Cliente.id == venta.cliente_id).first()
-        if cliente and cliente.dias_credito > 0:
+        if cliente and cliente.dias_credito and cliente.dias_credito > 0:
             db_venta.fecha_vencimiento_pago = datetime.utcnow() + timedelta(days=cliente.dias_credito)
     
+    reporte_service.actualizar_resumen_venta(db, db_venta)
     db.commit()
+    cache_respuestas.invalidar("ventas")
     db.refresh(db_venta)
     return db_venta
 
 
-def confirmar_venta(db: Session, venta_id: int, almacen_id: int = 1, usuario_id: int = None) -> Venta:
-    """Confirma una venta y reserva el inventario"""
-    venta = get_venta(db, venta_id)
-    if not venta:
-        raise ValueError("Venta no encontrada")
-    
-    if venta.estado != EstadoVenta.BORRADOR:
-        raise ValueError(f"La venta no puede ser confirmada. Estado actual: {venta.estado}")
-    
-    # Verificar y reservar stock
+def _nuevo_detalle(detalle: DetalleVentaCreate) -> DetalleVenta:
+    """Crea la línea de venta con su subtotal calculado"""
+    precio_final = detalle.precio_unitario * (1 - detalle.descuento_porcentaje / 100)
+    return DetalleVenta(
+        producto_id=detalle.producto_id,
+        cantidad=detalle.cantidad,
+        precio_unitario=detalle.precio_unitario,
+        descuento_porcentaje=detalle.descuento_porcentaje,
+        descuento_monto=detalle.descuento_monto,
+        subtotal=(precio_final * detalle.cantidad) - detalle.descuento_monto
+    )
+
+
+def _calcular_totales(venta: Venta):
+    venta.subtotal = sum(d.subtotal for d in venta.detalles)
+    venta.impuesto = venta.subtotal * 0.18  # IGV 18%
+    venta.total = venta.subtotal + venta.impuesto - (venta.descuento or 0.0)
+
+
+def crear_ventas_lote(
+    db: Session,
+    ventas: List[Tuple[int, VentaCreate]],
+    vendedor_id: int
+) -> List[dict]:
+    """
+    Crea muchas ventas en una sola transacción. Clientes y productos se
+    consultan una vez para todo el lote y los números de venta se asignan en
+    un bloque contiguo. Las ventas con datos inválidos se informan en su
+    resultado sin detener el resto. Recibe pares (índice, venta) y devuelve
+    {indice, venta_id, numero, error} por cada una.
+    """
+    clientes = {
+        c.id: c for c in db.query(Cliente.id, Cliente.tipo, Cliente.dias_credito).filter(
+            Cliente.id.in_({v.cliente_id for _, v in ventas})
+        )
+    }
+    productos = producto_service.get_nombres_productos(
+        db, {d.producto_id for _, v in ventas for d in v.detalles}
+    )
+
+    resultados = []
+    validas = []
+    for indice, venta in ventas:
+        error = None
+        if venta.cliente_id not in clientes:
+            error = f"Cliente {venta.cliente_id} no encontrado"
+        else:
+            faltante = next((d.producto_id for d in venta.detalles if d.producto_id not in productos), None)
+            if faltante is not None:
+                error = f"Producto {faltante} no encontrado"
+        if error:
+            resultados.append({"indice": indice, "venta_id": None, "numero": None, "error": error})
+        else:
+            validas.append((indice, venta))
+
+    if not validas:
+        return resultados
+
+    ahora = datetime.utcnow()
+    creadas = []
+    for (indice, venta), numero in zip(validas, generar_numeros_venta(db, len(validas))):
+        cliente = clientes[venta.cliente_id]
+        db_venta = Venta(
+            numero=numero,
+            cliente_id=venta.cliente_id,
+            cliente_tipo=cliente.tipo,
+            vendedor_id=vendedor_id,
+            fecha_pedido=ahora,
+            tipo_documento=venta.tipo_documento,
+            tipo_pago=venta.tipo_pago,
+            fecha_entrega_solicitada=venta.fecha_entrega_solicitada,
+            direccion_entrega=venta.direccion_entrega,
+            referencia_entrega=venta.referencia_entrega,
+            observaciones=venta.observaciones,
+            estado=EstadoVenta.BORRADOR,
+            descuento=0.0,
+            fecha_creacion=ahora,
+            detalles=[_nuevo_detalle(d) for d in venta.detalles]
+        )
+        _calcular_totales(db_venta)
+        if venta.tipo_pago == TipoPago.CREDITO and cliente.dias_credito and cliente.dias_credito > 0:
+            db_venta.fecha_vencimiento_pago = ahora + timedelta(days=cliente.dias_credito)
+        creadas.append((indice, db_venta))
+
+    db.add_all(v for _, v in creadas)
+    reporte_service.actualizar_resumen_ventas_nuevas(db, [v for _, v in creadas])
+    db.commit()
+    cache_respuestas.invalidar("ventas")
+
+    resultados.extend(
+        {"indice": indice, "venta_id": v.id, "numero": v.numero, "error": None}
+        for indice, v in creadas
+    )
+    resultados.sort(key=lambda r: r["indice"])
+    return resultados
+
+
+def _cantidades_por_producto(venta: Venta) -> dict:
+    """Suma las cantidades de las líneas de la venta por producto"""
+    lineas = {}
     for detalle in venta.detalles:
-        stock_disponible = inventario_service.get_stock_disponible_producto(db, detalle.producto_id)
-        if stock_disponible < detalle.cantidad:
-            producto = db.query(Producto).filter(Producto.id == detalle.producto_id).first()
-            raise ValueError(f"Stock insuficiente para {producto.nombre}. Disponible: {stock_disponible}, Requerido: {detalle.cantidad}")
+        lineas[detalle.producto_id] = lineas.get(detalle.producto_id, 0) + detalle.cantidad
+    return lineas
+
+
+def confirmar_venta(db: Session, venta_id: int, almacen_id: int = 1, usuario_id: int = None) -> Venta:
+    """
+    Confirma una venta y reserva el inventario de todas sus líneas en una
+    sola transacción: o se reserva todo o no se reserva nada. Si la base de
+    datos rechaza la transacción por concurrencia (bloqueo, deadlock) se
+    reintenta.
+    """
+    for intento in range(settings.RESERVA_REINTENTOS):
+        venta = get_venta(db, venta_id)
+        if not venta:
+            raise ValueError("Venta no encontrada")
+        
+        if venta.estado != EstadoVenta.BORRADOR:
+            raise ValueError(f"La venta no puede ser confirmada. Estado actual: {venta.estado}")
         
-        inventario_service.reservar_stock(db, detalle.producto_id, almacen_id, detalle.cantidad)
+        lineas = _cantidades_por_producto(venta)
+        
+        try:
+            # Cambio de estado condicional: una confirmación simultánea de la misma venta no pasa
+            confirmadas = db.query(Venta).filter(
+                Venta.id == venta_id,
+                Venta.estado == EstadoVenta.BORRADOR
+            ).update({Venta.estado: EstadoVenta.CONFIRMADO}, synchronize_session=False)
+            if not confirmadas:
+                raise ValueError("La venta ya fue confirmada por otra operación")
+            
+            inventario_service.reservar_lineas(db, almacen_id, lineas)
+            
+            venta.estado = EstadoVenta.CONFIRMADO
+            reporte_service.actualizar_resumen_venta(db, venta, EstadoVenta.BORRADOR)
+            db.commit()
+            break
+        except ValueError:
+            db.rollback()
+            raise
+        except OperationalError:
+            db.rollback()
+            if intento == settings.RESERVA_REINTENTOS - 1:
+                raise
+            time.sleep(0.05 * (intento + 1))
     
-    venta.estado = EstadoVenta.CONFIRMADO
-    db.commit()
+    cache_respuestas.invalidar("ventas", "inventario")
     db.refresh(venta)
     return venta
 
@@ -154,8 +285,11 @@ def preparar_venta(db: Session, venta_id: int) -> Venta:
     """Marca la venta como en preparación"""
     venta = get_venta(db, venta_id)
     if venta and venta.estado == EstadoVenta.CONFIRMADO:
-        venta.estado = EstadoVenta.EN_PREPARACION
-        db.commit()
+        if reporte_service.cambiar_estado_venta(db, venta, EstadoVenta.EN_PREPARACION):
+            db.commit()
+            cache_respuestas.invalidar("ventas")
+        else:
+            db.rollback()
         db.refresh(venta)
     return venta
 
@@ -169,24 +303,31 @@ def marcar_listo_envio(db: Session, venta_id: int, almacen_id: int = 1, usuario_
     if venta.estado != EstadoVenta.EN_PREPARACION:
         raise ValueError(f"La venta no está en preparación. Estado: {venta.estado}")
     
-    # Descontar inventario
-    for detalle in venta.detalles:
-        inventario_service.registrar_movimiento(
-            db=db,
-            almacen_id=almacen_id,
-            producto_id=detalle.producto_id,
-            tipo=TipoMovimiento.SALIDA_VENTA,
-            cantidad=detalle.cantidad,
-            usuario_id=usuario_id,
-            documento_tipo="venta",
-            documento_id=venta.id,
-            documento_numero=venta.numero
-        )
-        # Liberar reserva
-        inventario_service.liberar_reserva(db, detalle.producto_id, almacen_id, detalle.cantidad)
+    # Liberar la reserva y descontar el inventario en la misma transacción; el cambio
+    # de estado va primero y condicionado para que dos llamadas no descuenten dos veces
+    try:
+        if not reporte_service.cambiar_estado_venta(db, venta, EstadoVenta.LISTO_ENVIO):
+            raise ValueError("La venta ya cambió de estado por otra operación")
+        inventario_service.liberar_lineas(db, almacen_id, _cantidades_por_producto(venta))
+        inventario_service.registrar_movimientos(db, [
+            MovimientoCreate(
+                almacen_id=almacen_id,
+                producto_id=detalle.producto_id,
+                tipo=TipoMovimiento.SALIDA_VENTA,
+                cantidad=detalle.cantidad,
+                documento_tipo="venta",
+                documento_id=venta.id,
+                documento_numero=venta.numero
+            )
+            for detalle in venta.detalles
+        ], usuario_id)
+    except ValueError:
+        db.rollback()
+        raise
     
-    venta.estado = EstadoVenta.LISTO_ENVIO
     db.commit()
+    cache_respuestas.invalidar("ventas", "inventario")
+    alerta_service.actualizar_alertas(db, {detalle.producto_id for detalle in venta.detalles})
     db.refresh(venta)
     return venta
 
@@ -200,13 +341,17 @@ def cancelar_venta(db: Session, venta_id: int, almacen_id: int = 1) -> Venta:
     if venta.estado in [EstadoVenta.ENTREGADO, EstadoVenta.CANCELADO]:
         raise ValueError(f"La venta no puede ser cancelada. Estado: {venta.estado}")
     
+    estado_anterior = venta.estado
+    if not reporte_service.cambiar_estado_venta(db, venta, EstadoVenta.CANCELADO):
+        db.rollback()
+        raise ValueError("La venta ya cambió de estado por otra operación")
+    
     # Si ya estaba confirmada, liberar reservas
-    if venta.estado in [EstadoVenta.CONFIRMADO, EstadoVenta.EN_PREPARACION]:
-        for detalle in venta.detalles:
-            inventario_service.liberar_reserva(db, detalle.producto_id, almacen_id, detalle.cantidad)
+    if estado_anterior in [EstadoVenta.CONFIRMADO, EstadoVenta.EN_PREPARACION]:
+        inventario_service.liberar_lineas(db, almacen_id, _cantidades_por_producto(venta))
     
-    venta.estado = EstadoVenta.CANCELADO
     db.commit()
+    cache_respuestas.invalidar("ventas", "inventario")
     db.refresh(venta)
     return venta
 
@@ -319,8 +319,9 @@ async function loadClientes() {
     loadClientesSelect();
 }
 
-async function loadClientesSelect() {
-    const clientes = await apiRequest('/clientes/');
+// Los selects de la venta se llenan con sugerencias del servidor, no con el catálogo completo
+async function loadClientesSelect(texto = '') {
+    const clientes = await apiRequest(`/clientes/autocomplete?q=${encodeURIComponent(texto)}&limit=20`);
     const select = document.getElementById('selectClienteVenta');
     if (select && clientes) {
         select.innerHTML = '<option value="">Seleccionar cliente...</option>' +
@@ -376,8 +377,8 @@ async function loadVentas() {
     document.getElementById('fechaVenta').value = new Date().toISOString().split('T')[0];
 }
 
-async function loadProductosSelect() {
-    const productos = await apiRequest('/productos/');
+async function loadProductosSelect(texto = '') {
+    const productos = await apiRequest(`/productos/autocomplete?q=${encodeURIComponent(texto)}&limit=20`);
     const select = document.getElementById('selectProductoVenta');
     if (select && productos) {
         select.innerHTML = '<option value="">Seleccionar producto...</option>' +
@@ -611,4 +612,15 @@ document.addEventListener('DOMContentLoaded', () => {
             document.getElementById('precioProducto').value = option.dataset.precio;
         }
     });
+    
+    // Autocompletado de cliente y producto en la venta (espera a que se deje de escribir)
+    let esperaCliente, esperaProducto;
+    document.getElementById('buscarClienteVenta')?.addEventListener('input', function() {
+        clearTimeout(esperaCliente);
+        esperaCliente = setTimeout(() => loadClientesSelect(this.value), 200);
+    });
+    document.getElementById('buscarProductoVenta')?.addEventListener('input', function() {
+        clearTimeout(esperaProducto);
+        esperaProducto = setTimeout(() => loadProductosSelect(this.value), 200);
+    });
 });
@@ -0,0 +1,61 @@
+"""
+Entorno de Alembic: usa el engine y los modelos de la aplicación
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.busqueda import es_tabla_de_indice
+from app.config import settings
+from app.database import Base, engine
+from app.models import (  # noqa: F401 - registra todas las tablas en Base.metadata
+    usuario, producto, cliente, proveedor,
+    inventario, venta, logistica, categoria, contador
+)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+# SQLite no soporta ALTER TABLE completo: las operaciones se hacen en modo batch
+es_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
+
+def incluir_nombre(nombre, tipo, padres):
+    """Las tablas/índices de búsqueda de texto se gestionan en app.busqueda"""
+    if tipo == "table" and es_tabla_de_indice(nombre):
+        return False
+    if tipo == "index" and nombre and nombre.endswith("_busqueda"):
+        return False
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=es_sqlite,
+        include_name=incluir_nombre
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=es_sqlite,
+            include_name=incluir_nombre
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
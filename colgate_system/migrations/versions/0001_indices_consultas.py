@@ -0,0 +1,64 @@
+"""Resumen diario de ventas, índices de consultas frecuentes y unicidad de inventario por lote
+
+Las tablas las crea init_db() al iniciar la aplicación; esta migración lleva
+a ese esquema las bases creadas antes del resumen diario y de los índices.
+El resumen se rellena al iniciar la aplicación (o con app.reconstruir_resumen).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.venta import VentaResumenDiario
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas, único)
+INDICES = [
+    ("uq_inventario_producto_almacen_lote", "inventarios", ["producto_id", "almacen_id", "lote"], True),
+    ("ix_inventarios_almacen_id", "inventarios", ["almacen_id"], False),
+    ("ix_movimientos_fecha_id", "movimientos_inventario", ["fecha", "id"], False),
+    ("ix_movimientos_producto_fecha", "movimientos_inventario", ["producto_id", "fecha", "id"], False),
+    ("ix_movimientos_almacen_fecha", "movimientos_inventario", ["almacen_id", "fecha", "id"], False),
+    ("ix_ventas_fecha_pedido_id", "ventas", ["fecha_pedido", "id"], False),
+    ("ix_ventas_vendedor_fecha_pedido", "ventas", ["vendedor_id", "fecha_pedido", "id"], False),
+    ("ix_ventas_cliente_fecha_pedido", "ventas", ["cliente_id", "fecha_pedido", "id"], False),
+    ("ix_ventas_estado_fecha_pedido", "ventas", ["estado", "fecha_pedido"], False),
+    ("ix_detalles_venta_venta_id", "detalles_venta", ["venta_id"], False),
+    ("ix_detalles_venta_producto_id", "detalles_venta", ["producto_id"], False),
+    ("ix_pagos_venta_venta_id", "pagos_venta", ["venta_id"], False),
+    ("ix_envios_fecha_programada_id", "envios", ["fecha_programada", "id"], False),
+    ("ix_envios_estado_fecha_programada", "envios", ["estado", "fecha_programada"], False),
+    ("ix_envios_venta_id", "envios", ["venta_id"], False),
+    ("ix_envios_ruta_id", "envios", ["ruta_id"], False),
+]
+
+
+def upgrade():
+    # Se crea desde el modelo para reutilizar los tipos ENUM existentes en PostgreSQL
+    VentaResumenDiario.__table__.create(bind=op.get_bind(), checkfirst=True)
+
+    duplicados = op.get_bind().execute(sa.text(
+        "SELECT producto_id, almacen_id, lote FROM inventarios "
+        "GROUP BY producto_id, almacen_id, lote HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicados:
+        raise RuntimeError(
+            f"Hay {len(duplicados)} combinaciones producto/almacén/lote repetidas en inventarios; "
+            "consolidarlas antes de aplicar la migración"
+        )
+
+    for nombre, tabla, columnas, unico in INDICES:
+        op.create_index(nombre, tabla, columnas, unique=unico, if_not_exists=True)
+
+
+def downgrade():
+    for nombre, tabla, _, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
+    op.drop_table("ventas_resumen_diario")
@@ -0,0 +1,31 @@
+"""Contadores de numeración de documentos
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("contadores_documento"):
+        return
+    # Los contadores se inicializan solos con el mayor número existente de cada prefijo
+    op.create_table(
+        "contadores_documento",
+        sa.Column("tipo", sa.String(50), nullable=False),
+        sa.Column("prefijo", sa.String(20), nullable=False),
+        sa.Column("ultimo", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("tipo", "prefijo")
+    )
+
+
+def downgrade():
+    op.drop_table("contadores_documento")
@@ -0,0 +1,24 @@
+"""Índices de texto completo para búsqueda de productos y clientes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+from app import busqueda
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite: tablas FTS5 + triggers; PostgreSQL: unaccent + índices GIN
+    busqueda.crear_indices(op.get_bind())
+
+
+def downgrade():
+    busqueda.eliminar_indices(op.get_bind())
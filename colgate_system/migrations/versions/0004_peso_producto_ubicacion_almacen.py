@@ -0,0 +1,36 @@
+"""Peso/volumen de productos y coordenadas de almacenes (optimización de rutas)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COLUMNAS = [
+    ("productos", "peso"),
+    ("productos", "volumen"),
+    ("almacenes", "latitud"),
+    ("almacenes", "longitud"),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for tabla, columna in COLUMNAS:
+        # init_db ya pudo haberlas agregado
+        if columna not in {c["name"] for c in inspector.get_columns(tabla)}:
+            with op.batch_alter_table(tabla) as batch:
+                batch.add_column(sa.Column(columna, sa.Float(), nullable=True))
+
+
+def downgrade():
+    for tabla, columna in reversed(COLUMNAS):
+        with op.batch_alter_table(tabla) as batch:
+            batch.drop_column(columna)
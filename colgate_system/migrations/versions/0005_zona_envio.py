@@ -0,0 +1,61 @@
+"""Zona de reparto de cada envío
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.busqueda import terminos
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _normalizar(distrito):
+    return " ".join(terminos(distrito)) if distrito else ""
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # init_db ya pudo haber agregado la columna (sin la clave foránea)
+    columna_nueva = "zona_id" not in {c["name"] for c in inspector.get_columns("envios")}
+    with op.batch_alter_table("envios") as batch:
+        if columna_nueva:
+            batch.add_column(sa.Column("zona_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key("fk_envios_zona_id", "zonas_reparto", ["zona_id"], ["id"])
+    if "ix_envios_zona_id" not in {i["name"] for i in inspector.get_indexes("envios")}:
+        op.create_index("ix_envios_zona_id", "envios", ["zona_id"])
+
+    # Zona de los envíos existentes según el distrito del cliente (misma regla que el servicio)
+    por_distrito = {}
+    for zona_id, distritos in bind.execute(sa.text(
+        "SELECT id, distritos FROM zonas_reparto WHERE activo ORDER BY id"
+    )):
+        for distrito in (distritos or "").split(","):
+            clave = _normalizar(distrito)
+            if clave:
+                por_distrito.setdefault(clave, zona_id)
+    envios = bind.execute(sa.text(
+        "SELECT e.id, c.distrito FROM envios e "
+        "JOIN ventas v ON v.id = e.venta_id JOIN clientes c ON c.id = v.cliente_id "
+        "WHERE e.zona_id IS NULL"
+    )).fetchall()
+    asignaciones = [
+        {"id": envio_id, "zona_id": por_distrito[_normalizar(distrito)]}
+        for envio_id, distrito in envios if _normalizar(distrito) in por_distrito
+    ]
+    if asignaciones:
+        bind.execute(sa.text("UPDATE envios SET zona_id = :zona_id WHERE id = :id"), asignaciones)
+
+
+def downgrade():
+    op.drop_index("ix_envios_zona_id", table_name="envios")
+    with op.batch_alter_table("envios") as batch:
+        batch.drop_constraint("fk_envios_zona_id", type_="foreignkey")
+        batch.drop_column("zona_id")
@@ -0,0 +1,35 @@
+"""Un solo envío por venta
+
+Reemplaza el índice ix_envios_venta_id por uno único para que dos
+solicitudes simultáneas no creen dos envíos de la misma venta.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    duplicados = op.get_bind().execute(sa.text(
+        "SELECT venta_id FROM envios GROUP BY venta_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicados:
+        raise RuntimeError(
+            f"Hay {len(duplicados)} ventas con más de un envío; "
+            "anular o reasignar los envíos repetidos antes de aplicar la migración"
+        )
+    op.drop_index("ix_envios_venta_id", table_name="envios", if_exists=True)
+    op.create_index("ix_envios_venta_id", "envios", ["venta_id"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_envios_venta_id", table_name="envios")
+    op.create_index("ix_envios_venta_id", "envios", ["venta_id"])
@@ -0,0 +1,72 @@
+"""Tipo de cliente guardado en cada venta y clave del resumen diario apta para UPSERT
+
+- ventas.cliente_tipo: el tipo del cliente al crear la venta (se completa con
+  el tipo actual de cada cliente), así el resumen no depende de cambios
+  posteriores del cliente.
+- ventas_resumen_diario: la restricción única sobre columnas que admiten NULL
+  se reemplaza por un índice único con coalesce, que INSERT ... ON CONFLICT
+  puede usar. El resumen se vacía y se reconstruye al iniciar la aplicación
+  (o con app.reconstruir_resumen).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.cliente import TipoCliente
+from app.models.venta import Venta
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+INDICE = "uq_resumen_diario_clave"
+CLAVE = ["fecha", "estado", sa.text("coalesce(vendedor_id, 0)"), sa.text("coalesce(cliente_tipo, '')")]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # init_db ya pudo haber agregado la columna
+    if "cliente_tipo" not in {c["name"] for c in inspector.get_columns("ventas")}:
+        op.add_column("ventas", sa.Column("cliente_tipo", Venta.__table__.c.cliente_tipo.type, nullable=True))
+    op.execute(
+        "UPDATE ventas SET cliente_tipo = "
+        "(SELECT clientes.tipo FROM clientes WHERE clientes.id = ventas.cliente_id) "
+        "WHERE cliente_tipo IS NULL"
+    )
+
+    op.execute("DELETE FROM ventas_resumen_diario")
+    # init_db pudo haber creado el índice nuevo; se vuelve a crear después de recrear la tabla
+    op.drop_index(INDICE, table_name="ventas_resumen_diario", if_exists=True)
+    unicas = {u["name"] for u in inspector.get_unique_constraints("ventas_resumen_diario")}
+    with op.batch_alter_table("ventas_resumen_diario") as batch:
+        if "uq_resumen_diario" in unicas:
+            batch.drop_constraint("uq_resumen_diario", type_="unique")
+        if bind.dialect.name == "postgresql":
+            batch.alter_column(
+                "cliente_tipo", type_=sa.String(13), postgresql_using="cliente_tipo::text"
+            )
+    op.create_index(INDICE, "ventas_resumen_diario", CLAVE, unique=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    op.execute("DELETE FROM ventas_resumen_diario")
+    op.drop_index(INDICE, table_name="ventas_resumen_diario")
+    with op.batch_alter_table("ventas_resumen_diario") as batch:
+        if bind.dialect.name == "postgresql":
+            batch.alter_column(
+                "cliente_tipo", type_=sa.Enum(TipoCliente, name="tipocliente"),
+                postgresql_using="cliente_tipo::tipocliente"
+            )
+        batch.create_unique_constraint(
+            "uq_resumen_diario", ["fecha", "estado", "vendedor_id", "cliente_tipo"]
+        )
+    with op.batch_alter_table("ventas") as batch:
+        batch.drop_column("cliente_tipo")
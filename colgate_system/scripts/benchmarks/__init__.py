@@ -0,0 +1,4 @@
+"""
+Benchmarks de rendimiento (se ejecutan como módulos desde colgate_system):
+    python -m scripts.benchmarks.<nombre> --help
+"""
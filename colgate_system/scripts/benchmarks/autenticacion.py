@@ -0,0 +1,99 @@
+"""
+Microbenchmark de la autenticación por token en cada solicitud
+
+Mide `get_usuario_actual` (decodificar el JWT y obtener el usuario) con el
+cache de usuarios autenticados y sin él (vaciándolo antes de cada llamada,
+que es lo que costaba antes: una consulta por solicitud), y la latencia de
+una solicitud completa a GET /api/auth/me en los dos casos. También cuenta
+las sentencias SQL de cada variante.
+
+Uso: python -m scripts.benchmarks.autenticacion --llamadas 5000
+"""
+import argparse
+
+from scripts.benchmarks.comun import informe, medir, por_unidad, preparar_entorno, sembrar_catalogo
+
+preparar_entorno()
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.auth import crear_token_acceso, get_usuario_actual, invalidar_usuario_cache  # noqa: E402
+
+
+def sentencias_por_llamada(funcion, llamadas: int = 100) -> float:
+    contador = [0]
+
+    def contar(*_):
+        contador[0] += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        for _ in range(llamadas):
+            funcion()
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    return contador[0] / llamadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--llamadas", type=int, default=5000, help="Llamadas por medición")
+    parser.add_argument("--solicitudes", type=int, default=1000, help="Solicitudes HTTP por medición")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    sembrar_catalogo(engine, clientes=10, productos=10)
+    token = crear_token_acceso({"sub": "bench", "rol": "admin"})
+
+    db = SessionLocal()
+
+    def con_cache():
+        get_usuario_actual(token, db)
+
+    def sin_cache():
+        invalidar_usuario_cache()
+        get_usuario_actual(token, db)
+
+    def llamadas(funcion):
+        def ejecutar():
+            for _ in range(args.llamadas):
+                funcion()
+            db.rollback()
+        return ejecutar
+
+    print(
+        f"Sentencias SQL por llamada: sin cache {sentencias_por_llamada(sin_cache):.1f}, "
+        f"con cache {sentencias_por_llamada(con_cache):.1f}"
+    )
+    por_llamada = [
+        ("sin cache", por_unidad(medir(llamadas(sin_cache), args.repeticiones), args.llamadas)),
+        ("con cache", por_unidad(medir(llamadas(con_cache), args.repeticiones), args.llamadas)),
+    ]
+    db.close()
+    informe("get_usuario_actual (ms por llamada)", por_llamada, base="sin cache", decimales=3)
+
+    cliente = TestClient(app)
+    encabezados = {"Authorization": f"Bearer {token}"}
+
+    def solicitudes(vaciar_cache: bool):
+        def ejecutar():
+            for _ in range(args.solicitudes):
+                if vaciar_cache:
+                    invalidar_usuario_cache()
+                respuesta = cliente.get("/api/auth/me", headers=encabezados)
+                assert respuesta.status_code == 200, respuesta.text
+        return ejecutar
+
+    por_solicitud = [
+        ("sin cache", por_unidad(medir(solicitudes(True), args.repeticiones), args.solicitudes)),
+        ("con cache", por_unidad(medir(solicitudes(False), args.repeticiones), args.solicitudes)),
+    ]
+    informe("GET /api/auth/me (ms por solicitud)", por_solicitud, base="sin cache", decimales=3)
+
+
+if __name__ == "__main__":
+    main()
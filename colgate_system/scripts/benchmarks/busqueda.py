@@ -0,0 +1,78 @@
+"""
+Benchmark de la búsqueda de clientes con el índice de texto completo
+
+Compara la búsqueda anterior de `get_clientes` (ILIKE '%texto%' sobre
+razón social, nombre comercial, código y RUC unidos con OR, que recorre
+toda la tabla) con la actual sobre FTS5 (app/busqueda.py), para varios
+textos de búsqueda en una base con muchos clientes. Cada medición es una
+llamada completa: conteo total más la primera página.
+
+Uso: python -m scripts.benchmarks.busqueda --clientes 500000
+"""
+import argparse
+
+from scripts.benchmarks.comun import cronometro, informe, medir, preparar_entorno, sembrar_catalogo
+
+preparar_entorno()
+
+from sqlalchemy import or_  # noqa: E402
+
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.models.cliente import Cliente  # noqa: E402
+from app.services import cliente_service  # noqa: E402
+
+TEXTOS = ["quispe", "bodega flores", "farm", "huaman", "BCLI0123456"]
+
+
+def get_clientes_anterior(db, busqueda: str, limit: int = 50):
+    """get_clientes como era antes del índice de texto"""
+    query = db.query(Cliente).filter(Cliente.activo == True)  # noqa: E712
+    query = query.filter(
+        or_(
+            Cliente.razon_social.ilike(f"%{busqueda}%"),
+            Cliente.nombre_comercial.ilike(f"%{busqueda}%"),
+            Cliente.codigo.ilike(f"%{busqueda}%"),
+            Cliente.ruc.ilike(f"%{busqueda}%")
+        )
+    )
+    total = query.count()
+    return query.offset(0).limit(limit).all(), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=500_000)
+    parser.add_argument("--textos", nargs="+", default=TEXTOS)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    # Los triggers de FTS5 indexan cada cliente al insertarlo
+    with cronometro(f"Cargando {args.clientes:,} clientes (con el índice de texto)"):
+        sembrar_catalogo(engine, args.clientes, productos=1)
+
+    db = SessionLocal()
+    try:
+        for texto in args.textos:
+            _, total_anterior = get_clientes_anterior(db, texto)
+            primeros, total_actual = cliente_service.get_clientes(db, busqueda=texto, limit=50)
+            db.expunge_all()
+            print(
+                f"\n'{texto}': {total_anterior:,} coincidencias con ILIKE, {total_actual:,} con FTS5"
+                + (f"; primera: {primeros[0].razon_social}" if primeros else "")
+            )
+            informe(f"get_clientes(busqueda='{texto}'), {args.clientes:,} clientes (ms)", [
+                ("ILIKE con OR", medir(
+                    lambda: (get_clientes_anterior(db, texto), db.expunge_all()), args.repeticiones
+                )),
+                ("FTS5", medir(
+                    lambda: (cliente_service.get_clientes(db, busqueda=texto, limit=50), db.expunge_all()),
+                    args.repeticiones
+                )),
+            ], base="ILIKE con OR")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Prueba de carga HTTP con muchas solicitudes en curso
+
+Siembra una base temporal, levanta la aplicación con uvicorn en otro proceso
+y la recorre con clientes httpx asíncronos a distintos niveles de
+concurrencia (solicitudes en curso a la vez), con una mezcla de listados y
+consultas por id autenticadas. Informa solicitudes por segundo, p50, p95 y
+errores de cada nivel.
+
+Uso: python -m scripts.benchmarks.carga --concurrencia 1 8 32 64 --duracion 10
+"""
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from scripts.benchmarks.comun import (
+    cronometro, percentil, preparar_entorno, sembrar_catalogo, sembrar_ventas, DISTRITOS
+)
+
+preparar_entorno()
+
+import httpx  # noqa: E402
+
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.services import reporte_service  # noqa: E402
+from app.services.auth import crear_token_acceso  # noqa: E402
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def levantar_servidor(puerto: int, workers: int) -> subprocess.Popen:
+    """uvicorn en otro proceso, contra la misma base temporal (DATABASE_URL del entorno)"""
+    proceso = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+            "--port", str(puerto), "--workers", str(workers), "--log-level", "warning"
+        ],
+        env=os.environ.copy(), stdout=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("uvicorn terminó al iniciar")
+        try:
+            if httpx.get(f"http://127.0.0.1:{puerto}/health").status_code == 200:
+                return proceso
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise RuntimeError("uvicorn no respondió en 60 s")
+
+
+def mezcla(clientes: int, productos: int, ordenes: int):
+    """Devuelve una función que elige la siguiente URL a pedir"""
+    azar = random.Random(3)
+    hasta = datetime.utcnow()
+    desde = hasta - timedelta(days=1)
+    urls = [
+        lambda: "/api/productos?limit=50",
+        lambda: f"/api/productos/{azar.randint(1, productos)}",
+        lambda: f"/api/clientes?limit=50&distrito={azar.choice(DISTRITOS)}",
+        lambda: f"/api/clientes/{azar.randint(1, clientes)}",
+        lambda: f"/api/ventas?limit=50&cliente_id={azar.randint(1, clientes)}",
+        lambda: f"/api/ventas/{azar.randint(1, ordenes)}",
+        lambda: f"/api/ventas/resumen?fecha_desde={desde:%Y-%m-%dT%H:%M:%S}&fecha_hasta={hasta:%Y-%m-%dT%H:%M:%S}",
+        lambda: f"/api/inventario/producto/{azar.randint(1, productos)}/total",
+    ]
+    return lambda: azar.choice(urls)()
+
+
+async def nivel(base: str, token: str, concurrencia: int, duracion: float, siguiente_url) -> dict:
+    """`concurrencia` clientes pidiendo sin pausa durante `duracion` segundos"""
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    latencias, errores = [], [0]
+    async with httpx.AsyncClient(
+        base_url=base, headers={"Authorization": f"Bearer {token}"}, limits=limites, timeout=60
+    ) as cliente:
+        fin = time.perf_counter() + duracion
+
+        async def trabajar():
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                try:
+                    respuesta = await cliente.get(siguiente_url())
+                    if respuesta.status_code != 200:
+                        errores[0] += 1
+                except httpx.TransportError:
+                    errores[0] += 1
+                latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajar() for _ in range(concurrencia)))
+        transcurrido = time.perf_counter() - inicio
+
+    return {
+        "por_segundo": len(latencias) / transcurrido,
+        "p50": percentil(latencias, 50),
+        "p95": percentil(latencias, 95),
+        "errores": errores[0],
+        "solicitudes": len(latencias),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrencia", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos por nivel de concurrencia")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de uvicorn")
+    parser.add_argument("--ordenes", type=int, default=50_000)
+    parser.add_argument("--clientes", type=int, default=5000)
+    parser.add_argument("--productos", type=int, default=200)
+    args = parser.parse_args()
+
+    init_db()
+    sembrar_catalogo(engine, args.clientes, args.productos)
+    sembrar_ventas(engine, args.ordenes, 90, args.clientes, args.productos)
+    db = SessionLocal()
+    try:
+        with cronometro("Reconstruyendo el resumen diario"):
+            reporte_service.reconstruir_resumen_diario(db)
+    finally:
+        db.close()
+
+    token = crear_token_acceso({"sub": "bench", "rol": "admin"})
+    puerto = puerto_libre()
+    servidor = levantar_servidor(puerto, args.workers)
+    try:
+        base = f"http://127.0.0.1:{puerto}"
+        siguiente_url = mezcla(args.clientes, args.productos, args.ordenes)
+        asyncio.run(nivel(base, token, 4, 2, siguiente_url))  # calentamiento
+        print(f"\n{args.duracion:g} s por nivel, {args.workers} proceso(s) de uvicorn")
+        print(f"  {'concurrencia':>12}{'solicitudes':>13}{'req/s':>9}{'p50':>10}{'p95':>10}{'errores':>9}")
+        for concurrencia in args.concurrencia:
+            r = asyncio.run(nivel(base, token, concurrencia, args.duracion, siguiente_url))
+            print(
+                f"  {concurrencia:>12}{r['solicitudes']:>13,}{r['por_segundo']:>9.1f}"
+                f"{r['p50'] * 1000:>8.1f}ms{r['p95'] * 1000:>8.1f}ms{r['errores']:>9}"
+            )
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
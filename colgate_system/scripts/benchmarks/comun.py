@@ -0,0 +1,181 @@
+"""
+Utilidades comunes de los benchmarks
+
+Cada benchmark trabaja sobre una base SQLite temporal con datos generados:
+`preparar_entorno()` define DATABASE_URL antes de importar `app` (que crea
+el engine al importarse), igual que tests/conftest.py, y la base se borra al
+terminar. Los tiempos se informan en milisegundos (mediana, mínimo y p95).
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+import atexit
+import itertools
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+
+def preparar_entorno(**variables: str) -> str:
+    """Apunta la aplicación a una base SQLite temporal; llamar antes de importar `app`"""
+    directorio = tempfile.mkdtemp(prefix="colgate_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{directorio}/bench.db"
+    os.environ["DISTANCIAS_DIRECTORIO"] = os.path.join(directorio, "distancias")
+    os.environ.update(variables)
+    atexit.register(shutil.rmtree, directorio, True)
+    return directorio
+
+
+def cargar(engine, tabla, filas: Iterable[dict], bloque: int = 20000) -> int:
+    """Inserta las filas en bloques (executemany), cada bloque en su transacción"""
+    total = 0
+    filas = iter(filas)
+    while True:
+        lote = list(itertools.islice(filas, bloque))
+        if not lote:
+            return total
+        with engine.begin() as conexion:
+            conexion.execute(tabla.insert(), lote)
+        total += len(lote)
+
+
+DISTRITOS = [
+    "Miraflores", "San Isidro", "Surco", "La Molina", "San Borja", "Lince", "Jesús María",
+    "Pueblo Libre", "Magdalena", "San Miguel", "Breña", "Cercado de Lima", "La Victoria",
+    "Ate", "Los Olivos", "Comas", "San Juan de Lurigancho", "Chorrillos", "Barranco", "Callao"
+]
+NOMBRES = [
+    "Bodega", "Farmacia", "Minimarket", "Distribuidora", "Botica", "Market", "Comercial",
+    "Inversiones", "Perfumería", "Autoservicio"
+]
+APELLIDOS = [
+    "Quispe", "Flores", "Sánchez", "Rodríguez", "García", "Huamán", "Chávez", "Ramírez",
+    "Mendoza", "Rojas", "Vásquez", "Castillo", "Núñez", "Gutiérrez", "Peña", "Díaz"
+]
+
+
+def sembrar_catalogo(engine, clientes: int, productos: int, semilla: int = 1):
+    """
+    Un usuario administrador (id 1), productos (ids 1..productos) y clientes
+    (ids 1..clientes) con distrito y coordenadas dentro de Lima
+    """
+    from app.models.cliente import Cliente, TipoCliente
+    from app.models.producto import Producto
+    from app.models.usuario import RolUsuario, Usuario
+
+    azar = random.Random(semilla)
+    cargar(engine, Usuario.__table__, [{
+        "username": "bench", "email": "bench@colgate.com", "hashed_password": "x",
+        "nombres": "Benchmark", "apellidos": "Colgate", "rol": RolUsuario.ADMIN
+    }])
+    cargar(engine, Producto.__table__, (
+        {
+            "codigo": f"BPRD{i:06d}", "codigo_barras": f"775{i:010d}",
+            "nombre": f"Producto {azar.choice(APELLIDOS)} {i}",
+            "precio_venta": round(azar.uniform(2, 40), 2), "stock_minimo": 10, "stock_maximo": 1000,
+            "peso": round(azar.uniform(0.1, 2), 2), "volumen": 0.001
+        }
+        for i in range(1, productos + 1)
+    ))
+    cargar(engine, Cliente.__table__, (
+        {
+            "codigo": f"BCLI{i:07d}", "ruc": f"20{i:09d}",
+            "razon_social": f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)} {i}",
+            "tipo": TipoCliente.MAYORISTA if azar.random() < 0.2 else TipoCliente.MINORISTA,
+            "distrito": azar.choice(DISTRITOS),
+            "latitud": azar.uniform(-12.20, -11.90), "longitud": azar.uniform(-77.12, -76.90)
+        }
+        for i in range(1, clientes + 1)
+    ))
+
+
+def sembrar_ventas(engine, ordenes: int, dias: int, clientes: int, productos: int, semilla: int = 7):
+    """
+    Ventas (ids 1..ordenes) del usuario 1, repartidas en los últimos `dias`
+    días con estados de una operación típica, y una línea por venta. El
+    resumen diario no se actualiza: hay que reconstruirlo después.
+    """
+    from app.models.venta import DetalleVenta, EstadoVenta, Venta
+
+    azar = random.Random(semilla)
+    ahora = datetime.utcnow()
+    estados, pesos = zip(*[
+        (EstadoVenta.ENTREGADO, 0.55), (EstadoVenta.CONFIRMADO, 0.15), (EstadoVenta.LISTO_ENVIO, 0.1),
+        (EstadoVenta.BORRADOR, 0.1), (EstadoVenta.EN_RUTA, 0.05), (EstadoVenta.CANCELADO, 0.05)
+    ])
+
+    def ventas():
+        for i in range(1, ordenes + 1):
+            creada = ahora - timedelta(seconds=azar.uniform(0, dias * 86400))
+            subtotal = round(azar.uniform(5, 500), 2)
+            yield {
+                "numero": f"BV{i:010d}", "cliente_id": azar.randint(1, clientes), "vendedor_id": 1,
+                "estado": azar.choices(estados, pesos)[0], "fecha_pedido": creada, "fecha_creacion": creada,
+                "subtotal": subtotal, "impuesto": round(subtotal * 0.18, 2), "total": round(subtotal * 1.18, 2)
+            }
+
+    with cronometro(f"Cargando {ordenes:,} ventas de los últimos {dias} días"):
+        cargar(engine, Venta.__table__, ventas())
+    with cronometro("Cargando una línea por venta"):
+        cargar(engine, DetalleVenta.__table__, (
+            {
+                "venta_id": i, "producto_id": azar.randint(1, productos), "cantidad": 1,
+                "precio_unitario": 10.0, "subtotal": 10.0
+            }
+            for i in range(1, ordenes + 1)
+        ))
+
+
+def medir(funcion: Callable[[], object], repeticiones: int = 5, calentamiento: int = 1) -> List[float]:
+    """Segundos de cada ejecución, descartando las de calentamiento"""
+    for _ in range(calentamiento):
+        funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def por_unidad(tiempos: Sequence[float], unidades: int) -> List[float]:
+    """Tiempos de mediciones que repiten una operación `unidades` veces, por operación"""
+    return [t / unidades for t in tiempos]
+
+
+def informe(
+    titulo: str, filas: List[Tuple[str, Sequence[float]]], base: Optional[str] = None, decimales: int = 2
+):
+    """
+    Imprime mediana, mínimo y p95 (ms) de cada medición; con `base` agrega
+    cuántas veces más rápida es cada una que la medición de ese nombre
+    """
+    print(f"\n{titulo}")
+    medianas = {nombre: statistics.median(tiempos) for nombre, tiempos in filas}
+    ancho = max(len(nombre) for nombre, _ in filas)
+    print(f"  {'':{ancho}}  {'mediana':>10}  {'mínimo':>10}  {'p95':>10}" + ("  aceleración" if base else ""))
+    for nombre, tiempos in filas:
+        linea = (
+            f"  {nombre:{ancho}}  {medianas[nombre] * 1000:10.{decimales}f}  {min(tiempos) * 1000:10.{decimales}f}"
+            f"  {percentil(tiempos, 95) * 1000:10.{decimales}f}"
+        )
+        if base:
+            linea += f"  {medianas[base] / medianas[nombre]:10.1f}x"
+        print(linea)
+
+
+@contextmanager
+def cronometro(texto: str):
+    """`with cronometro("Cargando ventas"):` imprime cuánto tardó el bloque"""
+    print(f"{texto}...", end=" ", flush=True)
+    inicio = time.perf_counter()
+    yield
+    print(f"{time.perf_counter() - inicio:.1f} s")
@@ -0,0 +1,141 @@
+"""
+Benchmark del dashboard de reportes sobre una base con muchas ventas
+
+Compara la forma anterior de calcular los indicadores de ventas del
+dashboard (cargar como objetos las ventas de 30 y 7 días y sumarlas en
+Python, más una consulta por cada uno de los últimos 7 días) con la actual,
+que lee el resumen diario en una consulta agrupada. También mide el
+dashboard completo (`_calcular_dashboard`, sin el cache de respuestas).
+
+Uso: python -m scripts.benchmarks.dashboard --ordenes 1000000
+"""
+from datetime import datetime, timedelta
+import argparse
+import tracemalloc
+
+from scripts.benchmarks.comun import (
+    cronometro, informe, medir, preparar_entorno, sembrar_catalogo, sembrar_ventas
+)
+
+preparar_entorno()
+
+from sqlalchemy import func  # noqa: E402
+
+from app import fechas  # noqa: E402
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.models.venta import EstadoVenta, Venta  # noqa: E402
+from app.routers.reportes import _calcular_dashboard  # noqa: E402
+from app.services import reporte_service  # noqa: E402
+
+
+def sembrar(ordenes: int, dias: int, clientes: int, productos: int):
+    sembrar_catalogo(engine, clientes, productos)
+    sembrar_ventas(engine, ordenes, dias, clientes, productos)
+    db = SessionLocal()
+    try:
+        with cronometro("Reconstruyendo el resumen diario"):
+            reporte_service.reconstruir_resumen_diario(db)
+    finally:
+        db.close()
+
+
+def ventas_dashboard_anterior(db) -> dict:
+    """Indicadores de ventas del dashboard como se calculaban antes del resumen diario"""
+    hoy = datetime.now().date()
+    hace_30_dias = hoy - timedelta(days=30)
+    hace_7_dias = hoy - timedelta(days=7)
+
+    ventas_mes = db.query(Venta).filter(
+        func.date(Venta.fecha_creacion) >= hace_30_dias,
+        Venta.estado != EstadoVenta.CANCELADO
+    ).all()
+    ventas_semana = db.query(Venta).filter(
+        func.date(Venta.fecha_creacion) >= hace_7_dias,
+        Venta.estado != EstadoVenta.CANCELADO
+    ).all()
+
+    ventas_por_dia = []
+    for i in range(7):
+        fecha = hoy - timedelta(days=6 - i)
+        ventas_dia = db.query(Venta).filter(
+            func.date(Venta.fecha_creacion) == fecha,
+            Venta.estado != EstadoVenta.CANCELADO
+        ).all()
+        ventas_por_dia.append({
+            "fecha": fecha.strftime("%d/%m"),
+            "cantidad": len(ventas_dia),
+            "total": sum(v.total for v in ventas_dia)
+        })
+
+    ventas_por_estado = db.query(Venta.estado, func.count(Venta.id)).filter(
+        func.date(Venta.fecha_creacion) >= hace_30_dias
+    ).group_by(Venta.estado).all()
+
+    return {
+        "ventas_mes": len(ventas_mes),
+        "ingresos_mes": sum(v.total for v in ventas_mes),
+        "ingresos_semana": sum(v.total for v in ventas_semana),
+        "ventas_por_dia": ventas_por_dia,
+        "ventas_por_estado": [{"estado": e.value, "cantidad": c} for e, c in ventas_por_estado]
+    }
+
+
+def ventas_dashboard_actual(db) -> dict:
+    return reporte_service.get_resumen_dashboard(db, fechas.hoy())
+
+
+def en_sesion_nueva(funcion):
+    """Cada ejecución con su sesión, como una solicitud (sin objetos ya cargados)"""
+    def ejecutar():
+        db = SessionLocal()
+        try:
+            return funcion(db)
+        finally:
+            db.close()
+    return ejecutar
+
+
+def memoria_pico_mb(funcion) -> float:
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ordenes", type=int, default=1_000_000)
+    parser.add_argument("--dias", type=int, default=90, help="Días hacia atrás en que se reparten las ventas")
+    parser.add_argument("--clientes", type=int, default=5000)
+    parser.add_argument("--productos", type=int, default=200)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    sembrar(args.ordenes, args.dias, args.clientes, args.productos)
+
+    anterior = en_sesion_nueva(ventas_dashboard_anterior)
+    actual = en_sesion_nueva(ventas_dashboard_actual)
+    completo = en_sesion_nueva(_calcular_dashboard)
+
+    a, b = anterior(), actual()
+    print(
+        f"\nVentas de 30 días: anterior {a['ventas_mes']:,} (días UTC) / actual {b['ventas_mes']:,} "
+        f"(días de {fechas.ZONA_NEGOCIO.key}); ingresos {a['ingresos_mes']:,.2f} / {b['ingresos_mes']:,.2f}"
+    )
+
+    informe(f"Dashboard con {args.ordenes:,} ventas (ms)", [
+        ("ventas, forma anterior", medir(anterior, max(1, args.repeticiones // 2))),
+        ("ventas, resumen diario", medir(actual, args.repeticiones * 4)),
+        ("dashboard completo", medir(completo, args.repeticiones)),
+    ], base="ventas, forma anterior")
+
+    print("\nMemoria pico (MB)")
+    print(f"  ventas, forma anterior  {memoria_pico_mb(anterior):10.1f}")
+    print(f"  ventas, resumen diario  {memoria_pico_mb(actual):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de la creación de envíos en lote
+
+Compara crear los envíos de todas las ventas listas para envío con
+`crear_envio_para_venta` (una llamada y un commit por venta, como al usar
+POST /api/logistica/envios/venta/{venta_id} en un bucle) con
+`crear_envios_lote` (POST /api/logistica/envios/lote: una consulta, códigos
+reservados en bloque, inserción en bloque y un solo commit). Antes de cada
+medición se borran los envíos creados por la anterior.
+
+Uso: python -m scripts.benchmarks.envios_lote --ventas 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from scripts.benchmarks.comun import (
+    DISTRITOS, cargar, cronometro, informe, preparar_entorno, sembrar_catalogo
+)
+
+preparar_entorno()
+
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.models.logistica import Envio, ZonaReparto  # noqa: E402
+from app.models.venta import EstadoVenta, Venta  # noqa: E402
+from app.schemas.logistica import EnvioLoteRequest  # noqa: E402
+from app.services import logistica_service  # noqa: E402
+
+
+def sembrar(ventas: int, clientes: int):
+    sembrar_catalogo(engine, clientes, productos=1)
+    cargar(engine, ZonaReparto.__table__, (
+        {"codigo": f"BZON{i + 1:02d}", "nombre": f"Zona {i + 1}", "distritos": ",".join(DISTRITOS[i::4])}
+        for i in range(4)
+    ))
+    azar = random.Random(13)
+    cargar(engine, Venta.__table__, (
+        {
+            "numero": f"BL{i:010d}", "cliente_id": azar.randint(1, clientes), "vendedor_id": 1,
+            "estado": EstadoVenta.LISTO_ENVIO, "subtotal": 10.0, "impuesto": 1.8, "total": 11.8
+        }
+        for i in range(1, ventas + 1)
+    ))
+
+
+def medir_creacion(crear, repeticiones: int, ventas: int):
+    """Segundos de cada creación completa, empezando siempre sin envíos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        with engine.begin() as conexion:
+            conexion.execute(Envio.__table__.delete())
+        db = SessionLocal()
+        try:
+            inicio = time.perf_counter()
+            crear(db)
+            tiempos.append(time.perf_counter() - inicio)
+            assert db.query(Envio).count() == ventas
+        finally:
+            db.close()
+    return tiempos
+
+
+def uno_por_venta(db):
+    for (venta_id,) in db.query(Venta.id).filter(Venta.estado == EstadoVenta.LISTO_ENVIO).order_by(Venta.id).all():
+        logistica_service.crear_envio_para_venta(db, venta_id)
+
+
+def en_lote(db):
+    return logistica_service.crear_envios_lote(db, EnvioLoteRequest())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ventas", type=int, default=5000, help="Ventas listas para envío")
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    init_db()
+    with cronometro(f"Sembrando {args.ventas:,} ventas listas para envío"):
+        sembrar(args.ventas, args.clientes)
+
+    db = SessionLocal()
+    try:
+        print(f"Envíos por zona: {en_lote(db)['por_zona']}")
+    finally:
+        db.close()
+
+    filas = [
+        ("un envío por llamada", medir_creacion(uno_por_venta, args.repeticiones, args.ventas)),
+        ("crear_envios_lote", medir_creacion(en_lote, args.repeticiones, args.ventas)),
+    ]
+    informe(f"Crear los envíos de {args.ventas:,} ventas (ms)", filas, base="un envío por llamada")
+    for nombre, tiempos in filas:
+        print(f"  {nombre}: {args.ventas / statistics.median(tiempos):,.0f} envíos/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark de lecturas concurrentes mientras se confirman ventas (SQLite)
+
+Hilos lectores consultan ventas y stock mientras hilos escritores confirman
+ventas (reserva de inventario y resumen diario en una transacción). Mide
+lecturas por segundo y su latencia, primero sin escritores y luego con
+ellos, además de las confirmaciones por segundo. Compara la configuración
+actual (WAL, synchronous=NORMAL) con el journal por defecto de SQLite
+(DELETE, synchronous=FULL): cada variante corre en un proceso propio porque
+los PRAGMAs se leen de la configuración al crear el engine.
+
+Uso: python -m scripts.benchmarks.escritura_lectura --lectores 4 --escritores 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from scripts.benchmarks.comun import cargar, percentil, preparar_entorno, sembrar_catalogo, sembrar_ventas
+
+preparar_entorno()
+
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.models.inventario import Almacen, Inventario  # noqa: E402
+from app.models.venta import DetalleVenta, EstadoVenta, Venta  # noqa: E402
+from app.services import inventario_service, reporte_service, venta_service  # noqa: E402
+
+VARIANTES = [
+    {"SQLITE_WAL": "true", "SQLITE_SYNCHRONOUS": "NORMAL"},
+    {"SQLITE_WAL": "false", "SQLITE_SYNCHRONOUS": "FULL"},
+]
+
+
+def sembrar(args) -> range:
+    """Datos de lectura más `--confirmaciones` ventas en borrador; devuelve sus ids"""
+    sembrar_catalogo(engine, args.clientes, args.productos)
+    sembrar_ventas(engine, args.ordenes, 90, args.clientes, args.productos)
+    cargar(engine, Almacen.__table__, [{"codigo": "BALM01", "nombre": "Almacén benchmark"}])
+    cargar(engine, Inventario.__table__, (
+        {
+            "producto_id": p, "almacen_id": 1, "stock_actual": 10 ** 7,
+            "stock_reservado": 0, "stock_disponible": 10 ** 7
+        }
+        for p in range(1, args.productos + 1)
+    ))
+    azar = random.Random(11)
+    primera = args.ordenes + 1
+    borradores = range(primera, primera + args.confirmaciones)
+    cargar(engine, Venta.__table__, (
+        {
+            "numero": f"BB{i:010d}", "cliente_id": azar.randint(1, args.clientes), "vendedor_id": 1,
+            "estado": EstadoVenta.BORRADOR, "subtotal": 30.0, "impuesto": 5.4, "total": 35.4
+        }
+        for i in borradores
+    ))
+    cargar(engine, DetalleVenta.__table__, (
+        {
+            "venta_id": i, "producto_id": azar.randint(1, args.productos), "cantidad": 3,
+            "precio_unitario": 10.0, "subtotal": 30.0
+        }
+        for i in borradores
+        for _ in range(3)
+    ))
+    db = SessionLocal()
+    try:
+        reporte_service.reconstruir_resumen_diario(db)
+    finally:
+        db.close()
+    return borradores
+
+
+def lecturas(args, duracion: float, detener: threading.Event) -> dict:
+    """Lectores en bucle durante `duracion` segundos (o hasta `detener`)"""
+    latencias, errores = [], []
+    fin = time.perf_counter() + duracion
+
+    def leer(semilla: int):
+        azar = random.Random(semilla)
+        db = SessionLocal()
+        try:
+            while time.perf_counter() < fin and not detener.is_set():
+                inicio = time.perf_counter()
+                try:
+                    venta_service.get_ventas(db, limit=20, cliente_id=azar.randint(1, args.clientes))
+                    inventario_service.get_stock_disponible_producto(db, azar.randint(1, args.productos))
+                except Exception as e:
+                    errores.append(e)
+                db.rollback()
+                latencias.append(time.perf_counter() - inicio)
+        finally:
+            db.close()
+
+    hilos = [threading.Thread(target=leer, args=(i,)) for i in range(args.lectores)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+    return {
+        "por_segundo": len(latencias) / transcurrido,
+        "p50": percentil(latencias, 50), "p95": percentil(latencias, 95), "max": max(latencias),
+        "errores": len(errores)
+    }
+
+
+def confirmaciones(borradores: range, escritores: int, detener: threading.Event) -> dict:
+    """Escritores confirmando las ventas en borrador hasta agotarlas (o hasta `detener`)"""
+    pendientes = iter(borradores)
+    turno = threading.Lock()
+    hechas, errores = [0], []
+
+    def escribir():
+        db = SessionLocal()
+        try:
+            while not detener.is_set():
+                with turno:
+                    venta_id = next(pendientes, None)
+                if venta_id is None:
+                    return
+                try:
+                    venta_service.confirmar_venta(db, venta_id, 1, 1)
+                    hechas[0] += 1
+                except Exception as e:
+                    db.rollback()
+                    errores.append(e)
+        finally:
+            db.close()
+
+    hilos = [threading.Thread(target=escribir) for _ in range(escritores)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return {"por_segundo": hechas[0] / (time.perf_counter() - inicio), "errores": len(errores)}
+
+
+def ejecutar_variante(args):
+    init_db()
+    with contextlib.redirect_stdout(io.StringIO()):
+        borradores = sembrar(args)
+    sin_escritores = lecturas(args, args.duracion, threading.Event())
+
+    detener = threading.Event()
+    escritura = {}
+    escritores = threading.Thread(
+        target=lambda: escritura.update(confirmaciones(borradores, args.escritores, detener))
+    )
+    escritores.start()
+    try:
+        con_escritores = lecturas(args, args.duracion, threading.Event())
+    finally:
+        detener.set()
+        escritores.join()
+
+    with engine.connect() as conexion:
+        modo = conexion.exec_driver_sql("PRAGMA journal_mode").scalar()
+    for nombre, r in (("sin escritores", sin_escritores), ("confirmando ventas", con_escritores)):
+        print(
+            f"  {modo + ', synchronous=' + settings.SQLITE_SYNCHRONOUS:26}{nombre:20}{r['por_segundo']:>10.1f}"
+            f"{r['p50'] * 1000:>8.1f}ms{r['p95'] * 1000:>8.1f}ms{r['max'] * 1000:>9.1f}ms{r['errores']:>9}"
+        )
+    print(
+        f"  {'':26}{'confirmaciones/s':20}{escritura['por_segundo']:>10.1f}"
+        f"{'':30}{escritura['errores']:>9}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lectores", type=int, default=4)
+    parser.add_argument("--escritores", type=int, default=4)
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos de lectura por medición")
+    parser.add_argument("--confirmaciones", type=int, default=20000, help="Ventas en borrador a confirmar")
+    parser.add_argument("--ordenes", type=int, default=100_000)
+    parser.add_argument("--clientes", type=int, default=5000)
+    parser.add_argument("--productos", type=int, default=200)
+    parser.add_argument("--variante", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variante:
+        ejecutar_variante(args)
+        return
+
+    print(f"{args.lectores} lectores, {args.escritores} escritores, {args.duracion:g} s por medición")
+    print(f"\n  {'':26}{'':20}{'lecturas/s':>10}{'p50':>10}{'p95':>10}{'máx':>11}{'errores':>9}")
+    for entorno in VARIANTES:
+        subprocess.run(
+            [sys.executable, "-m", "scripts.benchmarks.escritura_lectura", "--variante", *sys.argv[1:]],
+            env={**os.environ, **entorno}, check=True
+        )
+
+
+if __name__ == "__main__":
+    main()
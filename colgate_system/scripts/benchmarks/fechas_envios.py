@@ -0,0 +1,127 @@
+"""
+Benchmark de filtros por día sobre una tabla de envíos grande
+
+Compara los filtros anteriores por día (`func.date(fecha_programada) == dia`,
+que obliga a recorrer la tabla completa) con los rangos semiabiertos de
+app/fechas.py, que usan los índices sobre fecha_programada, en tres consultas
+de logística: contar los envíos del día, los pendientes de hoy y la primera
+página del listado de un día. Imprime también el plan de SQLite de cada una.
+
+Uso: python -m scripts.benchmarks.fechas_envios --envios 5000000
+"""
+from datetime import datetime, time, timedelta
+import argparse
+import random
+
+from scripts.benchmarks.comun import cargar, cronometro, informe, medir, preparar_entorno
+
+preparar_entorno()
+
+from sqlalchemy import func  # noqa: E402
+
+from app import fechas  # noqa: E402
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.models.logistica import EstadoEnvio, Envio  # noqa: E402
+from app.services import logistica_service  # noqa: E402
+
+PENDIENTES = [EstadoEnvio.PENDIENTE, EstadoEnvio.ASIGNADO]
+
+
+def sembrar(envios: int, dias: int):
+    """
+    Envíos con fecha programada repartida en `dias` días alrededor de hoy; los
+    pasados casi todos entregados. venta_id es único pero sin ventas reales:
+    SQLite no verifica las claves foráneas (no se activa PRAGMA foreign_keys).
+    """
+    azar = random.Random(5)
+    hoy = fechas.hoy()
+    desde = datetime.combine(hoy - timedelta(days=dias - 30), time(7))
+
+    def filas():
+        for i in range(1, envios + 1):
+            programada = desde + timedelta(days=azar.randrange(dias), minutes=azar.randrange(12 * 60))
+            if programada.date() < hoy:
+                estado = EstadoEnvio.ENTREGADO if azar.random() < 0.95 else EstadoEnvio.NO_ENTREGADO
+            else:
+                estado = azar.choice(PENDIENTES)
+            yield {
+                "codigo": f"BENV{i:09d}", "venta_id": i, "estado": estado,
+                "fecha_programada": programada, "fecha_creacion": programada - timedelta(days=1)
+            }
+
+    with cronometro(f"Cargando {envios:,} envíos en {dias} días"):
+        cargar(engine, Envio.__table__, filas(), bloque=50000)
+    with cronometro("ANALYZE"):
+        with engine.begin() as conexion:
+            conexion.exec_driver_sql("ANALYZE")
+
+
+def consultas(dia):
+    """(nombre, forma anterior, forma actual) de cada consulta, como funciones de la sesión"""
+    por_fecha = func.date(Envio.fecha_programada) == dia
+    del_dia = fechas.en_rango(Envio.fecha_programada, fechas.rango_dia_local(dia))
+    return [
+        (
+            "envíos del día (conteo)",
+            lambda db: db.query(func.count(Envio.id)).filter(por_fecha),
+            lambda db: db.query(func.count(Envio.id)).filter(del_dia),
+        ),
+        (
+            "pendientes de hoy",
+            lambda db: db.query(Envio).filter(Envio.estado.in_(PENDIENTES), por_fecha),
+            lambda db: db.query(Envio).filter(Envio.estado.in_(PENDIENTES), del_dia),
+        ),
+        (
+            "listado del día, 100 primeros",
+            lambda db: db.query(Envio).filter(por_fecha).order_by(Envio.fecha_programada).limit(100),
+            lambda db: db.query(Envio).filter(del_dia).order_by(Envio.fecha_programada).limit(100),
+        ),
+    ]
+
+
+def plan(db, query) -> str:
+    compilada = query.statement.compile(engine, compile_kwargs={"literal_binds": True})
+    filas = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compilada}").fetchall()
+    return "; ".join(fila[-1] for fila in filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--envios", type=int, default=5_000_000)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    sembrar(args.envios, args.dias)
+
+    db = SessionLocal()
+    try:
+        hoy = fechas.hoy()
+        for nombre, anterior, actual in consultas(hoy):
+            filas_anterior, filas_actual = anterior(db).all(), actual(db).all()
+            assert len(filas_anterior) == len(filas_actual)
+            print(f"\n{nombre}")
+            print(f"  plan anterior: {plan(db, anterior(db))}")
+            print(f"  plan actual:   {plan(db, actual(db))}")
+            db.expunge_all()
+            informe(f"{nombre}, {len(filas_actual):,} filas (ms)", [
+                ("func.date(...) == día", medir(lambda: (anterior(db).all(), db.expunge_all()), args.repeticiones)),
+                ("rango [inicio, fin)", medir(lambda: (actual(db).all(), db.expunge_all()), args.repeticiones)),
+            ], base="func.date(...) == día")
+
+        # Los servicios tal como los llaman los endpoints
+        informe("Servicios de logística con la forma actual (ms)", [
+            ("get_envios(fecha=hoy)", medir(
+                lambda: (logistica_service.get_envios(db, fecha=hoy, limit=100), db.expunge_all()), args.repeticiones
+            )),
+            ("get_envios_pendientes_hoy", medir(
+                lambda: (logistica_service.get_envios_pendientes_hoy(db), db.expunge_all()), args.repeticiones
+            )),
+        ])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de throughput de /api/auth/login con logins concurrentes
+
+Lanza logins con distintos niveles de concurrencia contra la aplicación (en
+proceso, con httpx sobre ASGI) y, al mismo tiempo, consulta GET /health cada
+pocos milisegundos para medir cuánto espera una solicitud cualquiera mientras
+se verifican passwords. Compara la verificación en el pool de hashing con la
+forma anterior (bcrypt síncrono dentro del handler, en el event loop).
+
+Uso: python -m scripts.benchmarks.login --logins 32 --concurrencia 1 4 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from scripts.benchmarks.comun import percentil, preparar_entorno, sembrar_catalogo
+
+preparar_entorno()
+
+import httpx  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.usuario import Usuario  # noqa: E402
+from app.routers import auth as auth_router  # noqa: E402
+from app.services import auth  # noqa: E402
+
+PASSWORD = "bench12345"
+
+
+async def autenticar_usuario_anterior(db, username: str, password: str):
+    """Como antes del pool de hashing: consulta y bcrypt síncronos en el event loop"""
+    usuario = db.query(Usuario).filter(Usuario.username == username).first()
+    if not usuario or not auth.verificar_password(password, usuario.hashed_password):
+        return None
+    return usuario if usuario.activo else None
+
+
+async def ronda(logins: int, concurrencia: int) -> dict:
+    """Ejecuta `logins` logins con a lo sumo `concurrencia` en curso, sondeando /health"""
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        semaforo = asyncio.Semaphore(concurrencia)
+        tiempos_login, tiempos_sonda = [], []
+        terminado = asyncio.Event()
+
+        async def login():
+            async with semaforo:
+                inicio = time.perf_counter()
+                respuesta = await cliente.post(
+                    "/api/auth/login", data={"username": "bench", "password": PASSWORD}
+                )
+                assert respuesta.status_code == 200, respuesta.text
+                tiempos_login.append(time.perf_counter() - inicio)
+
+        async def sondear():
+            # La latencia se cuenta desde el momento en que tocaba enviar la sonda:
+            # si el event loop está bloqueado, la espera hasta poder enviarla también cuenta
+            prevista = time.perf_counter()
+            while not terminado.is_set():
+                await asyncio.sleep(max(0.0, prevista - time.perf_counter()))
+                await cliente.get("/health")
+                fin = time.perf_counter()
+                tiempos_sonda.append(fin - prevista)
+                prevista = fin + 0.01
+
+        sonda = asyncio.create_task(sondear())
+        inicio = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        duracion = time.perf_counter() - inicio
+        terminado.set()
+        await sonda
+
+    return {
+        "por_segundo": logins / duracion,
+        "login_p50": statistics.median(tiempos_login),
+        "login_p95": percentil(tiempos_login, 95),
+        "sonda_p50": statistics.median(tiempos_sonda),
+        "sonda_max": max(tiempos_sonda),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32, help="Logins por ronda")
+    parser.add_argument("--concurrencia", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    init_db()
+    sembrar_catalogo(engine, clientes=1, productos=1)
+    db = SessionLocal()
+    db.query(Usuario).filter(Usuario.id == 1).update({Usuario.hashed_password: auth.get_password_hash(PASSWORD)})
+    db.commit()
+    db.close()
+
+    variantes = [
+        (f"pool de hashing ({settings.HASH_WORKERS} hilos)", auth.autenticar_usuario),
+        ("bcrypt en el event loop", autenticar_usuario_anterior),
+    ]
+    print(f"{args.logins} logins por ronda, bcrypt con {settings.BCRYPT_ROUNDS} rondas")
+    print(
+        f"\n  {'':28}{'concurrencia':>13}{'logins/s':>10}{'login p50':>11}{'login p95':>11}"
+        f"{'/health p50':>13}{'/health máx':>13}"
+    )
+    for nombre, autenticar in variantes:
+        auth_router.autenticar_usuario = autenticar
+        asyncio.run(ronda(2, 1))  # calentamiento
+        for concurrencia in args.concurrencia:
+            r = asyncio.run(ronda(args.logins, concurrencia))
+            print(
+                f"  {nombre:28}{concurrencia:>13}{r['por_segundo']:>10.1f}{r['login_p50'] * 1000:>9.0f}ms"
+                f"{r['login_p95'] * 1000:>9.0f}ms{r['sonda_p50'] * 1000:>11.1f}ms{r['sonda_max'] * 1000:>11.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
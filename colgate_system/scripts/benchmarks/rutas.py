@@ -0,0 +1,168 @@
+"""
+Benchmark del optimizador de rutas con capacidad
+
+Mide `ruteo.optimizar` (ahorros de Clarke-Wright más 2-opt/or-opt) con
+paradas al azar dentro de Lima, en el plano aproximado y con una matriz de
+distancias completa, y compara los km recorridos con las rutas armadas en
+el orden recibido (como hacía crear_ruta). Luego mide el servicio completo
+`optimizar_rutas` (consulta de envíos pendientes, rutas y asignación de
+vehículos) sobre una base con esos envíos, simulando y guardando.
+
+Uso: python -m scripts.benchmarks.rutas --paradas 2000
+"""
+import argparse
+import random
+
+from scripts.benchmarks.comun import cargar, cronometro, informe, medir, preparar_entorno, sembrar_catalogo
+
+preparar_entorno()
+
+from app import distancias, fechas, ruteo  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, engine, init_db  # noqa: E402
+from app.models.cliente import Cliente  # noqa: E402
+from app.models.inventario import Almacen  # noqa: E402
+from app.models.logistica import Conductor, EstadoEnvio, Envio, Vehiculo  # noqa: E402
+from app.models.producto import Producto  # noqa: E402
+from app.models.venta import DetalleVenta, EstadoVenta, Venta  # noqa: E402
+from app.schemas.logistica import RutaOptimizarRequest  # noqa: E402
+from app.services import logistica_service  # noqa: E402
+
+ORIGEN = (settings.DEPOSITO_LATITUD, settings.DEPOSITO_LONGITUD)
+
+
+def paradas_al_azar(cantidad: int, semilla: int = 21):
+    azar = random.Random(semilla)
+    return [
+        ruteo.Parada(i, azar.uniform(-12.20, -11.90), azar.uniform(-77.12, -76.90), peso=round(azar.uniform(5, 60), 1))
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def en_orden_recibido(paradas, capacidad: ruteo.Capacidad):
+    """Rutas llenadas en el orden de las paradas hasta la capacidad, sin reordenar"""
+    rutas, actual, carga = [], [], 0.0
+    for parada in paradas:
+        if actual and carga + parada.peso > capacidad.peso:
+            rutas.append(actual)
+            actual, carga = [], 0.0
+        actual.append(parada)
+        carga += parada.peso
+    return rutas + ([actual] if actual else [])
+
+
+def matriz_completa(paradas):
+    """Distancias haversine entre el depósito (nodo 0) y todas las paradas"""
+    latitudes = [ORIGEN[0]] + [p.latitud for p in paradas]
+    longitudes = [ORIGEN[1]] + [p.longitud for p in paradas]
+    return distancias.haversine_km(
+        [[lat] for lat in latitudes], [[lon] for lon in longitudes], [latitudes], [longitudes]
+    ).tolist()
+
+
+def km(rutas, matriz, indice) -> float:
+    """Km recorridos por las rutas según la matriz (indice: id de parada -> nodo)"""
+    total = 0.0
+    for ruta in rutas:
+        nodos = [0] + [indice[p.id] for p in ruta] + [0]
+        total += sum(matriz[a][b] for a, b in zip(nodos, nodos[1:]))
+    return total
+
+
+def sembrar_envios(paradas, vehiculos: int, capacidad_kg: float):
+    """Un cliente, una venta lista para envío y un envío pendiente por parada; flota con conductores"""
+    sembrar_catalogo(engine, clientes=1, productos=1)
+    cargar(engine, Almacen.__table__, [{
+        "codigo": "BALM01", "nombre": "Almacén benchmark", "latitud": ORIGEN[0], "longitud": ORIGEN[1]
+    }])
+    # sembrar_catalogo ya creó el cliente 1: las paradas usan los ids siguientes
+    cargar(engine, Cliente.__table__, (
+        {
+            "codigo": f"BRCL{p.id:07d}", "razon_social": f"Cliente ruta {p.id}",
+            "latitud": p.latitud, "longitud": p.longitud
+        }
+        for p in paradas
+    ))
+    cargar(engine, Venta.__table__, (
+        {
+            "numero": f"BR{p.id:010d}", "cliente_id": p.id + 1, "vendedor_id": 1, "estado": EstadoVenta.LISTO_ENVIO,
+            "subtotal": 10.0, "impuesto": 1.8, "total": 11.8
+        }
+        for p in paradas
+    ))
+    # El producto 1 pesa lo que indique la línea: cantidad = peso en décimas de kg
+    with engine.begin() as conexion:
+        conexion.execute(Producto.__table__.update().values(peso=0.1, volumen=0.0))
+    cargar(engine, DetalleVenta.__table__, (
+        {
+            "venta_id": i, "producto_id": 1, "cantidad": int(round(p.peso * 10)),
+            "precio_unitario": 1.0, "subtotal": 10.0
+        }
+        for i, p in enumerate(paradas, start=1)
+    ))
+    cargar(engine, Envio.__table__, (
+        {
+            "codigo": f"BRENV{i:07d}", "venta_id": i, "estado": EstadoEnvio.PENDIENTE,
+            "fecha_programada": fechas.inicio_dia_local(fechas.hoy())
+        }
+        for i in range(1, len(paradas) + 1)
+    ))
+    cargar(engine, Vehiculo.__table__, (
+        {"codigo": f"BVEH{i:04d}", "placa": f"B{i:05d}", "capacidad_peso": capacidad_kg}
+        for i in range(1, vehiculos + 1)
+    ))
+    cargar(engine, Conductor.__table__, (
+        {"codigo": f"BCON{i:04d}", "nombres": "Conductor", "apellidos": str(i), "dni": f"{i:08d}"}
+        for i in range(1, vehiculos + 1)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paradas", type=int, default=2000)
+    parser.add_argument("--capacidad", type=float, default=1500, help="Capacidad de cada vehículo en kg")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    paradas = paradas_al_azar(args.paradas)
+    capacidad = ruteo.Capacidad(peso=args.capacidad)
+    matriz = matriz_completa(paradas)
+    indice = {p.id: i for i, p in enumerate(paradas, start=1)}
+
+    recibido = en_orden_recibido(paradas, capacidad)
+    plano = ruteo.optimizar(ORIGEN, paradas, capacidad)
+    con_matriz = ruteo.optimizar(ORIGEN, paradas, capacidad, distancias=matriz)
+    print(f"{args.paradas:,} paradas, vehículos de {args.capacidad:g} kg, {sum(p.peso for p in paradas):,.0f} kg en total")
+    print(f"  orden recibido:      {len(recibido):3} rutas, {km(recibido, matriz, indice):9,.1f} km")
+    print(f"  optimizado (plano):  {len(plano):3} rutas, {km(plano, matriz, indice):9,.1f} km")
+    print(f"  optimizado (matriz): {len(con_matriz):3} rutas, {km(con_matriz, matriz, indice):9,.1f} km")
+
+    informe(f"ruteo.optimizar con {args.paradas:,} paradas, un núcleo (ms)", [
+        ("plano aproximado", medir(lambda: ruteo.optimizar(ORIGEN, paradas, capacidad), args.repeticiones)),
+        ("matriz de distancias", medir(
+            lambda: ruteo.optimizar(ORIGEN, paradas, capacidad, distancias=matriz), args.repeticiones
+        )),
+    ])
+
+    init_db()
+    vehiculos = len(plano) + 10
+    with cronometro(f"Sembrando {args.paradas:,} envíos pendientes y {vehiculos} vehículos"):
+        sembrar_envios(paradas, vehiculos, args.capacidad)
+    db = SessionLocal()
+    try:
+        simular = RutaOptimizarRequest(guardar=False)
+        resultado = logistica_service.optimizar_rutas(db, simular)
+        asignados = sum(len(r["envio_ids"]) for r in resultado["rutas"])
+        print(f"\noptimizar_rutas: {len(resultado['rutas'])} rutas, {asignados:,} envíos asignados")
+        simulaciones = medir(lambda: logistica_service.optimizar_rutas(db, simular), args.repeticiones)
+        guardado = medir(lambda: logistica_service.optimizar_rutas(db, RutaOptimizarRequest()), 1, calentamiento=0)
+        informe(f"optimizar_rutas con {args.paradas:,} envíos pendientes (ms)", [
+            ("guardar=False", simulaciones),
+            ("guardar=True", guardado),
+        ])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Configuración de pruebas: base SQLite en un archivo temporal (no en memoria,
+para que varios hilos usen conexiones propias como en producción).
+
+DATABASE_URL se define antes de importar `app`, que crea el engine al importarse.
+"""
+from contextlib import contextmanager
+import itertools
+import os
+import shutil
+import tempfile
+
+_directorio = tempfile.mkdtemp(prefix="colgate_pruebas_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_directorio}/pruebas.db"
+os.environ["DISTANCIAS_DIRECTORIO"] = os.path.join(_directorio, "distancias")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine, init_db
+from app.models.cliente import Cliente
+from app.models.inventario import Almacen, Inventario
+from app.models.logistica import Conductor, Envio, EstadoEnvio, Vehiculo
+from app.models.producto import Producto
+from app.models.usuario import Usuario, RolUsuario
+from app.models.venta import DetalleVenta, Venta, EstadoVenta
+
+
+@pytest.fixture(scope="session", autouse=True)
+def base_de_datos():
+    init_db()
+    yield engine
+    engine.dispose()
+    shutil.rmtree(_directorio, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    sesion = SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+class Fabrica:
+    """
+    Crea registros mínimos con códigos únicos. Todas las pruebas comparten la
+    base de la sesión, así que cada una trabaja con sus propios registros.
+    """
+
+    _numeros = itertools.count(1)
+
+    def __init__(self, db):
+        self.db = db
+
+    def _guardar(self, objeto):
+        self.db.add(objeto)
+        self.db.commit()
+        self.db.refresh(objeto)
+        return objeto
+
+    def numero(self) -> int:
+        return next(self._numeros)
+
+    def usuario(self) -> Usuario:
+        n = self.numero()
+        return self._guardar(Usuario(
+            username=f"prueba{n}", email=f"prueba{n}@test.local", hashed_password="x",
+            nombres="Usuario", apellidos="Prueba", rol=RolUsuario.ADMIN
+        ))
+
+    def cliente(self, **datos) -> Cliente:
+        n = self.numero()
+        return self._guardar(Cliente(codigo=f"TCLI{n:05d}", razon_social=f"Cliente prueba {n}", **datos))
+
+    def producto(self, **datos) -> Producto:
+        n = self.numero()
+        datos.setdefault("precio_venta", 10.0)
+        return self._guardar(Producto(codigo=f"TPROD{n:05d}", nombre=f"Producto prueba {n}", **datos))
+
+    def almacen(self, **datos) -> Almacen:
+        n = self.numero()
+        return self._guardar(Almacen(codigo=f"TALM{n:04d}", nombre=f"Almacén prueba {n}", **datos))
+
+    def stock(self, producto: Producto, almacen: Almacen, cantidad: int) -> Inventario:
+        return self._guardar(Inventario(
+            producto_id=producto.id, almacen_id=almacen.id,
+            stock_actual=cantidad, stock_reservado=0, stock_disponible=cantidad
+        ))
+
+    def venta(self, cliente: Cliente, estado: EstadoVenta = EstadoVenta.LISTO_ENVIO, **datos) -> Venta:
+        n = self.numero()
+        return self._guardar(Venta(
+            numero=f"TV{n:08d}", cliente_id=cliente.id, estado=estado, total=datos.pop("total", 11.8), **datos
+        ))
+
+    def detalle(self, venta: Venta, producto: Producto, cantidad: int) -> DetalleVenta:
+        return self._guardar(DetalleVenta(
+            venta_id=venta.id, producto_id=producto.id, cantidad=cantidad,
+            precio_unitario=producto.precio_venta, subtotal=producto.precio_venta * cantidad
+        ))
+
+    def vehiculo(self, **datos) -> Vehiculo:
+        n = self.numero()
+        return self._guardar(Vehiculo(codigo=f"TVEH{n:05d}", placa=f"T-{n:05d}", **datos))
+
+    def conductor(self, **datos) -> Conductor:
+        n = self.numero()
+        return self._guardar(Conductor(
+            codigo=f"TCON{n:05d}", nombres="Conductor", apellidos=f"Prueba {n}", dni=f"T{n:07d}", **datos
+        ))
+
+    def envio(self, venta: Venta, **datos) -> Envio:
+        n = self.numero()
+        datos.setdefault("estado", EstadoEnvio.PENDIENTE)
+        return self._guardar(Envio(codigo=f"TENV{n:08d}", venta_id=venta.id, **datos))
+
+
+@pytest.fixture
+def fabrica(db):
+    return Fabrica(db)
+
+
+@pytest.fixture
+def cliente_api(fabrica):
+    """Cliente HTTP de la aplicación autenticado como administrador"""
+    from app.main import app
+    from app.services.auth import get_usuario_actual
+
+    usuario = fabrica.usuario()
+    app.dependency_overrides[get_usuario_actual] = lambda: usuario
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_usuario_actual, None)
+
+
+class Consultas:
+    def __init__(self):
+        self.ejecutadas = []  # (sentencia, parámetros)
+
+    @property
+    def sentencias(self):
+        return [sentencia for sentencia, _ in self.ejecutadas]
+
+
+@pytest.fixture
+def contar_consultas():
+    """
+    Cuenta las sentencias SQL ejecutadas dentro del bloque:
+    `with contar_consultas() as consultas: ...` y luego `len(consultas.sentencias)`
+    """
+    @contextmanager
+    def contar():
+        consultas = Consultas()
+
+        def registrar(conn, cursor, sentencia, parametros, contexto, executemany):
+            consultas.ejecutadas.append((sentencia, parametros))
+
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            yield consultas
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+    return contar
@@ -0,0 +1,18 @@
+"""Alertas de stock mantenidas en memoria al modificar productos"""
+from app.schemas.producto import ProductoCreate
+from app.services import alerta_service, producto_service
+from app.services.alerta_service import TipoAlerta
+
+
+def test_producto_nuevo_entra_como_alerta_sin_stock(db, fabrica):
+    cursor = alerta_service.get_cambios(db, None)["cursor"]
+
+    producto = producto_service.crear_producto(db, ProductoCreate(
+        codigo=f"TALR{fabrica.numero():05d}", nombre="Producto sin stock"
+    ))
+
+    alertas = {a.producto_id: a.tipo for a in alerta_service.get_alertas(db)}
+    assert alertas.get(producto.id) == TipoAlerta.SIN_STOCK
+    cambios = alerta_service.get_cambios(db, cursor)
+    assert not cambios["reiniciar"]
+    assert [(c["producto_id"], c["tipo"]) for c in cambios["cambios"]] == [(producto.id, "sin_stock")]
@@ -0,0 +1,69 @@
+"""Recarga del índice de autocompletado: única, en segundo plano y sin perder cambios"""
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import threading
+import time
+
+from app.autocompletado import IndicePrefijos, _entrada_producto
+
+
+def _producto(id, nombre):
+    return SimpleNamespace(
+        id=id, codigo=f"P{id:03d}", codigo_barras=None, nombre=nombre, precio_venta=1.0, activo=True
+    )
+
+
+class CargaControlada:
+    """Función de carga que cuenta sus llamadas y puede quedar detenida"""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.llamadas = 0
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def __call__(self, db):
+        self.llamadas += 1
+        self.liberar.wait(10)
+        return list(self.filas)
+
+
+def _ids(indice, texto):
+    return [r["id"] for r in indice.buscar(None, texto, 10)]
+
+
+def test_primera_carga_unica_con_solicitudes_simultaneas():
+    carga = CargaControlada([_producto(1, "Crema Colgate")])
+    carga.liberar.clear()
+    indice = IndicePrefijos("prueba", carga, _entrada_producto, ttl_segundos=600)
+
+    with ThreadPoolExecutor(10) as ejecutor:
+        busquedas = [ejecutor.submit(_ids, indice, "crema") for _ in range(10)]
+        time.sleep(0.1)
+        carga.liberar.set()
+        assert all(b.result() == [1] for b in busquedas)
+    assert carga.llamadas == 1
+
+
+def test_recarga_en_segundo_plano_conserva_el_indice_y_los_cambios():
+    carga = CargaControlada([_producto(1, "Crema Colgate")])
+    indice = IndicePrefijos("prueba", carga, _entrada_producto, ttl_segundos=0)
+    assert _ids(indice, "crema") == [1]
+
+    # Vencido: las búsquedas responden con el índice anterior mientras una sola recarga está detenida
+    carga.liberar.clear()
+    carga.filas = [_producto(1, "Crema Colgate"), _producto(2, "Crema Palmolive")]
+    with ThreadPoolExecutor(10) as ejecutor:
+        resultados = list(ejecutor.map(lambda _: _ids(indice, "crema"), range(50)))
+    assert all(r == [1] for r in resultados)
+    assert carga.llamadas == 2
+
+    # Un cambio durante la recarga se ve de inmediato y sobrevive al reemplazo del índice
+    indice.actualizar(_producto(3, "Crema Sensodyne"))
+    assert _ids(indice, "crema") == [1, 3]
+    carga.liberar.set()
+    for _ in range(100):
+        if _ids(indice, "crema") == [1, 2, 3]:
+            break
+        time.sleep(0.01)
+    assert _ids(indice, "crema") == [1, 2, 3]
@@ -0,0 +1,27 @@
+"""Catálogo de productos en memoria frente a cambios hechos por otros procesos"""
+from app.models.producto import Producto
+from app.services import producto_service
+
+
+def test_producto_creado_en_otro_proceso_se_encuentra_sin_esperar_el_vencimiento(db, fabrica):
+    producto_service.invalidar_catalogo()
+    producto_service.get_producto_catalogo(db, 0)  # carga el catálogo
+
+    # La fábrica guarda directo en la base, sin invalidar el catálogo de este proceso
+    producto = fabrica.producto(codigo_barras=f"779{fabrica.numero():010d}")
+
+    assert producto_service.get_producto_catalogo(db, producto.id).codigo == producto.codigo
+    assert producto_service.get_producto_catalogo_por_barras(db, producto.codigo_barras).id == producto.id
+    assert producto_service.get_nombres_productos(db, [producto.id]) == {producto.id: producto.nombre}
+    assert producto_service.get_producto_catalogo(db, 10 ** 9) is None
+
+
+def test_producto_reactivado_en_otro_proceso_figura_activo(db, fabrica):
+    producto = fabrica.producto(activo=False)
+    producto_service.invalidar_catalogo()
+    assert not producto_service.get_producto_catalogo(db, producto.id).activo
+
+    db.query(Producto).filter(Producto.id == producto.id).update({Producto.activo: True})
+    db.commit()
+
+    assert producto_service.get_producto_catalogo(db, producto.id).activo
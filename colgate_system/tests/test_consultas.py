@@ -0,0 +1,70 @@
+"""
+Cantidad de sentencias SQL de los listados y reportes: no debe crecer con el
+tamaño de página ni con la cantidad de datos (sin consultas N+1)
+"""
+from datetime import datetime
+
+import pytest
+
+from app.cache import cache_respuestas
+from app.models.inventario import MovimientoInventario, TipoMovimiento
+
+# Sesión de trabajo: conteo, página, relaciones cargadas en bloque y margen
+MAX_SENTENCIAS = 6
+
+
+def _sentencias(cliente_api, contar_consultas, ruta, params):
+    cliente_api.get(ruta, params=params)  # Carga las cachés en memoria de la primera consulta
+    cache_respuestas.invalidar()
+    with contar_consultas() as consultas:
+        respuesta = cliente_api.get(ruta, params=params)
+    assert respuesta.status_code == 200, respuesta.text
+    return len(consultas.sentencias), respuesta.json()
+
+
+@pytest.fixture
+def datos_listados(fabrica):
+    cliente = fabrica.cliente()
+    almacen = fabrica.almacen()
+    productos = [fabrica.producto() for _ in range(3)]
+    for i in range(40):
+        venta = fabrica.venta(cliente)
+        for producto in productos[:2]:
+            fabrica.detalle(venta, producto, 1)
+        fabrica.envio(venta, fecha_programada=datetime(2036, 1, 5))
+        fabrica.db.add(MovimientoInventario(
+            almacen_id=almacen.id, producto_id=productos[i % 3].id, tipo=TipoMovimiento.ENTRADA_COMPRA,
+            cantidad=1, stock_anterior=i, stock_posterior=i + 1
+        ))
+    fabrica.db.commit()
+    return cliente, almacen
+
+
+@pytest.mark.parametrize("ruta, params", [
+    ("/api/ventas", {"cliente_id": "{cliente}"}),
+    ("/api/ventas", {"cliente_id": "{cliente}", "cursor": ""}),
+    ("/api/logistica/envios", {"fecha": "2036-01-05"}),
+    ("/api/inventario/movimientos", {"almacen_id": "{almacen}"}),
+])
+def test_listados_no_crecen_con_el_tamano_de_pagina(cliente_api, contar_consultas, datos_listados, ruta, params):
+    cliente, almacen = datos_listados
+    params = {k: v.format(cliente=cliente.id, almacen=almacen.id) for k, v in params.items()}
+
+    chica, _ = _sentencias(cliente_api, contar_consultas, ruta, {**params, "limit": 5})
+    grande, items_grande = _sentencias(cliente_api, contar_consultas, ruta, {**params, "limit": 40})
+
+    if isinstance(items_grande, dict):
+        items_grande = items_grande["items"]
+    assert len(items_grande) == 40
+    assert chica == grande
+    assert grande <= MAX_SENTENCIAS
+
+
+@pytest.mark.parametrize("ruta", ["/api/reportes/dashboard", "/api/reportes/ventas/mensual", "/api/reportes/kpis"])
+def test_reportes_no_crecen_con_los_datos(cliente_api, contar_consultas, fabrica, ruta):
+    antes, _ = _sentencias(cliente_api, contar_consultas, ruta, {})
+    for _ in range(20):
+        venta = fabrica.venta(fabrica.cliente())
+        fabrica.detalle(venta, fabrica.producto(), 2)
+    despues, _ = _sentencias(cliente_api, contar_consultas, ruta, {})
+    assert despues == antes
@@ -0,0 +1,48 @@
+"""Matriz de distancias en la optimización de rutas"""
+from datetime import date, datetime
+import os
+
+import pytest
+
+from app.config import settings
+from app.distancias import haversine_km
+from app.schemas.cliente import ClienteUpdate
+from app.schemas.logistica import RutaOptimizarRequest
+from app.services import cliente_service, logistica_service
+
+
+def _archivos_matriz():
+    if not os.path.isdir(settings.DISTANCIAS_DIRECTORIO):
+        return set()
+    return {n for n in os.listdir(settings.DISTANCIAS_DIRECTORIO) if n.endswith(".f32")}
+
+
+def test_rutas_usan_la_matriz_en_cache(db, fabrica):
+    almacen = fabrica.almacen(latitud=-12.05, longitud=-77.04)
+    vehiculo, conductor = fabrica.vehiculo(), fabrica.conductor()
+    a = fabrica.cliente(latitud=-12.10, longitud=-77.03)
+    b = fabrica.cliente(latitud=-12.11, longitud=-77.00)
+    for cliente in (a, b):
+        fabrica.envio(fabrica.venta(cliente), fecha_programada=datetime(2035, 3, 1))
+    solicitud = RutaOptimizarRequest(
+        fecha=date(2035, 3, 1), almacen_id=almacen.id,
+        vehiculo_ids=[vehiculo.id], conductor_ids=[conductor.id], guardar=False
+    )
+
+    antes = _archivos_matriz()
+    [ruta] = logistica_service.optimizar_rutas(db, solicitud)["rutas"]
+    nuevos = _archivos_matriz() - antes
+    assert len(nuevos) == 1
+
+    # Simular otra vez reutiliza el mismo archivo
+    logistica_service.optimizar_rutas(db, solicitud)
+    assert _archivos_matriz() - antes == nuevos
+
+    puntos = [(-12.05, -77.04), (-12.10, -77.03), (-12.11, -77.00), (-12.05, -77.04)]
+    esperado = sum(haversine_km(*p, *q).item() for p, q in zip(puntos, puntos[1:]))
+    assert ruta["distancia_km"] == pytest.approx(esperado, abs=0.01)
+
+    # Mover un cliente actualiza la matriz en su lugar: la siguiente simulación no crea otra
+    cliente_service.actualizar_cliente(db, a.id, ClienteUpdate(latitud=-12.12, longitud=-77.05))
+    logistica_service.optimizar_rutas(db, solicitud)
+    assert len(_archivos_matriz() - antes) == 1
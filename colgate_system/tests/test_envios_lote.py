@@ -0,0 +1,48 @@
+"""Creación de envíos en lote: filtro por día local y solicitudes simultáneas"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import threading
+
+from app.database import SessionLocal
+from app.models.logistica import Envio
+from app.schemas.logistica import EnvioLoteRequest
+from app.services import logistica_service
+
+
+def test_filtra_por_dia_de_entrega_local(db, fabrica):
+    del_dia = fabrica.venta(fabrica.cliente(), fecha_entrega_solicitada=datetime(2032, 5, 10))
+    otro_dia = fabrica.venta(fabrica.cliente(), fecha_entrega_solicitada=datetime(2032, 5, 11))
+
+    resultado = logistica_service.crear_envios_lote(db, EnvioLoteRequest(fecha=date(2032, 5, 10)))
+
+    assert resultado["creados"] == 1
+    assert db.query(Envio).filter(Envio.venta_id == del_dia.id).count() == 1
+    assert db.query(Envio).filter(Envio.venta_id == otro_dia.id).count() == 0
+
+
+def test_lotes_simultaneos_no_duplican_envios(fabrica):
+    ventas = [
+        fabrica.venta(fabrica.cliente(), fecha_entrega_solicitada=datetime(2032, 6, 1))
+        for _ in range(40)
+    ]
+    solicitud = EnvioLoteRequest(fecha=date(2032, 6, 1))
+    inicio = threading.Barrier(4)
+
+    def crear(_):
+        db = SessionLocal()
+        try:
+            inicio.wait()
+            return logistica_service.crear_envios_lote(db, solicitud)["creados"]
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(4) as ejecutor:
+        creados = list(ejecutor.map(crear, range(4)))
+
+    db = SessionLocal()
+    try:
+        por_venta = db.query(Envio.venta_id).filter(Envio.venta_id.in_([v.id for v in ventas])).all()
+    finally:
+        db.close()
+    assert sum(creados) == len(ventas)
+    assert sorted(id for id, in por_venta) == sorted(v.id for v in ventas)
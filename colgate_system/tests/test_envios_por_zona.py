@@ -0,0 +1,21 @@
+"""Vista de planificación por zona: envíos del día según la fecha programada local"""
+from datetime import date, datetime
+
+from app.models.logistica import EstadoEnvio, ZonaReparto
+from app.services import logistica_service
+
+
+def test_envios_por_zona_del_dia_local(db, fabrica):
+    zona = ZonaReparto(codigo=f"TZ{fabrica.numero():04d}", nombre="Zona prueba planificación")
+    db.add(zona)
+    db.commit()
+    fabrica.envio(
+        fabrica.venta(fabrica.cliente()), zona_id=zona.id,
+        estado=EstadoEnvio.ASIGNADO, fecha_programada=datetime(2034, 2, 10)
+    )
+
+    def envios_de_la_zona(dia):
+        return {z["zona_id"]: z["envios"] for z in logistica_service.get_envios_por_zona(db, dia)}.get(zona.id, 0)
+
+    assert envios_de_la_zona(date(2034, 2, 10)) == 1
+    assert envios_de_la_zona(date(2034, 2, 9)) == 0
@@ -0,0 +1,28 @@
+"""
+Filtros por día: las fechas programadas se guardan como fecha local ingresada
+por el usuario y no deben desplazarse a la zona horaria UTC.
+"""
+from datetime import date, datetime
+
+from app import fechas
+from app.services import logistica_service
+
+
+def test_rango_dia_local_no_convierte_zona():
+    assert fechas.rango_dia_local(date(2026, 10, 20)) == (datetime(2026, 10, 20), datetime(2026, 10, 21))
+    # El rango del negocio sí se desplaza (Lima, UTC-5)
+    assert fechas.rango_dia(date(2026, 10, 20))[0] == datetime(2026, 10, 20, 5)
+
+
+def test_envio_programado_se_lista_en_su_dia(db, fabrica):
+    venta = fabrica.venta(fabrica.cliente())
+    envio = fabrica.envio(venta, fecha_programada=datetime(2031, 3, 20))
+    tarde = fabrica.envio(fabrica.venta(fabrica.cliente()), fecha_programada=datetime(2031, 3, 20, 23, 30))
+
+    del_dia = {e.id for e in logistica_service.get_envios(db, fecha=date(2031, 3, 20)).items}
+    anterior = {e.id for e in logistica_service.get_envios(db, fecha=date(2031, 3, 19)).items}
+    siguiente = {e.id for e in logistica_service.get_envios(db, fecha=date(2031, 3, 21)).items}
+
+    assert {envio.id, tarde.id} <= del_dia
+    assert envio.id not in anterior and tarde.id not in anterior
+    assert envio.id not in siguiente and tarde.id not in siguiente
@@ -0,0 +1,54 @@
+"""Índice espacial de clientes: búsquedas y recarga en segundo plano"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from app.indice_espacial import IndiceEspacial
+
+
+def _ids(indice, db):
+    return [c["id"] for c in indice.cerca(db, 40.0, 10.0, 5, 10)]
+
+
+def test_cerca_ordena_por_distancia(db, fabrica):
+    lejano = fabrica.cliente(latitud=40.02, longitud=10.0)
+    cercano = fabrica.cliente(latitud=40.001, longitud=10.0)
+    fabrica.cliente(latitud=40.5, longitud=10.0)  # fuera del radio
+    assert _ids(IndiceEspacial(600, 0.01), db) == [cercano.id, lejano.id]
+
+
+def test_recarga_en_segundo_plano_conserva_el_indice_y_los_cambios(db, fabrica):
+    primero = fabrica.cliente(latitud=40.0, longitud=10.01)
+    indice = IndiceEspacial(0, 0.01)
+    antes = _ids(indice, db)
+    assert primero.id in antes
+
+    construir = indice._estado._construir
+    liberar, llamadas = threading.Event(), []
+
+    def construir_detenido(sesion):
+        llamadas.append(1)
+        liberar.wait(10)
+        return construir(sesion)
+
+    indice._estado._construir = construir_detenido
+    segundo = fabrica.cliente(latitud=40.0, longitud=10.02)
+    with ThreadPoolExecutor(10) as ejecutor:
+        resultados = list(ejecutor.map(lambda _: [c["id"] for c in indice.cerca(None, 40.0, 10.0, 5, 10)], range(50)))
+    assert all(r == antes for r in resultados)
+    assert len(llamadas) == 1
+
+    # Un cambio durante la recarga (aún sin guardar, la recarga lee la ubicación
+    # anterior) se ve de inmediato y se vuelve a aplicar sobre el índice nuevo
+    primero.latitud = 41.0
+    indice.actualizar(primero)
+    assert primero.id not in _ids(indice, db)
+    liberar.set()
+    for _ in range(100):
+        if segundo.id in _ids(indice, db):
+            break
+        time.sleep(0.01)
+    actuales = _ids(indice, db)
+    db.rollback()
+    assert segundo.id in actuales
+    assert primero.id not in actuales
@@ -0,0 +1,59 @@
+"""
+Plan de ejecución (EXPLAIN QUERY PLAN) de las consultas frecuentes de los
+servicios: cada filtro debe resolverse con su índice de la migración 0001
+"""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+from app.models.venta import EstadoVenta
+from app.models.logistica import EstadoEnvio
+from app.services import inventario_service, logistica_service, venta_service
+
+
+def _planes(db, contar_consultas, consulta):
+    """Detalle del plan de cada SELECT que ejecuta la consulta"""
+    with contar_consultas() as consultas:
+        consulta(db)
+    planes = []
+    with engine.connect() as conexion:
+        for sentencia, parametros in consultas.ejecutadas:
+            if sentencia.lstrip().upper().startswith("SELECT"):
+                filas = conexion.exec_driver_sql(f"EXPLAIN QUERY PLAN {sentencia}", parametros)
+                planes.append(" | ".join(fila[-1] for fila in filas))
+    return planes
+
+
+@pytest.mark.parametrize("consulta, indice", [
+    (lambda db: venta_service.get_ventas(db, cursor=""), "ix_ventas_fecha_pedido_id"),
+    (lambda db: venta_service.get_ventas(db, cliente_id=1, cursor=""), "ix_ventas_cliente_fecha_pedido"),
+    (lambda db: venta_service.get_ventas(db, vendedor_id=1, cursor=""), "ix_ventas_vendedor_fecha_pedido"),
+    (
+        lambda db: venta_service.get_ventas(db, estado=EstadoVenta.CONFIRMADO, fecha_desde=datetime(2026, 1, 1)),
+        "ix_ventas_estado_fecha_pedido"
+    ),
+    (lambda db: venta_service.get_ventas(db, cursor="", limit=5), "ix_detalles_venta_venta_id"),
+    (lambda db: inventario_service.get_movimientos(db, cursor=""), "ix_movimientos_fecha_id"),
+    (lambda db: inventario_service.get_movimientos(db, producto_id=1, cursor=""), "ix_movimientos_producto_fecha"),
+    (lambda db: inventario_service.get_movimientos(db, almacen_id=1, cursor=""), "ix_movimientos_almacen_fecha"),
+    (lambda db: inventario_service.get_o_crear_inventario(db, 1, 1), "uq_inventario_producto_almacen_lote"),
+    (
+        lambda db: inventario_service._inventario_por_producto(db, 1, [1, 2, 3]),
+        "uq_inventario_producto_almacen_lote"
+    ),
+    (lambda db: logistica_service.get_envios(db, fecha=date(2026, 10, 20)), "ix_envios_fecha_programada_id"),
+    (
+        lambda db: logistica_service.get_envios(db, estado=EstadoEnvio.PENDIENTE, fecha=date(2026, 10, 20)),
+        "ix_envios_estado_fecha_programada"
+    ),
+])
+def test_consultas_frecuentes_usan_indice(db, contar_consultas, fabrica, consulta, indice):
+    # Datos para que la consulta de detalles (selectinload) llegue a ejecutarse
+    venta = fabrica.venta(fabrica.cliente())
+    fabrica.detalle(venta, fabrica.producto(), 1)
+
+    planes = _planes(db, contar_consultas, consulta)
+    db.rollback()
+    assert any(f"INDEX {indice}" in plan for plan in planes), planes
@@ -0,0 +1,74 @@
+"""Numeración de documentos desde trabajadores en paralelo"""
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal, engine
+from app.models.venta import Venta, EstadoVenta
+from app.services import numeracion_service
+
+DOCUMENTOS = 10_000
+HILOS = 20
+
+
+def test_hilos_crean_documentos_sin_numeros_repetidos(fabrica):
+    cliente = fabrica.cliente()
+    prefijo = f"TH{fabrica.numero():04d}"
+
+    def trabajador(n: int) -> list:
+        codigos = []
+        db = SessionLocal()
+        try:
+            for i in range(DOCUMENTOS // HILOS // 5):
+                # Pedidos de un código y de cinco, como crear_venta y crear_ventas_lote
+                if i % 2:
+                    lote = numeracion_service.generar_codigos(Venta.numero, prefijo, 6, 5)
+                else:
+                    lote = [numeracion_service.generar_codigos(Venta.numero, prefijo, 6)[0] for _ in range(5)]
+                db.execute(insert(Venta), [
+                    {"numero": codigo, "cliente_id": cliente.id, "estado": EstadoVenta.BORRADOR}
+                    for codigo in lote
+                ])
+                db.commit()
+                codigos.extend(lote)
+        finally:
+            db.close()
+        return codigos
+
+    with ThreadPoolExecutor(HILOS) as ejecutor:
+        codigos = [c for lote in ejecutor.map(trabajador, range(HILOS)) for c in lote]
+
+    assert len(codigos) == DOCUMENTOS
+    assert len(set(codigos)) == DOCUMENTOS
+    db = SessionLocal()
+    try:
+        assert db.query(Venta).filter(Venta.numero.like(f"{prefijo}%")).count() == DOCUMENTOS
+    finally:
+        db.close()
+
+
+def _proceso(prefijo: str, cantidad: int, cola):
+    # Conexiones y bloques heredados del proceso padre no se comparten
+    engine.dispose(close=False)
+    numeracion_service._bloques.clear()
+    cola.put([
+        codigo
+        for i in range(cantidad)
+        for codigo in numeracion_service.generar_codigos(Venta.numero, prefijo, 6, 1 + i % 3)
+    ])
+
+
+def test_procesos_no_repiten_codigos(fabrica):
+    prefijo = f"TP{fabrica.numero():04d}"
+    contexto = multiprocessing.get_context("fork")
+    cola = contexto.Queue()
+    procesos = [contexto.Process(target=_proceso, args=(prefijo, 600, cola)) for _ in range(4)]
+    for proceso in procesos:
+        proceso.start()
+    codigos = [c for _ in procesos for c in cola.get(timeout=120)]
+    for proceso in procesos:
+        proceso.join()
+
+    assert len(codigos) == 4 * (200 * (1 + 2 + 3))
+    assert len(set(codigos)) == len(codigos)
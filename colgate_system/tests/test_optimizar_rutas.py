@@ -0,0 +1,24 @@
+"""Optimización de rutas: envíos del día según la fecha programada local"""
+from datetime import date, datetime
+
+from app.models.logistica import RutaReparto
+from app.schemas.logistica import RutaOptimizarRequest
+from app.services import logistica_service
+
+
+def test_rutas_del_dia_con_fecha_local(db, fabrica):
+    almacen = fabrica.almacen(latitud=-12.09, longitud=-77.03)
+    vehiculo, conductor = fabrica.vehiculo(), fabrica.conductor()
+    cliente = fabrica.cliente(latitud=-12.12, longitud=-77.02)
+    del_dia = fabrica.envio(fabrica.venta(cliente), fecha_programada=datetime(2033, 1, 15))
+    dia_siguiente = fabrica.envio(fabrica.venta(cliente), fecha_programada=datetime(2033, 1, 16))
+
+    resultado = logistica_service.optimizar_rutas(db, RutaOptimizarRequest(
+        fecha=date(2033, 1, 15), almacen_id=almacen.id,
+        vehiculo_ids=[vehiculo.id], conductor_ids=[conductor.id]
+    ))
+
+    [ruta] = resultado["rutas"]
+    assert del_dia.id in ruta["envio_ids"]
+    assert dia_siguiente.id not in ruta["envio_ids"]
+    assert db.get(RutaReparto, ruta["ruta_id"]).fecha == datetime(2033, 1, 15)
@@ -0,0 +1,109 @@
+"""Confirmaciones simultáneas de ventas que compiten por stock limitado"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.models.inventario import Inventario
+from app.models.venta import EstadoVenta, Venta
+from app.schemas.inventario import AjusteInventario
+from app.services import inventario_service, venta_service
+
+VENTAS = 40
+
+
+def test_confirmaciones_simultaneas_no_sobrevenden(fabrica):
+    almacen = fabrica.almacen()
+    escaso, holgado = fabrica.producto(), fabrica.producto()
+    fabrica.stock(escaso, almacen, 50)
+    fabrica.stock(holgado, almacen, 100)
+    ventas = []
+    for _ in range(VENTAS):
+        venta = fabrica.venta(fabrica.cliente(), estado=EstadoVenta.BORRADOR)
+        fabrica.detalle(venta, escaso, 3)
+        fabrica.detalle(venta, holgado, 2)
+        ventas.append(venta.id)
+
+    def inventarios(db):
+        return db.query(Inventario).filter(Inventario.almacen_id == almacen.id).all()
+
+    # Vigila que la reserva nunca supere el stock mientras se confirman las ventas
+    terminado, excesos = threading.Event(), []
+
+    def vigilar():
+        db = SessionLocal()
+        try:
+            while not terminado.is_set():
+                excesos.extend(i.id for i in inventarios(db) if i.stock_reservado > i.stock_actual)
+                db.rollback()
+        finally:
+            db.close()
+
+    inicio = threading.Barrier(16)
+
+    def confirmar(venta_id: int) -> bool:
+        db = SessionLocal()
+        try:
+            if venta_id in ventas[:16]:
+                inicio.wait()
+            venta_service.confirmar_venta(db, venta_id, almacen.id)
+            return True
+        except ValueError:
+            return False
+        finally:
+            db.close()
+
+    vigilante = threading.Thread(target=vigilar)
+    vigilante.start()
+    try:
+        with ThreadPoolExecutor(16) as ejecutor:
+            confirmadas = sum(ejecutor.map(confirmar, ventas))
+    finally:
+        terminado.set()
+        vigilante.join()
+
+    db = SessionLocal()
+    try:
+        stock = {i.producto_id: i for i in inventarios(db)}
+        estados = [estado for estado, in db.query(Venta.estado).filter(Venta.id.in_(ventas))]
+    finally:
+        db.close()
+
+    # 50 unidades alcanzan para 16 ventas de 3; las rechazadas no reservan nada
+    assert confirmadas == 16
+    assert estados.count(EstadoVenta.CONFIRMADO) == 16
+    assert estados.count(EstadoVenta.BORRADOR) == VENTAS - 16
+    assert not excesos
+    assert (stock[escaso.id].stock_reservado, stock[escaso.id].stock_disponible) == (48, 2)
+    assert (stock[holgado.id].stock_reservado, stock[holgado.id].stock_disponible) == (32, 68)
+
+
+def test_reserva_entre_la_lectura_y_la_escritura_de_un_movimiento(db, fabrica):
+    almacen, producto, usuario = fabrica.almacen(), fabrica.producto(), fabrica.usuario()
+    inventario = fabrica.stock(producto, almacen, 100)
+
+    # Apenas el movimiento lee el inventario, otra sesión reserva 30 unidades y confirma
+    reservado = []
+
+    @event.listens_for(db, "do_orm_execute")
+    def reservar_en_medio(estado):
+        if reservado or not estado.is_select or Inventario.__mapper__ not in estado.all_mappers:
+            return None
+        resultado = estado.invoke_statement().freeze()
+        otra = SessionLocal()
+        try:
+            reservado.append(inventario_service.reservar_stock(otra, producto.id, almacen.id, 30))
+        finally:
+            otra.close()
+        return resultado()
+
+    movimiento = inventario_service.ajustar_inventario(db, AjusteInventario(
+        almacen_id=almacen.id, producto_id=producto.id, cantidad=-5, motivo="Merma"
+    ), usuario.id)
+    event.remove(db, "do_orm_execute", reservar_en_medio)
+
+    db.refresh(inventario)
+    assert reservado == [True]
+    assert (movimiento.stock_anterior, movimiento.stock_posterior) == (100, 95)
+    assert (inventario.stock_actual, inventario.stock_reservado, inventario.stock_disponible) == (95, 30, 65)
@@ -0,0 +1,181 @@
+"""Resumen diario de ventas: UPSERT por clave y tipo de cliente guardado en la venta"""
+from datetime import date, datetime
+import threading
+
+from app import fechas
+from app.database import SessionLocal
+from app.models.cliente import TipoCliente
+from app.models.logistica import EstadoEnvio, RutaReparto
+from app.models.venta import EstadoVenta, VentaResumenDiario
+from app.services import logistica_service, reporte_service, venta_service
+
+
+def _acumulados(db, fecha):
+    db.expire_all()
+    return {
+        (r.estado, r.vendedor_id, r.cliente_tipo): (r.cantidad, round(r.total, 2))
+        for r in db.query(VentaResumenDiario).filter(VentaResumenDiario.fecha == fecha)
+    }
+
+
+def test_upsert_acumula_en_una_fila_aun_sin_vendedor(db, fabrica):
+    fecha = date(2035, 3, 1)
+    vendedor = fabrica.usuario()
+    for vendedor_id in (None, None, vendedor.id):
+        reporte_service._ajustar_resumen(db, fecha, EstadoVenta.CONFIRMADO, vendedor_id, None, 1, 10.0)
+    reporte_service._ajustar_resumen(db, fecha, EstadoVenta.CONFIRMADO, None, None, -1, -10.0)
+    db.commit()
+
+    assert _acumulados(db, fecha) == {
+        (EstadoVenta.CONFIRMADO, None, None): (1, 10.0),
+        (EstadoVenta.CONFIRMADO, vendedor.id, None): (1, 10.0),
+    }
+
+
+def test_upsert_concurrente_no_duplica_el_acumulado():
+    fecha = date(2035, 3, 2)
+    hilos, por_hilo = 8, 10
+    barrera = threading.Barrier(hilos)
+    errores = []
+
+    def sumar():
+        sesion = SessionLocal()
+        try:
+            barrera.wait()
+            for _ in range(por_hilo):
+                reporte_service._ajustar_resumen(
+                    sesion, fecha, EstadoVenta.BORRADOR, None, TipoCliente.MAYORISTA, 1, 2.5
+                )
+                sesion.commit()
+        except Exception as e:
+            errores.append(e)
+        finally:
+            sesion.close()
+
+    trabajadores = [threading.Thread(target=sumar) for _ in range(hilos)]
+    for hilo in trabajadores:
+        hilo.start()
+    for hilo in trabajadores:
+        hilo.join()
+
+    assert errores == []
+    db = SessionLocal()
+    try:
+        assert _acumulados(db, fecha) == {
+            (EstadoVenta.BORRADOR, None, TipoCliente.MAYORISTA): (hilos * por_hilo, hilos * por_hilo * 2.5)
+        }
+    finally:
+        db.close()
+
+
+def test_cambio_de_tipo_del_cliente_no_mueve_la_venta_de_grupo(db, fabrica):
+    creada = datetime(2035, 3, 3, 15, 0)
+    cliente = fabrica.cliente(tipo=TipoCliente.MINORISTA)
+    venta = fabrica.venta(
+        cliente, estado=EstadoVenta.BORRADOR, total=20.0,
+        cliente_tipo=cliente.tipo, fecha_creacion=creada
+    )
+    reporte_service.actualizar_resumen_venta(db, venta)
+    db.commit()
+
+    cliente.tipo = TipoCliente.MAYORISTA
+    venta.estado = EstadoVenta.CONFIRMADO
+    reporte_service.actualizar_resumen_venta(db, venta, EstadoVenta.BORRADOR)
+    db.commit()
+
+    dia = fechas.dia_negocio(creada)
+    assert _acumulados(db, dia) == {
+        (EstadoVenta.BORRADOR, None, TipoCliente.MINORISTA): (0, 0.0),
+        (EstadoVenta.CONFIRMADO, None, TipoCliente.MINORISTA): (1, 20.0),
+    }
+
+
+def test_ventas_mensuales_no_guardan_en_cache_datos_anteriores_al_commit(db, fabrica):
+    hoy = date(2040, 1, 15)
+    cliente = fabrica.cliente()
+    venta = fabrica.venta(
+        cliente, estado=EstadoVenta.CONFIRMADO, total=30.0,
+        cliente_tipo=cliente.tipo, fecha_creacion=datetime(2033, 5, 10, 15, 0)
+    )
+
+    # Otra sesión consulta (y guarda en cache) mientras el cambio aún no se confirma
+    reporte_service.actualizar_resumen_venta(db, venta)
+    otra = SessionLocal()
+    try:
+        assert 5 not in reporte_service.get_ventas_mensuales(otra, 2033, hoy)
+        db.commit()
+        assert reporte_service.get_ventas_mensuales(otra, 2033, hoy)[5] == (1, 30.0)
+    finally:
+        otra.close()
+
+
+def _simultaneas(operacion, veces=8) -> int:
+    """Ejecuta la operación en varios hilos a la vez (cada uno con su sesión); devuelve cuántas no fallaron"""
+    barrera = threading.Barrier(veces)
+    exitos, errores = [], []
+
+    def ejecutar():
+        sesion = SessionLocal()
+        try:
+            barrera.wait()
+            operacion(sesion)
+            exitos.append(True)
+        except ValueError:
+            pass
+        except Exception as e:
+            errores.append(e)
+        finally:
+            sesion.close()
+
+    hilos = [threading.Thread(target=ejecutar) for _ in range(veces)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert errores == []
+    return len(exitos)
+
+
+def _venta_en_resumen(db, fabrica, estado, creada):
+    cliente = fabrica.cliente()
+    venta = fabrica.venta(cliente, estado=estado, total=15.0, cliente_tipo=cliente.tipo, fecha_creacion=creada)
+    reporte_service.actualizar_resumen_venta(db, venta)
+    db.commit()
+    return venta
+
+
+def _por_estado(db, creada):
+    return {
+        estado: cantidad
+        for (estado, _, _), (cantidad, _) in _acumulados(db, fechas.dia_negocio(creada)).items()
+        if cantidad
+    }
+
+
+def test_cambios_de_estado_simultaneos_mueven_el_resumen_una_vez(db, fabrica):
+    creada = datetime(2035, 4, 1, 15, 0)
+    venta = _venta_en_resumen(db, fabrica, EstadoVenta.CONFIRMADO, creada)
+    almacen = fabrica.almacen()
+
+    _simultaneas(lambda sesion: venta_service.preparar_venta(sesion, venta.id))
+    assert _por_estado(db, creada) == {EstadoVenta.EN_PREPARACION: 1}
+
+    assert _simultaneas(lambda sesion: venta_service.cancelar_venta(sesion, venta.id, almacen.id)) == 1
+    assert _por_estado(db, creada) == {EstadoVenta.CANCELADO: 1}
+
+
+def test_envio_iniciado_y_completado_a_la_vez_mueve_el_resumen_una_vez(db, fabrica):
+    creada = datetime(2035, 4, 2, 15, 0)
+    venta = _venta_en_resumen(db, fabrica, EstadoVenta.LISTO_ENVIO, creada)
+    ruta = RutaReparto(codigo=f"TRUT{fabrica.numero():05d}", nombre="Ruta prueba", fecha=creada, entregas_exitosas=0)
+    db.add(ruta)
+    db.commit()
+    envio = fabrica.envio(venta, estado=EstadoEnvio.ASIGNADO, ruta_id=ruta.id)
+
+    _simultaneas(lambda sesion: logistica_service.iniciar_envio(sesion, envio.id))
+    assert _por_estado(db, creada) == {EstadoVenta.EN_RUTA: 1}
+
+    assert _simultaneas(lambda sesion: logistica_service.completar_envio(sesion, envio.id, "Receptor")) == 1
+    assert _por_estado(db, creada) == {EstadoVenta.ENTREGADO: 1}
+    db.refresh(ruta)
+    assert ruta.entregas_exitosas == 1